@@ -5,22 +5,32 @@ from fastapi import UploadFile
 from Models import ResponseSignal
 import re
 import os
+import asyncio
 from typing import List
-from Stores.LLM.LLMEnums import DocumentTypeEnum
+from Stores.LLM.LLMEnums import DocumentTypeEnum, RequestPriorityEnum
+from Stores.Sparse.SparseEnums import SparseBackendEnums
+from Stores.Sparse.HybridFusion import fuse_rankings
 from Helpers.Config import get_settings
+from Utils.AnswerCache import normalize_question
+from Stores.LLM.ContextBuilder import TokenCounter, merge_adjacent, pack_passages
 import json
+import logging
 
-
+logger = logging.getLogger("uvicorn")
 
 
 class NLPController (basecontroller) : 
 
-    def __init__(self ,genration_client ,embedding_client ,vectordb_client,template_parser) :
+    def __init__(self ,genration_client ,embedding_client ,vectordb_client,template_parser , answer_cache = None ,
+                 chunk_model = None , reranker = None) :
         super().__init__()
         self.genration_client = genration_client
         self.embedding_client = embedding_client
         self.vectordb_client = vectordb_client  
         self.template_parser = template_parser
+        self.answer_cache = answer_cache
+        self.chunk_model = chunk_model
+        self.reranker = reranker
 
 
     def create_collection_name (self , project_id  : str) :
@@ -38,6 +48,10 @@ class NLPController (basecontroller) :
         return json.loads(
                 json.dumps(collection_info,default=lambda x: x.__dict__)
         )
+
+    async def get_vector_index_status ( self , project : Project) :
+        collection_name = self.create_collection_name(project_id = project.project_id)
+        return await self.vectordb_client.get_index_build_status(collection_name = collection_name)
        
 
     async def index_into_vector_db ( self, project : Project , chunks : list [dataChunk] , 
@@ -47,7 +61,9 @@ class NLPController (basecontroller) :
 
         texts = [c.chunk_text for c in chunks]
         metadata = [c.chunk_metadata for c in chunks]
-        vectors = self.embedding_client.embed_text(text = texts ,document_type = DocumentTypeEnum.DOCUMENT.value )
+        # background priority: bulk indexing only uses the embedding quota interactive queries leave over
+        vectors = await self.embedding_client.aembed_text(text = texts ,document_type = DocumentTypeEnum.DOCUMENT.value ,
+                                                          priority = RequestPriorityEnum.BACKGROUND)
 
         if not vectors:
             return False
@@ -62,53 +78,162 @@ class NLPController (basecontroller) :
 
         return True
 
-    async def search_vector_db_collection(self, project: Project, text: str, limit: int = 5):
-        query_vector = None
+    async def delete_assets_index_data(self, project: Project, asset_ids: List[int], chunk_model):
+        """
+        Remove the vectors and BM25 postings of every chunk of the given assets.
+        Runs before the chunk rows are deleted: one chunk id lookup, one vector delete, one BM25 rewrite.
+        These steps and the row delete (one transaction, AssetModel.delete_assets_with_chunks) are not
+        atomic together: the vector store and the BM25 files live outside Postgres. Each step is
+        idempotent, so a delete interrupted half way is completed by running it again.
+        """
+        chunk_ids = await chunk_model.get_chunk_ids_by_asset_ids(asset_ids)
+        if not chunk_ids:
+            return 0
+
         collection_name = self.create_collection_name(project_id=project.project_id)
+        await self.vectordb_client.delete_by_chunk_ids(collection_name, chunk_ids)
+
+        # file rewrite under the project file lock: off the event loop
+        try:
+            from Stores.Sparse import BM25Index
+            await asyncio.to_thread(BM25Index.delete_chunks, project.project_id, chunk_ids)
+        except Exception as e:
+            logger.warning("BM25 delete failed for project %s: %s", project.project_id, e)
 
-        vector = self.embedding_client.embed_text(text=text, document_type=DocumentTypeEnum.QUERY.value)
+        return len(chunk_ids)
 
+    async def _embed_query(self, text: str):
+        # interactive priority: goes ahead of queued indexing batches on the shared embedding quota
+        vector = await self.embedding_client.aembed_text(text=text, document_type=DocumentTypeEnum.QUERY.value)
         if not vector or len(vector) == 0:
-            return False
-
+            return None
         if isinstance(vector, list) and len(vector) > 0:
-            query_vector = vector[0]
+            return vector[0] or None
+        return None
+
+    async def _bm25_search_many(self, project: Project, texts: List[str], top_k: int):
+        """BM25 hits of every query in one worker thread (CPU bound)."""
+        from Stores.Sparse import BM25Index
+
+        def search_all():
+            hits = []
+            for text in texts:
+                try:
+                    hits.append(BM25Index.search(project.project_id, text, top_k=top_k))
+                except Exception as e:
+                    # hybrid search degrades to dense-only for this query: make it visible
+                    logger.warning("BM25 search failed for project %s: %s", project.project_id, e)
+                    hits.append([])
+            return hits
+
+        return await asyncio.to_thread(search_all)
+
+    async def fuse_hybrid_results(self, project: Project, dense_results: List[RetrivedDocument],
+                                  sparse_hits: List[tuple], limit: int) -> List[RetrivedDocument]:
+        """
+        Union the dense and BM25 candidates and fuse them (HYBRID_FUSION_METHOD: RRF or WEIGHTED).
+        Chunks found only by BM25 are fetched from the vector DB in one lookup.
+        """
+        batch = await self.fuse_hybrid_many(project, [dense_results], [sparse_hits], limit)
+        return batch[0]
+
+    async def fuse_hybrid_many(self, project: Project, batch_dense: List[List[RetrivedDocument]],
+                               batch_hits: List[List[tuple]], limit: int) -> List[List[RetrivedDocument]]:
+        """fuse_hybrid_results for a batch of queries: the BM25-only chunks of all queries share one lookup."""
+        settings = get_settings()
+        fused, docs = [], {}
+        for dense_results, sparse_hits in zip(batch_dense, batch_hits):
+            dense_results = [doc for doc in dense_results or [] if getattr(doc, "chunk_id", None) is not None]
+            chunk_ids, scores = fuse_rankings(
+                dense_ids=[doc.chunk_id for doc in dense_results],
+                dense_scores=[doc.score for doc in dense_results],
+                sparse_ids=[cid for cid, _ in sparse_hits],
+                sparse_scores=[score for _, score in sparse_hits],
+                limit=limit,
+                method=settings.HYBRID_FUSION_METHOD,
+                alpha=getattr(settings, "HYBRID_SEARCH_ALPHA", 0.6),
+                rrf_k=settings.HYBRID_RRF_K,
+            )
+            docs.update({doc.chunk_id: doc for doc in dense_results})
+            fused.append(list(zip(chunk_ids.tolist(), scores.tolist())))
+
+        missing = list(dict.fromkeys(cid for ranking in fused for cid, _ in ranking if cid not in docs))
+        if missing:
+            collection_name = self.create_collection_name(project_id=project.project_id)
+            for doc in await self.vectordb_client.get_by_chunk_ids(collection_name, missing):
+                docs[doc.chunk_id] = doc
+
+        return [
+            [
+                RetrivedDocument(
+                    text=docs[cid].text,
+                    score=score,
+                    metadata=getattr(docs[cid], "metadata", None),
+                    chunk_id=cid,
+                )
+                for cid, score in ranking
+                if cid in docs
+            ]
+            for ranking in fused
+        ]
 
-        if not query_vector:
+    async def search_hybrid_local(self, project: Project, text: str, limit: int, query_vector: list = None):
+        """
+        Dense and BM25 legs run concurrently (embedding + vector search on the event loop,
+        BM25 in a worker thread), so latency is bounded by the slower leg.
+        """
+        collection_name = self.create_collection_name(project_id=project.project_id)
+        candidates_limit = max(limit * 2, 10)
+
+        async def dense_leg():
+            vector = query_vector or await self._embed_query(text)
+            if not vector:
+                return None
+            return await self.vectordb_client.search_by_vector(
+                collection_name=collection_name,
+                vector=vector,
+                limit=candidates_limit,
+            )
+
+        dense_results, sparse_hits = await asyncio.gather(
+            dense_leg(), self._bm25_search_many(project, [text], candidates_limit)
+        )
+        if dense_results is None:
             return False
 
+        results = await self.fuse_hybrid_results(project, dense_results, sparse_hits[0], limit)
+        return results or False
+
+    async def search_hybrid_in_db(self, project: Project, text: str, query_vector: list, limit: int):
+        """Dense + sparse search fused inside the vector DB (pgvector SQL or Qdrant Query API); None when it can not run it."""
+        collection_name = self.create_collection_name(project_id=project.project_id)
+        return await self.vectordb_client.search_hybrid(
+            collection_name=collection_name,
+            vector=query_vector,
+            query_text=text,
+            project_id=project.project_id,
+            limit=limit,
+            candidates_limit=max(limit * 2, 10),
+            rrf_k=get_settings().HYBRID_RRF_K,
+        )
+
+    async def search_vector_db_collection(self, project: Project, text: str, limit: int = 5, query_vector: list = None):
+        collection_name = self.create_collection_name(project_id=project.project_id)
+
         settings = get_settings()
         hybrid_enabled = getattr(settings, "HYBRID_SEARCH_ENABLED", False)
-        hybrid_alpha = getattr(settings, "HYBRID_SEARCH_ALPHA", 0.6)
+        if hybrid_enabled and settings.SPARSE_BACKEND == SparseBackendEnums.BM25.value:
+            return await self.search_hybrid_local(project, text, limit, query_vector=query_vector)
+
+        query_vector = query_vector or await self._embed_query(text)
+        if not query_vector:
+            return False
+
         if hybrid_enabled:
-            from Stores.Sparse import BM25Index
-            candidate_mult = 2
-            dense_limit = max(limit * candidate_mult, 10)
-            results = await self.vectordb_client.search_by_vector(
-                collection_name=collection_name,
-                vector=query_vector,
-                limit=dense_limit,
-            )
-            if not results or len(results) == 0:
-                return False
-            bm25_hits = BM25Index.search(project.project_id, text, top_k=dense_limit)
-            bm25_by_id = {cid: score for cid, score in bm25_hits}
-            bm25_max = max(bm25_by_id.values()) if bm25_by_id else 1.0
-            combined = []
-            for doc in results:
-                cid = getattr(doc, "chunk_id", None)
-                bm25_norm = (bm25_by_id.get(cid, 0) / bm25_max) if bm25_max > 0 else 0.0
-                score = hybrid_alpha * doc.score + (1.0 - hybrid_alpha) * bm25_norm
-                combined.append(
-                    RetrivedDocument(
-                        text=doc.text,
-                        score=score,
-                        metadata=getattr(doc, "metadata", None),
-                        chunk_id=cid,
-                    )
-                )
-            combined.sort(key=lambda d: d.score, reverse=True)
-            return combined[:limit]
+            results = await self.search_hybrid_in_db(project, text, query_vector, limit)
+            if results is not None:
+                return results or False
+            return await self.search_hybrid_local(project, text, limit, query_vector=query_vector)
 
         results = await self.vectordb_client.search_by_vector(
             collection_name=collection_name,
@@ -121,41 +246,119 @@ class NLPController (basecontroller) :
 
         return results
 
+    async def search_many_vector_db_collection(self, project: Project, texts: List[str], limit: int = 5):
+        """
+        Batch search: one embedding call for every query and one vector DB round trip.
+        Returns one result list per query, in query order.
+        """
+        collection_name = self.create_collection_name(project_id=project.project_id)
 
-    async def answer_rag_question (self , project : Project , query : str ,limit : int = 5) :
+        settings = get_settings()
+        hybrid_enabled = getattr(settings, "HYBRID_SEARCH_ENABLED", False)
+        search_limit = max(limit * 2, 10) if hybrid_enabled else limit
+
+        async def dense_leg(vectors=None):
+            vectors = vectors or await self.embedding_client.aembed_text(text=texts,
+                                                                         document_type=DocumentTypeEnum.QUERY.value)
+            if not vectors or len(vectors) != len(texts):
+                return None
+            return await self.vectordb_client.search_many(
+                collection_name=collection_name,
+                vectors=vectors,
+                limit=search_limit,
+            )
 
+        if hybrid_enabled and settings.SPARSE_BACKEND == SparseBackendEnums.BM25.value:
+            batch_results, batch_hits = await asyncio.gather(
+                dense_leg(), self._bm25_search_many(project, texts, search_limit)
+            )
+            if batch_results is None:
+                return False
+            return await self.fuse_hybrid_many(project, batch_results, batch_hits, limit)
 
-        answer, full_prompt ,chat_history = None , None , None
+        vectors = await self.embedding_client.aembed_text(text=texts, document_type=DocumentTypeEnum.QUERY.value)
+        if not vectors or len(vectors) != len(texts):
+            return False
 
-        #step 1 : retrive related document :
-        retrieved_documents = await self.search_vector_db_collection(project = project , text = query , limit = limit)
+        if not hybrid_enabled:
+            return await dense_leg(vectors)
 
-        if not retrieved_documents or len(retrieved_documents) == 0 :
-            return answer, full_prompt ,chat_history
+        batch_results = await self.vectordb_client.search_hybrid_many(
+            collection_name=collection_name,
+            vectors=vectors,
+            query_texts=texts,
+            project_id=project.project_id,
+            limit=limit,
+            candidates_limit=search_limit,
+            rrf_k=settings.HYBRID_RRF_K,
+        )
+        if all(results is not None for results in batch_results):
+            return batch_results
 
-        #step 2 : constract LLM prompt (include source metadata when available)
-        system_prompt = self.template_parser.get("rag", "system_prompt")
-        doc_lines = []
-        for idx, doc in enumerate(retrieved_documents):
-            chunk_text = self.genration_client.process_text(doc.text)
-            if getattr(doc, "metadata", None) and isinstance(doc.metadata, dict):
-                parts = []
-                if doc.metadata.get("source"):
-                    parts.append(doc.metadata["source"])
-                if doc.metadata.get("page") is not None:
-                    parts.append(f"page {doc.metadata['page']}")
-                if doc.metadata.get("domain"):
-                    parts.append(f"domain: {doc.metadata['domain']}")
-                if parts:
-                    chunk_text = "From: " + ", ".join(parts) + "\n" + chunk_text
-            doc_lines.append(
-                self.template_parser.get("rag", "document_prompt", {"doc_num": idx + 1, "chunk_text": chunk_text})
-            )
-        document_prompt = "\n".join(doc_lines)
+        batch_results, batch_hits = await asyncio.gather(
+            dense_leg(vectors), self._bm25_search_many(project, texts, search_limit)
+        )
+        return await self.fuse_hybrid_many(project, batch_results, batch_hits, limit)
+
+
+    async def retrieve_for_answer (self , project : Project , query : str , limit : int , query_vector : list = None) :
+        """
+        Documents to answer from. With a reranker, RERANK_CANDIDATES chunks are retrieved and
+        reranked, and the best `limit` are kept; otherwise the top `limit` of retrieval.
+        """
+        if self.reranker is None :
+            return await self.search_vector_db_collection(project = project , text = query , limit = limit ,
+                                                          query_vector = query_vector)
+
+        candidates = await self.search_vector_db_collection(project = project , text = query ,
+                                                            limit = max(limit , get_settings().RERANK_CANDIDATES) ,
+                                                            query_vector = query_vector)
+        if not candidates :
+            return candidates
+        return await self.reranker.rerank(query , candidates , limit)
+
+    def context_token_budget (self) -> int :
+        settings = get_settings()
+        model_id = getattr(self.genration_client, "genration_model_id", None)
+        return settings.CONTEXT_TOKEN_BUDGETS.get(model_id, settings.CONTEXT_TOKEN_BUDGET)
+
+    async def build_rag_prompt (self , query : str , retrieved_documents : List[RetrivedDocument] , language : str = None) :
+        """
+        System prompt as chat history plus the documents + question prompt. Adjacent chunks are merged
+        (overlap removed) and passages are packed by score into the model's context token budget.
+        Templates come from the preloaded registry, in `language` when given (else the parser's language).
+        """
+        system_prompt = self.template_parser.get("rag", "system_prompt", language = language)
+        document_template = self.template_parser.resolve("rag", "document_prompt", language)
+
+        positions = {}
+        if self.chunk_model is not None :
+            chunk_ids = [doc.chunk_id for doc in retrieved_documents if getattr(doc, "chunk_id", None) is not None]
+            positions = await self.chunk_model.get_chunk_positions(chunk_ids)
+        passages = merge_adjacent(retrieved_documents, positions)
+
+        def render(doc_num, passage) :
+            chunk_text = passage.text.strip()
+            parts = []
+            if passage.metadata.get("source"):
+                parts.append(passage.metadata["source"])
+            if passage.metadata.get("page") is not None:
+                if passage.metadata.get("last_page") is not None:
+                    parts.append(f"pages {passage.metadata['page']}-{passage.metadata['last_page']}")
+                else:
+                    parts.append(f"page {passage.metadata['page']}")
+            if passage.metadata.get("domain"):
+                parts.append(f"domain: {passage.metadata['domain']}")
+            if parts:
+                chunk_text = "From: " + ", ".join(parts) + "\n" + chunk_text
+            return document_template.substitute(doc_num = doc_num , chunk_text = chunk_text)
+
+        counter = TokenCounter(getattr(self.genration_client, "genration_model_id", None))
+        document_prompt = "\n".join(pack_passages(passages, render, counter, self.context_token_budget()))
 
         footer_prompt = self.template_parser.get("rag", "footer_prompt",{
             "query" : query
-        })
+        }, language = language)
 
         chat_history = [
             self.genration_client.construct_prompt(
@@ -166,9 +369,103 @@ class NLPController (basecontroller) :
 
         full_prompt = "\n\n".join([document_prompt , footer_prompt])
 
-        answer = self.genration_client.genrate_text(
+        return full_prompt , chat_history
+
+    async def answer_rag_question (self , project : Project , query : str ,limit : int = 5 , language : str = None) :
+        """
+        RAG answer: (answer, full_prompt, chat_history). With an answer cache, a semantically equivalent
+        question on the same index generation is answered from the cache, and identical concurrent
+        questions share a single retrieve + generate call. `language` selects the prompt templates.
+        """
+        language = self.template_parser.language_for(language)
+        if self.answer_cache is None :
+            answer, full_prompt, chat_history, _ = await self._answer_rag_question(project, query, limit, language=language)
+            return answer, full_prompt, chat_history
+
+        generation = getattr(project, "project_index_generation", 0) or 0
+        flight_key = (project.project_id, generation, limit, language, normalize_question(query))
+        answer, full_prompt, chat_history, _ = await self.answer_cache.single_flight(
+            flight_key, lambda: self._answer_rag_question_cached(project, query, limit, generation, language)
+        )
+        return answer, full_prompt, chat_history
+
+    async def _answer_rag_question_cached (self , project : Project , query : str , limit : int , generation : int ,
+                                           language : str = None) :
+        query_vector = await self._embed_query(query)
+        if query_vector :
+            cached = self.answer_cache.get(project.project_id, limit, generation, query_vector, language)
+            if cached is not None :
+                return cached
+
+        result = await self._answer_rag_question(project, query, limit, query_vector=query_vector, language=language)
+        if result[0] and query_vector :
+            self.answer_cache.put(project.project_id, limit, generation, query_vector, result, language)
+        return result
+
+    async def _answer_rag_question (self , project : Project , query : str ,limit : int = 5 , query_vector : list = None ,
+                                    language : str = None) :
+
+
+        answer, full_prompt ,chat_history = None , None , None
+
+        #step 1 : retrive related document :
+        retrieved_documents = await self.retrieve_for_answer(project = project , query = query , limit = limit ,
+                                                             query_vector = query_vector)
+
+        if not retrieved_documents or len(retrieved_documents) == 0 :
+            return answer, full_prompt ,chat_history , retrieved_documents
+
+        #step 2 : constract LLM prompt (include source metadata when available)
+        full_prompt , chat_history = await self.build_rag_prompt(query , retrieved_documents , language)
+
+        #step 3 : generate off the event loop (with retries / failover), so concurrent requests keep being served
+        answer = await self.genration_client.agenrate_text(
             prompt = full_prompt,
             chat_history = chat_history
         )
 
-        return answer, full_prompt ,chat_history
\ No newline at end of file
+        return answer, full_prompt ,chat_history , retrieved_documents
+
+    async def answer_rag_question_stream (self , project : Project , query : str ,limit : int = 5 , language : str = None) :
+        """
+        Streaming RAG answer as (event, data) pairs: ("sources", documents) first, then ("token", text)
+        as the provider streams, then ("done", None). Yields nothing when retrieval finds no documents.
+        Closing this generator (client disconnected) stops the upstream generation.
+        A cached answer is replayed as one token; a fully streamed answer is added to the cache.
+        """
+        language = self.template_parser.language_for(language)
+        query_vector , generation = None , getattr(project, "project_index_generation", 0) or 0
+        if self.answer_cache is not None :
+            query_vector = await self._embed_query(query)
+            cached = self.answer_cache.get(project.project_id, limit, generation, query_vector, language) if query_vector else None
+            if cached is not None :
+                answer, _, _, retrieved_documents = cached
+                yield "sources" , retrieved_documents
+                yield "token" , answer
+                yield "done" , None
+                return
+
+        retrieved_documents = await self.retrieve_for_answer(project = project , query = query , limit = limit ,
+                                                             query_vector = query_vector)
+
+        if not retrieved_documents or len(retrieved_documents) == 0 :
+            return
+
+        yield "sources" , retrieved_documents
+
+        full_prompt , chat_history = await self.build_rag_prompt(query , retrieved_documents , language)
+        stream = self.genration_client.astream_text(prompt = full_prompt , chat_history = chat_history)
+
+        tokens = []
+        try :
+            async for token in stream :
+                tokens.append(token)
+                yield "token" , token
+        finally :
+            await stream.aclose()
+
+        if self.answer_cache is not None and query_vector and tokens :
+            self.answer_cache.put(project.project_id, limit, generation, query_vector,
+                                  ("".join(tokens), full_prompt, chat_history, retrieved_documents), language)
+
+        yield "done" , None
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings ,SettingsConfigDict
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 class settings (BaseSettings):
 
@@ -37,12 +37,71 @@ class settings (BaseSettings):
     GENRATED_DEFUALT_MAX_OUTPUT_TOKENS : int = None
     GENRATION_DEFUALT_TEMPERATURE : float = None 
 
+    # Generation resilience: fallback providers in order (model per backend, default GENRATION_MODEL_ID),
+    # retries with jittered backoff, per-provider circuit breaker and optional hedging past the p95 latency
+    GENRATION_FALLBACK_BACKENDS : List[str] = []
+    GENRATION_FALLBACK_MODEL_IDS : Dict[str, str] = {}
+    LLM_MAX_RETRIES : int = 2
+    LLM_BACKOFF_BASE_MS : int = 250
+    LLM_BACKOFF_MAX_MS : int = 4000
+    LLM_CIRCUIT_FAILURE_THRESHOLD : int = 5
+    LLM_CIRCUIT_RESET_SECONDS : int = 30
+    LLM_HEDGE_ENABLED : bool = False
+    LLM_HEDGE_PERCENTILE : float = 95
+    LLM_HEDGE_MIN_DELAY_MS : int = 2000
+    # threads for blocking generation calls and answer streams (a stream holds one until it ends)
+    LLM_WORKER_THREADS : int = 32
+
+    # Embedding quota (per provider + model, 0 = unlimited): interactive queries are served before indexing,
+    # which may use at most EMBEDDING_BACKGROUND_MAX_CONCURRENCY calls and must leave EMBEDDING_INTERACTIVE_RESERVE of the budget
+    EMBEDDING_RPM_LIMIT : int = 0
+    EMBEDDING_TPM_LIMIT : int = 0
+    EMBEDDING_MAX_CONCURRENCY : int = 8
+    EMBEDDING_BACKGROUND_MAX_CONCURRENCY : int = 2
+    EMBEDDING_INTERACTIVE_RESERVE : float = 0.2
+    # count the limits across all workers in Postgres (provider_quota_windows; needs alembic upgrade head)
+    EMBEDDING_SHARED_QUOTA : bool = False
+    EMBEDDING_MAX_RETRIES : int = 3
+    # Query embeddings arriving within this window (0 = off) are sent as one call of up to EMBEDDING_BATCH_MAX_SIZE texts
+    EMBEDDING_BATCH_WINDOW_MS : int = 5
+    EMBEDDING_BATCH_MAX_SIZE : int = 32
+
+    # Query embedding cache: per worker LRU with TTL; EMBEDDING_CACHE_SHARED adds a Postgres tier shared by all workers
+    EMBEDDING_CACHE_ENABLED : bool = True
+    EMBEDDING_CACHE_MAX_ENTRIES : int = 10000
+    EMBEDDING_CACHE_TTL_SECONDS : int = 86400
+    EMBEDDING_CACHE_SHARED : bool = False
+
     VECTORDB_BACKEND_LITERAL : List[str] = None
     VECTORDB_BACKEND : str 
     VECTORDB_PATH : str
     VECTORDB_DISTANCE_METHOD : str = None
     VECTORDB_PGVEC_INDEX_THRESHOLD : int = 4
 
+    # pgvector index builds run in the background with CREATE INDEX CONCURRENTLY
+    VECTORDB_PGVEC_MAINTENANCE_WORK_MEM : Optional[str] = "512MB"
+    VECTORDB_PGVEC_MAX_PARALLEL_MAINTENANCE_WORKERS : Optional[int] = 2
+    VECTORDB_PGVEC_HNSW_M : int = 16
+    VECTORDB_PGVEC_HNSW_EF_CONSTRUCTION : int = 64
+    VECTORDB_PGVEC_HNSW_EF_SEARCH : int = 40
+
+    # Adaptive index selection: HNSW while its estimated build fits the budget, IVFFlat beyond
+    VECTORDB_PGVEC_INDEX_TYPE : Optional[str] = None
+    VECTORDB_PGVEC_INDEX_BUILD_BUDGET_SECONDS : float = 300
+    VECTORDB_PGVEC_HNSW_BUILD_ROWS_PER_SECOND : float = 2000
+    VECTORDB_PGVEC_INDEX_REBUILD_DRIFT : float = 10.0
+
+    # TABLE = one pgvector table per project, PARTITIONED = one shared hash-partitioned table
+    VECTORDB_PGVEC_STORAGE_MODE : str = "TABLE"
+    VECTORDB_PGVEC_PARTITIONS : int = 64
+    VECTORDB_PGVEC_ITERATIVE_SCAN : Optional[str] = "relaxed_order"
+
+    # In-process NumPy/mmap backend (VECTORDB_BACKEND = "NUMPY"), stored under VECTORDB_PATH
+    VECTORDB_NUMPY_DTYPE : str = "float32"
+    VECTORDB_NUMPY_BINARY_PREFILTER : bool = False
+    VECTORDB_NUMPY_PREFILTER_OVERSAMPLE : int = 10
+    VECTORDB_NUMPY_MAX_SEGMENTS : int = 8
+
 
     DEFUALT_LANGUAGE : str = "en"
     PRIMARY_LANGUAGE : str = "en"
@@ -59,9 +118,50 @@ class settings (BaseSettings):
     HYBRID_SEARCH_ENABLED : bool = True
     HYBRID_SEARCH_ALPHA : float = 0.6
 
+    # Sparse side of hybrid search: BM25 = local segment files, POSTGRES = chunks.chunk_tsv fused with pgvector in SQL,
+    # QDRANT = named sparse vectors fused with the dense ones by the Qdrant Query API
+    SPARSE_BACKEND : str = "BM25"
+    HYBRID_RRF_K : int = 60
+    # Local BM25 fusion: RRF (rank based) or WEIGHTED (HYBRID_SEARCH_ALPHA over min-max normalized scores)
+    HYBRID_FUSION_METHOD : str = "WEIGHTED"
+    QDRANT_HYBRID_FUSION : str = "RRF"
+
+    # Upper bounds of one batch search request (texts per request, results per text)
+    SEARCH_BATCH_MAX_TEXTS : int = 32
+    SEARCH_BATCH_MAX_LIMIT : int = 50
+
+    # RAG context size in tokens (tiktoken), per generation model id with a default; adjacent chunks are merged first
+    CONTEXT_TOKEN_BUDGET : int = 3000
+    CONTEXT_TOKEN_BUDGETS : Dict[str, int] = {}
+
+    # Semantic answer cache: a question whose embedding is this similar to a cached one (same project + index generation) reuses its answer
+    ANSWER_CACHE_ENABLED : bool = True
+    ANSWER_CACHE_SIMILARITY : float = 0.95
+    ANSWER_CACHE_MAX_ENTRIES : int = 1000
+    ANSWER_CACHE_TTL_SECONDS : int = 3600
+
+    # Reranking: retrieve RERANK_CANDIDATES chunks, rerank them (COHERE, LEXICAL or STUB; empty = off), keep the request limit
+    RERANK_BACKEND : Optional[str] = None
+    RERANK_MODEL_ID : str = "rerank-english-v3.0"
+    RERANK_CANDIDATES : int = 50
+    RERANK_BATCH_SIZE : int = 25
+    RERANK_TIME_BUDGET_MS : int = 800
+    RERANK_CACHE_SIZE : int = 10000
+
     # BM25 index persistence directory (default: under SRC/data/bm25)
     BM25_INDEX_DIR : Optional[str] = None
 
+    # Loaded BM25 indexes are kept in an LRU cache (budget ~ on-disk index size); hot projects can be preloaded at startup
+    BM25_CACHE_MAX_BYTES : int = 536870912
+    BM25_PRELOAD_PROJECT_IDS : List[int] = []
+    # BM25 indexes grow by appended segments; small ones are merged in the background above this count
+    BM25_MAX_SEGMENTS : int = 8
+    # Analyzer: NLTK data bundled with the image (no runtime download), lemma cache size, process pool for index builds
+    NLTK_DATA_DIR : Optional[str] = None
+    BM25_LEMMA_CACHE_SIZE : int = 100000
+    BM25_ANALYZER_WORKERS : int = 0
+    BM25_ANALYZER_PARALLEL_MIN_DOCS : int = 2000
+
     model_config = SettingsConfigDict(env_file=".env")
 
 def get_settings () :
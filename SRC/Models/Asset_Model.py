@@ -1,9 +1,10 @@
 from .Base_DataModel import BaseDataModel
-from .DB_Schemes.minirag.Schemes import Asset
+from .DB_Schemes.minirag.Schemes import Asset, dataChunk
 from .enums.DataBaseEnum import databaseEnum
 from bson import ObjectId
 from sqlalchemy.future import select
-from sqlalchemy import func, delete
+from sqlalchemy import func, delete, any_, bindparam, Integer
+from sqlalchemy.dialects.postgresql import ARRAY
 
 
 class AssetModel (BaseDataModel) :
@@ -71,4 +72,20 @@ class AssetModel (BaseDataModel) :
                 stmt = delete(Asset).where(Asset.asset_id == asset_id)
                 result = await session.execute(stmt)
                 await session.commit()
-        return result.rowcount
\ No newline at end of file
+        return result.rowcount
+
+    async def delete_assets_with_chunks(self, asset_ids: list):
+        """Delete the given assets and all their chunks in a single transaction. Returns (assets, chunks) deleted."""
+        if not asset_ids:
+            return 0, 0
+        async with self.db_client() as session:
+            async with session.begin():
+                ids_param = bindparam("asset_ids", value=list(asset_ids), type_=ARRAY(Integer))
+                chunks_result = await session.execute(
+                    delete(dataChunk).where(dataChunk.chunk_asset_id == any_(ids_param))
+                )
+                assets_result = await session.execute(
+                    delete(Asset).where(Asset.asset_id == any_(ids_param))
+                )
+                await session.commit()
+        return assets_result.rowcount, chunks_result.rowcount
@@ -4,7 +4,10 @@ from .enums.DataBaseEnum import databaseEnum
 from bson.objectid import ObjectId
 from pymongo import InsertOne
 from sqlalchemy.future import select
-from sqlalchemy import func ,delete
+from sqlalchemy import func ,delete ,any_ ,bindparam
+from sqlalchemy.orm import undefer
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy import Integer
 
 
 
@@ -58,11 +61,14 @@ class ChunkModel (BaseDataModel) :
         
         return result.rowcount
      
-    async def get_project_chunks (self, project_id : ObjectId , page_no : int = 1 , page_size : int = 50) :
+    async def get_project_chunks (self, project_id : ObjectId , page_no : int = 1 , page_size : int = 50 ,
+                                  with_terms : bool = False) :
         
         async with self.db_client() as session :
             async with session.begin() :
                 stmt = select(dataChunk).where(dataChunk.chunk_project_id == project_id).offset((page_no - 1)*page_size).limit(page_size)
+                if with_terms :
+                    stmt = stmt.options(undefer(dataChunk.chunk_terms), undefer(dataChunk.chunk_term_freqs))
                 
                 result = await session.execute(stmt)
                 records = result.scalars().all()
@@ -92,4 +98,28 @@ class ChunkModel (BaseDataModel) :
                 stmt = delete(dataChunk).where(dataChunk.chunk_asset_id == asset_id)
                 result = await session.execute(stmt)
                 await session.commit()
-        return result.rowcount
\ No newline at end of file
+        return result.rowcount
+
+    async def get_chunk_positions(self, chunk_ids: list) -> dict:
+        """chunk_id -> (chunk_asset_id, chunk_order), used to merge adjacent retrieved chunks."""
+        if not chunk_ids:
+            return {}
+        async with self.db_client() as session:
+            async with session.begin():
+                stmt = select(dataChunk.chunk_id, dataChunk.chunk_asset_id, dataChunk.chunk_order).where(
+                    dataChunk.chunk_id == any_(bindparam("chunk_ids", value=[int(cid) for cid in chunk_ids], type_=ARRAY(Integer)))
+                )
+                result = await session.execute(stmt)
+                return {row.chunk_id: (row.chunk_asset_id, row.chunk_order) for row in result.fetchall()}
+
+    async def get_chunk_ids_by_asset_ids(self, asset_ids: list):
+        # one array parameter instead of an IN (...) list: no bind-parameter limit on big projects
+        if not asset_ids:
+            return []
+        async with self.db_client() as session:
+            async with session.begin():
+                stmt = select(dataChunk.chunk_id).where(
+                    dataChunk.chunk_asset_id == any_(bindparam("asset_ids", value=list(asset_ids), type_=ARRAY(Integer)))
+                )
+                result = await session.execute(stmt)
+                return [row[0] for row in result.fetchall()]
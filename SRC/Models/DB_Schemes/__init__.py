@@ -1 +1 @@
-from Models.DB_Schemes.minirag.Schemes import Project , Asset , dataChunk , RetrivedDocument 
\ No newline at end of file
+from Models.DB_Schemes.minirag.Schemes import Project , Asset , dataChunk , RetrivedDocument , CHUNK_FTS_CONFIG , ProviderQuotaWindow , QueryEmbedding 
\ No newline at end of file
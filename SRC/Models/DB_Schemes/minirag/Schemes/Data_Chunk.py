@@ -1,12 +1,16 @@
 from .minirag_base import SQLAlchemyBase
-from sqlalchemy import Column , Integer , String , Boolean , DateTime , func , JSON , ForeignKey
-from sqlalchemy.dialects.postgresql import UUID , JSONB
+from sqlalchemy import Column , Integer , String , Boolean , DateTime , func , JSON , ForeignKey , Computed
+from sqlalchemy.dialects.postgresql import UUID , JSONB , TSVECTOR , ARRAY
 import uuid 
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship , deferred
 from sqlalchemy import Index
 from pydantic import BaseModel
 from typing import Optional
 
+# text search configuration of chunks.chunk_tsv; queries must parse with the same one (changing it
+# means a migration that regenerates the column)
+CHUNK_FTS_CONFIG = "english"
+
 class dataChunk(SQLAlchemyBase) :
 
     __tablename__ = "chunks"
@@ -18,6 +22,11 @@ class dataChunk(SQLAlchemyBase) :
     chunk_text = Column(String , nullable = False)
     chunk_metadata = Column(JSONB , nullable = True)
     chunk_order = Column(Integer , nullable = False)
+    # full-text search vector for the POSTGRES sparse backend; deferred so chunk reads never load it
+    chunk_tsv = deferred(Column(TSVECTOR , Computed(f"to_tsvector('{CHUNK_FTS_CONFIG}'::regconfig, chunk_text)", persisted = True)))
+    # BM25 analyzer output computed once at process time (sorted terms + their frequencies); index builds aggregate these
+    chunk_terms = deferred(Column(ARRAY(String) , nullable = True))
+    chunk_term_freqs = deferred(Column(ARRAY(Integer) , nullable = True))
 
 
     chunk_project_id = Column(Integer , ForeignKey("projects.project_id"), nullable = False)
@@ -28,7 +37,8 @@ class dataChunk(SQLAlchemyBase) :
 
 
     __table_args__ = (Index("ix_chunk_project_id" , chunk_project_id),
-                    Index("ix_chunk_asset_id",chunk_asset_id))
+                    Index("ix_chunk_asset_id",chunk_asset_id),
+                    Index("ix_chunk_tsv", "chunk_tsv", postgresql_using = "gin"))
 
 
     create_at  =Column(DateTime(timezone = True) , server_default = func.now(), nullable = False)
@@ -40,4 +50,4 @@ class RetrivedDocument(BaseModel) :
     text : str
     score : float
     metadata : Optional[dict] = None
-    chunk_id : Optional[int] = None
\ No newline at end of file
+    chunk_id : Optional[int] = None
\ No newline at end of file
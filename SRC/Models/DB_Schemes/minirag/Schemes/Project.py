@@ -11,10 +11,12 @@ class Project(SQLAlchemyBase) :
 
     project_id = Column(Integer , primary_key = True , autoincrement = True)
     project_uuid = Column(UUID(as_uuid = True) , default = uuid.uuid4 , unique = True, nullable = False)
+    # bumped whenever the project's index changes (push, reset, delete); cached answers of older generations are dropped
+    project_index_generation = Column(Integer , default = 0 , server_default = "0" , nullable = False)
 
     create_at  =Column(DateTime(timezone = True) , server_default = func.now(), nullable = False)
     update_at  =Column(DateTime(timezone = True) , default=func.now(), onupdate = func.now(), nullable = False)
 
     chunks = relationship("dataChunk" , back_populates = "project")
     assets = relationship("Asset" , back_populates = "project")
-    
\ No newline at end of file
+    
\ No newline at end of file
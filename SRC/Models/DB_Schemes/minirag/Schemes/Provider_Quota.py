@@ -0,0 +1,14 @@
+from .minirag_base import SQLAlchemyBase
+from sqlalchemy import Column , Integer , BigInteger , String
+
+
+
+class ProviderQuotaWindow(SQLAlchemyBase) :
+    __tablename__ = "provider_quota_windows"
+
+    # one row per (provider:model, minute): requests and tokens spent by all workers in that minute
+    quota_key = Column(String , primary_key = True)
+    quota_window = Column(BigInteger , primary_key = True)
+
+    quota_requests = Column(Integer , default = 0 , server_default = "0" , nullable = False)
+    quota_tokens = Column(BigInteger , default = 0 , server_default = "0" , nullable = False)
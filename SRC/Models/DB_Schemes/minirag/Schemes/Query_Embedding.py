@@ -0,0 +1,17 @@
+from .minirag_base import SQLAlchemyBase
+from sqlalchemy import Column , String , DateTime , REAL , Index
+from sqlalchemy.dialects.postgresql import ARRAY
+
+
+
+class QueryEmbedding(SQLAlchemyBase) :
+    __tablename__ = "query_embedding_cache"
+
+    # sha256 of (embedding backend, model, document type, normalized query text)
+    cache_key = Column(String(64) , primary_key = True)
+    cache_vector = Column(ARRAY(REAL) , nullable = False)
+    cache_expires_at = Column(DateTime(timezone = True) , nullable = False)
+
+    __table_args__ = (
+        Index("ix_query_embedding_cache_expires_at" , cache_expires_at),
+    )
@@ -1,4 +1,6 @@
 from .minirag_base import SQLAlchemyBase
 from .Asset import Asset
-from .Data_Chunk import dataChunk , RetrivedDocument   
-from .Project import Project
\ No newline at end of file
+from .Data_Chunk import dataChunk , RetrivedDocument , CHUNK_FTS_CONFIG   
+from .Project import Project
+from .Provider_Quota import ProviderQuotaWindow
+from .Query_Embedding import QueryEmbedding
\ No newline at end of file
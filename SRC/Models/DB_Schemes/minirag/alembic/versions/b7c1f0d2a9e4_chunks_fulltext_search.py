@@ -0,0 +1,39 @@
+"""chunks full-text search column
+
+Revision ID: b7c1f0d2a9e4
+Revises: 952656ac53ee
+Create Date: 2026-10-19 10:12:40.118233
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7c1f0d2a9e4'
+down_revision: Union[str, None] = '952656ac53ee'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # generated column: kept in sync by Postgres on every insert, no separate index build step.
+    # Adding a STORED column rewrites chunks under an ACCESS EXCLUSIVE lock: plan a maintenance window.
+    # The text search configuration must match CHUNK_FTS_CONFIG (Schemes/Data_Chunk.py).
+    op.add_column('chunks',
+    sa.Column('chunk_tsv', postgresql.TSVECTOR(),
+              sa.Computed("to_tsvector('english'::regconfig, chunk_text)", persisted=True),
+              nullable=True)
+    )
+    # CREATE INDEX CONCURRENTLY can not run inside a transaction block; writes keep going meanwhile
+    with op.get_context().autocommit_block():
+        op.create_index('ix_chunk_tsv', 'chunks', ['chunk_tsv'], unique=False, postgresql_using='gin',
+                        postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_chunk_tsv', table_name='chunks', postgresql_using='gin', postgresql_concurrently=True)
+    op.drop_column('chunks', 'chunk_tsv')
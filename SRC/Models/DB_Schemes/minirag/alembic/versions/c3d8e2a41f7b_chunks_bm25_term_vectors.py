@@ -0,0 +1,29 @@
+"""chunks BM25 term vectors
+
+Revision ID: c3d8e2a41f7b
+Revises: b7c1f0d2a9e4
+Create Date: 2026-10-19 14:02:51.406317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3d8e2a41f7b'
+down_revision: Union[str, None] = 'b7c1f0d2a9e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # nullable: chunks processed before this revision are analyzed from chunk_text when indexed
+    op.add_column('chunks', sa.Column('chunk_terms', postgresql.ARRAY(sa.String()), nullable=True))
+    op.add_column('chunks', sa.Column('chunk_term_freqs', postgresql.ARRAY(sa.Integer()), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('chunks', 'chunk_term_freqs')
+    op.drop_column('chunks', 'chunk_terms')
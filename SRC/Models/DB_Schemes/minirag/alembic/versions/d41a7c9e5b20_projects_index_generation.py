@@ -0,0 +1,26 @@
+"""projects index generation
+
+Revision ID: d41a7c9e5b20
+Revises: c3d8e2a41f7b
+Create Date: 2026-10-19 16:25:09.731842
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41a7c9e5b20'
+down_revision: Union[str, None] = 'c3d8e2a41f7b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('projects', sa.Column('project_index_generation', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('projects', 'project_index_generation')
@@ -0,0 +1,32 @@
+"""provider quota windows
+
+Revision ID: e5f2b8c1d3a6
+Revises: d41a7c9e5b20
+Create Date: 2026-10-19 18:02:41.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5f2b8c1d3a6'
+down_revision: Union[str, None] = 'd41a7c9e5b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('provider_quota_windows',
+    sa.Column('quota_key', sa.String(), nullable=False),
+    sa.Column('quota_window', sa.BigInteger(), nullable=False),
+    sa.Column('quota_requests', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('quota_tokens', sa.BigInteger(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('quota_key', 'quota_window')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('provider_quota_windows')
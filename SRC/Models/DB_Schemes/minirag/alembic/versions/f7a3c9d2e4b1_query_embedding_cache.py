@@ -0,0 +1,34 @@
+"""query embedding cache
+
+Revision ID: f7a3c9d2e4b1
+Revises: e5f2b8c1d3a6
+Create Date: 2026-10-19 19:14:06.287531
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7a3c9d2e4b1'
+down_revision: Union[str, None] = 'e5f2b8c1d3a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('query_embedding_cache',
+    sa.Column('cache_key', sa.String(length=64), nullable=False),
+    sa.Column('cache_vector', postgresql.ARRAY(sa.REAL()), nullable=False),
+    sa.Column('cache_expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('cache_key')
+    )
+    op.create_index('ix_query_embedding_cache_expires_at', 'query_embedding_cache', ['cache_expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_query_embedding_cache_expires_at', table_name='query_embedding_cache')
+    op.drop_table('query_embedding_cache')
@@ -2,7 +2,7 @@ from .Base_DataModel import BaseDataModel
 from .DB_Schemes.minirag.Schemes import Project
 from .enums.DataBaseEnum import databaseEnum
 from sqlalchemy.future import select
-from sqlalchemy import func
+from sqlalchemy import func , update
 
 
  
@@ -60,5 +60,14 @@ class projectModel (BaseDataModel) :
                 
                 return projects,total_pages
 
-    
-         
\ No newline at end of file
+    async def bump_index_generation(self, project_id: int) -> int:
+        """Mark the project's index as changed (invalidates cached answers in every worker)."""
+        async with self.db_client() as session :
+            async with session.begin() :
+                stmt = update(Project).where(Project.project_id == project_id).values(
+                    project_index_generation = Project.project_index_generation + 1
+                ).returning(Project.project_index_generation)
+                result = await session.execute(stmt)
+                generation = result.scalar_one_or_none()
+            await session.commit()
+        return generation
@@ -0,0 +1,51 @@
+from .Base_DataModel import BaseDataModel
+from .DB_Schemes import ProviderQuotaWindow
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
+
+
+
+class ProviderQuotaModel (BaseDataModel) :
+    """Per-minute request/token counters shared by all workers, one row per (quota key, minute)."""
+
+    def __init__(self, db_client : object) :
+        super().__init__(db_client = db_client)
+        self.db_client = db_client
+
+    @classmethod
+    async def create_instance(cls, db_client : object) :
+         instance = cls(db_client)
+         return instance
+
+    async def claim(self, quota_key : str , window : int , requests : int , tokens : int ,
+                    max_requests : int = 0 , max_tokens : int = 0) -> bool :
+        """
+        Atomically add requests/tokens to the window's counters if they stay within the limits
+        (0 = no limit). Returns False, without counting anything, when the window is full.
+        """
+        table = ProviderQuotaWindow.__table__
+        stmt = insert(table).values(quota_key = quota_key , quota_window = window ,
+                                    quota_requests = requests , quota_tokens = tokens)
+        condition = None
+        if max_requests :
+            condition = table.c.quota_requests + stmt.excluded.quota_requests <= max_requests
+        if max_tokens :
+            token_condition = table.c.quota_tokens + stmt.excluded.quota_tokens <= max_tokens
+            condition = token_condition if condition is None else condition & token_condition
+        stmt = stmt.on_conflict_do_update(
+            index_elements = [table.c.quota_key , table.c.quota_window],
+            set_ = {"quota_requests" : table.c.quota_requests + stmt.excluded.quota_requests,
+                    "quota_tokens" : table.c.quota_tokens + stmt.excluded.quota_tokens},
+            where = condition
+        ).returning(table.c.quota_requests)
+
+        async with self.db_client() as session :
+            async with session.begin() :
+                result = await session.execute(stmt)
+                return result.first() is not None
+
+    async def delete_windows_before(self, window : int) :
+
+        async with self.db_client() as session :
+            async with session.begin() :
+                await session.execute(delete(ProviderQuotaWindow).where(ProviderQuotaWindow.quota_window < window))
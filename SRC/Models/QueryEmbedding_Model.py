@@ -0,0 +1,55 @@
+from .Base_DataModel import BaseDataModel
+from .DB_Schemes import QueryEmbedding
+from sqlalchemy.future import select
+from sqlalchemy import delete , func
+from sqlalchemy.dialects.postgresql import insert
+from datetime import datetime , timedelta , timezone
+from typing import Dict , List , Tuple
+
+
+
+class QueryEmbeddingCacheModel (BaseDataModel) :
+    """Shared tier of the query embedding cache: one row per cache key, read and written in batches."""
+
+    def __init__(self, db_client : object) :
+        super().__init__(db_client = db_client)
+        self.db_client = db_client
+
+    @classmethod
+    async def create_instance(cls, db_client : object) :
+         instance = cls(db_client)
+         return instance
+
+    async def get_many(self, keys : List[str]) -> Dict[str, list] :
+
+        async with self.db_client() as session :
+            stmt = select(QueryEmbedding.cache_key , QueryEmbedding.cache_vector).where(
+                QueryEmbedding.cache_key.in_(keys),
+                QueryEmbedding.cache_expires_at > func.now()
+            )
+            result = await session.execute(stmt)
+            return {row.cache_key : row.cache_vector for row in result}
+
+    async def put_many(self, items : List[Tuple[str, list]] , ttl_seconds : float) :
+
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds = ttl_seconds)
+        table = QueryEmbedding.__table__
+        stmt = insert(table).values([
+            {"cache_key" : key , "cache_vector" : [float(v) for v in vector] , "cache_expires_at" : expires_at}
+            for key , vector in items
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements = [table.c.cache_key],
+            set_ = {"cache_vector" : stmt.excluded.cache_vector , "cache_expires_at" : stmt.excluded.cache_expires_at}
+        )
+
+        async with self.db_client() as session :
+            async with session.begin() :
+                await session.execute(stmt)
+
+    async def delete_expired(self) :
+
+        async with self.db_client() as session :
+            async with session.begin() :
+                result = await session.execute(delete(QueryEmbedding).where(QueryEmbedding.cache_expires_at <= func.now()))
+                return result.rowcount
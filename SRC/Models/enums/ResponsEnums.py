@@ -20,7 +20,10 @@ class ResponseSignal (Enum) :
     INSERT_INTO_VECTOR_DB_ERROR = "Insert into vector db error"
     INSERT_INTO_VECTOR_DB_DONE = "Inserting into vector db done"
     GET_VECTOR_COLLECTION_INFO_DONE = "Get vector collection info done"
+    GET_VECTOR_INDEX_STATUS_DONE = "Get vector index status done"
     SEARCH_INDEX_DONE = "Search index done"
     SEARCH_INDEX_NOT_FOUND = "Search index not found"
     ANSWER_INDEX_ERROR = "Answer index error"
-    ANSWER_INDEX_DONE = "Answer index done"
\ No newline at end of file
+    ANSWER_INDEX_DONE = "Answer index done"
+    TEMPLATES_RELOADED = "Prompt templates reloaded"
+    TEMPLATES_RELOAD_ERROR = "Prompt templates reload error"
\ No newline at end of file
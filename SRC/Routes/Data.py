@@ -13,6 +13,7 @@ from Models.DB_Schemes import dataChunk ,Asset
 from Models.Chunk_Model import ChunkModel
 from Models.Asset_Model import AssetModel
 from Models.enums.AssetTypeEnum import assettypeEnum
+from Stores.Sparse.SparseEnums import SparseBackendEnums
 
 
 logger = logging.getLogger("uvicorn.error")
@@ -106,18 +107,17 @@ async def delete_asset(request: Request, project_id: int, file_id: str):
             content={"signal": ResponseSignal.ASSET_NOT_FOUND.value},
         )
     asset_id = asset.asset_id
-    chunk_ids = await chunk_model.get_chunk_ids_by_asset_id(asset_id)
-    if chunk_ids:
-        nlp_controller = NLPController(
-            genration_client=request.app.genration_client,
-            embedding_client=request.app.embedding_client,
-            vectordb_client=request.app.vectordb_client,
-            template_parser=request.app.template_parser,
-        )
-        collection_name = nlp_controller.create_collection_name(project_id=project.project_id)
-        await request.app.vectordb_client.delete_by_chunk_ids(collection_name, chunk_ids)
-    await chunk_model.delete_chunks_by_asset_id(asset_id)
-    await asset_model.delete_asset(asset_id)
+    nlp_controller = NLPController(
+        genration_client=request.app.genration_client,
+        embedding_client=request.app.embedding_client,
+        vectordb_client=request.app.vectordb_client,
+        template_parser=request.app.template_parser,
+    )
+    await nlp_controller.delete_assets_index_data(
+        project=project, asset_ids=[asset_id], chunk_model=chunk_model
+    )
+    await asset_model.delete_assets_with_chunks(asset_ids=[asset_id])
+    await project_model.bump_index_generation(project_id=project.project_id)
     return JSONResponse(
         content={"signal": ResponseSignal.ASSET_DELETED.value, "asset_id": asset_id},
     )
@@ -153,17 +153,11 @@ async def delete_all_assets(request: Request, project_id: int):
         template_parser=request.app.template_parser,
     )
     collection_name = nlp_controller.create_collection_name(project_id=project.project_id)
-    deleted_count = 0
-    for asset in assets:
-        asset_id = asset.asset_id
-        chunk_ids = await chunk_model.get_chunk_ids_by_asset_id(asset_id)
-        if chunk_ids:
-            await request.app.vectordb_client.delete_by_chunk_ids(
-                collection_name, chunk_ids
-            )
-        await chunk_model.delete_chunks_by_asset_id(asset_id)
-        await asset_model.delete_asset(asset_id)
-        deleted_count += 1
+    asset_ids = [asset.asset_id for asset in assets]
+    await nlp_controller.delete_assets_index_data(
+        project=project, asset_ids=asset_ids, chunk_model=chunk_model
+    )
+    deleted_count, _ = await asset_model.delete_assets_with_chunks(asset_ids=asset_ids)
     if deleted_count and project_id == getattr(settings, "LEARNING_BOOKS_PROJECT_ID", None):
         try:
             await request.app.vectordb_client.delete_collection(
@@ -173,9 +167,10 @@ async def delete_all_assets(request: Request, project_id: int):
             pass
         try:
             from Stores.Sparse import BM25Index
-            BM25Index.delete_index(project.project_id)
-        except Exception:
-            pass
+            await run_in_threadpool(BM25Index.delete_index, project.project_id)
+        except Exception as e:
+            logger.warning("BM25 index delete failed for project %s: %s", project.project_id, e)
+    await project_model.bump_index_generation(project_id=project.project_id)
     return JSONResponse(
         content={
             "signal": ResponseSignal.ASSETS_DELETED.value,
@@ -267,9 +262,10 @@ async def process_endpoint (request :Request ,project_id :int ,process_request :
         if project_id == getattr(settings, "LEARNING_BOOKS_PROJECT_ID", None):
             try:
                 from Stores.Sparse import BM25Index
-                BM25Index.delete_index(project.project_id)
-            except Exception:
-                pass
+                await run_in_threadpool(BM25Index.delete_index, project.project_id)
+            except Exception as e:
+                logger.warning("BM25 index delete failed for project %s: %s", project.project_id, e)
+        await project_model.bump_index_generation(project_id=project.project_id)
 
     for asset_id, file_id in project_files_ids.items():
         try:
@@ -314,12 +310,20 @@ async def process_endpoint (request :Request ,project_id :int ,process_request :
             }
             )
 
+        #analyze BM25 terms once here, so index builds never re-read and re-lemmatize chunk text
+        term_vectors = [(None, None)] * len(file_chunks)
+        if getattr(settings, "HYBRID_SEARCH_ENABLED", True) and settings.SPARSE_BACKEND == SparseBackendEnums.BM25.value:
+            from Stores.Sparse import BM25Index
+            term_vectors = await run_in_threadpool(BM25Index.term_vectors, [chunk.page_content for chunk in file_chunks])
+
         file_chunks_records = [
             dataChunk(chunk_text = chunk.page_content ,
                     chunk_metadata = chunk.metadata,
                     chunk_order = i+1 ,
                     chunk_project_id = project.project_id ,
-                    chunk_asset_id = asset_id
+                    chunk_asset_id = asset_id ,
+                    chunk_terms = term_vectors[i][0] ,
+                    chunk_term_freqs = term_vectors[i][1]
                     )
                     for i,chunk in enumerate(file_chunks)
         ]
@@ -338,4 +342,4 @@ async def process_endpoint (request :Request ,project_id :int ,process_request :
    
 
 
-  
\ No newline at end of file
+  
\ No newline at end of file
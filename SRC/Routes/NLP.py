@@ -1,12 +1,15 @@
 from fastapi import FastAPI,APIRouter,status,Request
-from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse , StreamingResponse
 import logging
-from .Schemes.NLP_Schemes import PushRequest , SearchRequest 
+import json
+from .Schemes.NLP_Schemes import PushRequest , SearchRequest , SearchBatchRequest , AnswerRequest
 from Models.Project_Model import projectModel 
 from Models.Chunk_Model import ChunkModel
 from Controllers.NLPController import NLPController
 from Models.enums.ResponsEnums import ResponseSignal
 from Helpers.Config import get_settings
+from Stores.Sparse.SparseEnums import SparseBackendEnums
 from tqdm.auto import tqdm
 
 logger = logging.getLogger("uvicorn.error")
@@ -45,9 +48,9 @@ async def index_project (request :Request ,project_id :int ,push_request : PushR
     if push_request.do_reset :
         try:
             from Stores.Sparse import BM25Index
-            BM25Index.delete_index(project.project_id)
-        except Exception:
-            pass
+            await run_in_threadpool(BM25Index.delete_index, project.project_id)
+        except Exception as e:
+            logger.warning("BM25 index delete failed for project %s: %s", project.project_id, e)
 
     #create collection if not esixted
     collection_name = nlp_controller.create_collection_name(project_id=project.project_id)
@@ -59,9 +62,12 @@ async def index_project (request :Request ,project_id :int ,push_request : PushR
     total_chunks_count = await chunk_model.get_total_chunks_count(project_id=project.project_id)
     p_bar = tqdm(total=total_chunks_count,desc="vectors Indexing",position=0)
 
+    index_bm25 = getattr(settings, "HYBRID_SEARCH_ENABLED", True) and settings.SPARSE_BACKEND == SparseBackendEnums.BM25.value
+
     while has_records :
 
-        page_chunks = await chunk_model.get_project_chunks(project_id=project.project_id, page_no=page_no)
+        page_chunks = await chunk_model.get_project_chunks(project_id=project.project_id, page_no=page_no,
+                                                           with_terms=index_bm25)
         if len (page_chunks) :
             page_no += 1
         if not page_chunks or len(page_chunks) == 0 :
@@ -72,30 +78,25 @@ async def index_project (request :Request ,project_id :int ,push_request : PushR
         is_inserted = await nlp_controller.index_into_vector_db(project=project , chunks=page_chunks ,
                                                             chunks_ids=chunks_ids )
         if not is_inserted :
+            await project_model.bump_index_generation(project_id=project.project_id)
             return JSONResponse(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                                 content={"Signal" : ResponseSignal.INSERT_INTO_VECTOR_DB_ERROR.value})
-        
+
+        # BM25 is appended page by page from the stored term vectors; chunks already in the index are skipped
+        if index_bm25:
+            try:
+                from Stores.Sparse import BM25Index
+                await run_in_threadpool(BM25Index.add_chunks, project.project_id, page_chunks)
+            except Exception as e:
+                logger.warning("BM25 index update failed: %s", e)
         
         p_bar.update(len(page_chunks))
         inserted_items_count += len(page_chunks)
 
     p_bar.close()
 
-    if getattr(settings, "HYBRID_SEARCH_ENABLED", True):
-        try:
-            from Stores.Sparse import BM25Index
-            all_chunks = []
-            page_no = 1
-            while True:
-                page_chunks = await chunk_model.get_project_chunks(project_id=project.project_id, page_no=page_no, page_size=500)
-                if not page_chunks:
-                    break
-                all_chunks.extend(page_chunks)
-                page_no += 1
-            if all_chunks:
-                BM25Index.build_index(project.project_id, all_chunks)
-        except Exception as e:
-            logger.warning("BM25 index build failed: %s", e)
+    #cached answers were built on the previous index
+    await project_model.bump_index_generation(project_id=project.project_id)
 
     return JSONResponse(
         content={"Signal" : ResponseSignal.INSERT_INTO_VECTOR_DB_DONE.value ,
@@ -125,6 +126,28 @@ async def get_project_index_info (request :Request ,project_id :int) :
                  "CollectionInfo" : collection_info})
 
 
+@nlp_router.get("/index/status/{project_id}")
+async def get_project_index_status (request :Request ,project_id :int) :
+
+    project_model = await projectModel.create_instance(db_client=request.app.db_client)
+    project = await project_model.get_project_or_create_one(project_id=project_id)
+
+    if not project :
+        return JSONResponse(status_code=status.HTTP_404_NOT_FOUND,
+                            content={"Signal" : ResponseSignal.PROJECT_NOT_FOUND.value})
+
+    nlp_controller = NLPController(genration_client=request.app.genration_client,
+                                    embedding_client=request.app.embedding_client,
+                                    vectordb_client=request.app.vectordb_client,
+                                    template_parser=request.app.template_parser)
+
+    index_status = await nlp_controller.get_vector_index_status(project=project)
+
+    return JSONResponse(
+        content={"Signal" : ResponseSignal.GET_VECTOR_INDEX_STATUS_DONE.value ,
+                 "IndexStatus" : index_status})
+
+
 @nlp_router.post("/index/search/{project_id}")
 async def search_index(request :Request ,project_id :int , search_request : SearchRequest) :
     
@@ -159,8 +182,46 @@ async def search_index(request :Request ,project_id :int , search_request : Sear
                  })
 
 
+@nlp_router.post("/index/search/batch/{project_id}")
+async def search_index_batch(request :Request ,project_id :int , search_request : SearchBatchRequest) :
+
+    project_model = await projectModel.create_instance(db_client=request.app.db_client)
+    project = await project_model.get_project_or_create_one(project_id=project_id)
+
+    if not project :
+        return JSONResponse(status_code=status.HTTP_404_NOT_FOUND,
+                            content={"Signal" : ResponseSignal.PROJECT_NOT_FOUND.value})
+
+    if not search_request.texts :
+        return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST,
+                            content={"Signal" : ResponseSignal.SEARCH_INDEX_NOT_FOUND.value})
+
+    nlp_controller = NLPController(genration_client=request.app.genration_client,
+                                    embedding_client=request.app.embedding_client,
+                                    vectordb_client=request.app.vectordb_client,
+                                    template_parser=request.app.template_parser)
+
+    batch_results = await nlp_controller.search_many_vector_db_collection(project=project ,
+                                                                      texts=search_request.texts ,
+                                                                      limit=search_request.limit)
+
+    if batch_results is False :
+        return JSONResponse(status_code=status.HTTP_404_NOT_FOUND,
+                            content={"Signal" : ResponseSignal.SEARCH_INDEX_NOT_FOUND.value})
+
+    return JSONResponse(
+        content={"Signal" : ResponseSignal.SEARCH_INDEX_DONE.value ,
+                 "Results" : [
+                    [
+                        (result.model_dump() if hasattr(result, "model_dump") else result.dict())
+                        for result in results
+                    ]
+                    for results in batch_results]
+                 })
+
+
 @nlp_router.post("/index/answer/{project_id}")
-async def answer_index(request :Request ,project_id :int , search_request : SearchRequest) :
+async def answer_index(request :Request ,project_id :int , search_request : AnswerRequest) :
     
     
     project_model = await projectModel.create_instance(db_client=request.app.db_client)
@@ -174,12 +235,16 @@ async def answer_index(request :Request ,project_id :int , search_request : Sear
     nlp_controller = NLPController(genration_client=request.app.genration_client,
                                     embedding_client=request.app.embedding_client,
                                     vectordb_client=request.app.vectordb_client,
-                                    template_parser=request.app.template_parser)
+                                    template_parser=request.app.template_parser,
+                                    answer_cache=request.app.answer_cache,
+                                    chunk_model=chunk_model,
+                                    reranker=request.app.reranker)
 
 
     answer, full_prompt ,chat_history =await nlp_controller.answer_rag_question( project=project , 
                                                                          query=search_request.text , 
-                                                                         limit=search_request.limit)
+                                                                         limit=search_request.limit,
+                                                                         language=search_request.language)
 
     if not answer :
         return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST,
@@ -192,3 +257,77 @@ async def answer_index(request :Request ,project_id :int , search_request : Sear
                  "FullPrompt" : full_prompt,
                  "ChatHistory" : chat_history}
     )
+
+
+def _sse_event(event : str , data : dict) -> str :
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@nlp_router.post("/index/answer/stream/{project_id}")
+async def answer_index_stream(request :Request ,project_id :int , search_request : AnswerRequest) :
+
+
+    project_model = await projectModel.create_instance(db_client=request.app.db_client)
+    chunk_model = await ChunkModel.create_instance(db_client=request.app.db_client)
+    project = await project_model.get_project_or_create_one(project_id=project_id)
+
+    if not project :
+        return JSONResponse(status_code=status.HTTP_404_NOT_FOUND,
+                            content={"Signal" : ResponseSignal.PROJECT_NOT_FOUND.value})
+
+    nlp_controller = NLPController(genration_client=request.app.genration_client,
+                                    embedding_client=request.app.embedding_client,
+                                    vectordb_client=request.app.vectordb_client,
+                                    template_parser=request.app.template_parser,
+                                    answer_cache=request.app.answer_cache,
+                                    chunk_model=chunk_model,
+                                    reranker=request.app.reranker)
+
+    async def event_stream() :
+        events = nlp_controller.answer_rag_question_stream(project=project ,
+                                                           query=search_request.text ,
+                                                           limit=search_request.limit ,
+                                                           language=search_request.language)
+        has_events = False
+        try :
+            async for event , data in events :
+                # stop generating (and paying for) tokens nobody will read
+                if await request.is_disconnected() :
+                    break
+                has_events = True
+                if event == "sources" :
+                    yield _sse_event(event , {"Sources" : [
+                        (doc.model_dump() if hasattr(doc, "model_dump") else doc.dict()) for doc in data
+                    ]})
+                elif event == "token" :
+                    yield _sse_event(event , {"Text" : data})
+                else :
+                    yield _sse_event(event , {"Signal" : ResponseSignal.ANSWER_INDEX_DONE.value})
+
+            if not has_events :
+                yield _sse_event("error" , {"Signal" : ResponseSignal.ANSWER_INDEX_ERROR.value})
+        except Exception as e :
+            logger.error("Streaming answer failed for project %s: %s", project_id, e)
+            yield _sse_event("error" , {"Signal" : ResponseSignal.ANSWER_INDEX_ERROR.value})
+        finally :
+            await events.aclose()
+
+    return StreamingResponse(event_stream() , media_type="text/event-stream" ,
+                             headers={"Cache-Control" : "no-cache" , "X-Accel-Buffering" : "no"})
+
+
+@nlp_router.post("/templates/reload")
+async def reload_templates(request :Request) :
+
+    try :
+        # publish: the other uvicorn workers reload on their next template lookup
+        templates = request.app.template_parser.reload(publish = True)
+    except Exception as e :
+        logger.error("Prompt template reload failed: %s", e)
+        return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST,
+                            content={"Signal" : ResponseSignal.TEMPLATES_RELOAD_ERROR.value})
+
+    return JSONResponse(
+        content={"Signal" : ResponseSignal.TEMPLATES_RELOADED.value ,
+                 "Languages" : sorted(templates)}
+    )
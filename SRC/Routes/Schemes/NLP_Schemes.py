@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator
+from typing import Optional, List
+from Helpers.Config import get_settings
 
 class PushRequest (BaseModel) :
 
@@ -10,3 +11,32 @@ class SearchRequest (BaseModel) :
 
     text : str
     limit : Optional[int] = 5
+
+
+class AnswerRequest (SearchRequest) :
+
+    # prompt template locale for this request (default: PRIMARY_LANGUAGE)
+    language : Optional[str] = None
+
+
+class SearchBatchRequest (BaseModel) :
+
+    # bounded: all texts go to one embedding call and one vector DB query
+    texts : List[str] = Field(... , min_length = 1)
+    limit : Optional[int] = Field(5 , ge = 1)
+
+    @field_validator("texts")
+    @classmethod
+    def check_texts (cls , texts) :
+        max_texts = get_settings().SEARCH_BATCH_MAX_TEXTS
+        if len(texts) > max_texts :
+            raise ValueError(f"at most {max_texts} texts per batch")
+        return texts
+
+    @field_validator("limit")
+    @classmethod
+    def check_limit (cls , limit) :
+        max_limit = get_settings().SEARCH_BATCH_MAX_LIMIT
+        if limit is not None and limit > max_limit :
+            raise ValueError(f"limit must be at most {max_limit}")
+        return limit
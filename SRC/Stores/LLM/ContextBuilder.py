@@ -0,0 +1,131 @@
+"""
+Token-budgeted RAG context: retrieved chunks are merged into passages and packed greedily by score.
+
+- Chunks of the same asset with consecutive chunk_order are merged into one passage, and the text
+  a chunk repeats from its predecessor (the splitter's overlap window) is stripped.
+- Passages are added best score first while their rendered document prompt fits the token budget
+  of the generation model; the best passage is truncated rather than dropped when it alone is too long.
+Tokens are counted with tiktoken (the model's encoding, cl100k_base for non-OpenAI models) or, when
+tiktoken is not installed or its encoding can not be loaded (it is fetched over the network unless
+bundled in TIKTOKEN_CACHE_DIR, as the Docker image does), estimated at CHARS_PER_TOKEN characters per token.
+"""
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+
+try:
+    import tiktoken
+    _HAS_TIKTOKEN = True
+except ImportError:
+    _HAS_TIKTOKEN = False
+
+logger = logging.getLogger("uvicorn")
+
+CHARS_PER_TOKEN = 4
+MIN_OVERLAP_CHARS = 8
+
+
+@lru_cache(maxsize=16)
+def _encoding(model_id: Optional[str]):
+    if not _HAS_TIKTOKEN:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model_id or "")
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # offline without a bundled encoding: never fail the answer, estimate instead
+        logger.warning("tiktoken encoding unavailable (%s); estimating tokens from characters", e)
+        return None
+
+
+class TokenCounter:
+
+    def __init__(self, model_id: Optional[str] = None):
+        self.encoding = _encoding(model_id)
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self.encoding is None:
+            return -(-len(text) // CHARS_PER_TOKEN)
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        if max_tokens <= 0:
+            return ""
+        if self.encoding is None:
+            return text[:max_tokens * CHARS_PER_TOKEN]
+        tokens = self.encoding.encode(text, disallowed_special=())
+        return text if len(tokens) <= max_tokens else self.encoding.decode(tokens[:max_tokens])
+
+
+def strip_overlap(previous: str, text: str, max_overlap: int = 2000) -> str:
+    """Drop the prefix of text that repeats the end of previous (overlapping split windows)."""
+    longest = min(len(previous), len(text), max_overlap)
+    for size in range(longest, MIN_OVERLAP_CHARS - 1, -1):
+        if previous.endswith(text[:size]):
+            return text[size:]
+    return text
+
+
+@dataclass
+class Passage:
+    text: str
+    score: float
+    metadata: dict = field(default_factory=dict)
+    chunk_ids: List[int] = field(default_factory=list)
+
+
+def merge_adjacent(documents: list, positions: Dict[int, Tuple[int, int]]) -> List[Passage]:
+    """
+    Merge documents whose chunks are consecutive in the same asset. positions maps
+    chunk_id -> (asset_id, chunk_order); documents without a position stay on their own.
+    A merged passage keeps the best score of its chunks.
+    """
+    located, passages = [], []
+    for doc in documents:
+        position = positions.get(getattr(doc, "chunk_id", None))
+        if position is None:
+            passages.append(Passage(doc.text, doc.score, dict(doc.metadata or {}), [doc.chunk_id]))
+        else:
+            located.append((position, doc))
+
+    located.sort(key=lambda item: item[0])
+    current, last_position = None, None
+    for position, doc in located:
+        if current is not None and position[0] == last_position[0] and position[1] == last_position[1] + 1:
+            current.text += strip_overlap(current.text, doc.text)
+            current.score = max(current.score, doc.score)
+            current.chunk_ids.append(doc.chunk_id)
+            page = (doc.metadata or {}).get("page")
+            if page is not None and page != current.metadata.get("page"):
+                current.metadata["last_page"] = page
+        else:
+            current = Passage(doc.text, doc.score, dict(doc.metadata or {}), [doc.chunk_id])
+            passages.append(current)
+        last_position = position
+    return passages
+
+
+def pack_passages(passages: List[Passage], render: Callable[[int, Passage], str],
+                  counter: TokenCounter, token_budget: int) -> List[str]:
+    """Rendered passages, best score first, while they fit in token_budget."""
+    rendered, used = [], 0
+    for passage in sorted(passages, key=lambda p: p.score, reverse=True):
+        text = render(len(rendered) + 1, passage)
+        tokens = counter.count(text)
+        if used + tokens > token_budget:
+            if rendered:
+                continue
+            # the best passage alone exceeds the budget: keep what fits of it
+            overhead = tokens - counter.count(passage.text)
+            passage = Passage(counter.truncate(passage.text, token_budget - overhead), passage.score,
+                              passage.metadata, passage.chunk_ids)
+            text = render(1, passage)
+            tokens = counter.count(text)
+        rendered.append(text)
+        used += tokens
+    return rendered
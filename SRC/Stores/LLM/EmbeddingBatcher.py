@@ -0,0 +1,78 @@
+"""
+Micro-batching of concurrent single-text embedding requests.
+Requests arriving within window_ms of the first one of a batch (or until max_size texts are
+queued) are sent as one embed call and the vectors are handed back to each waiting caller.
+Identical texts in a batch are embedded once. Batches are keyed by document type, as providers
+embed queries and documents differently.
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from Utils.metrics import EMBEDDING_BATCH_SIZE
+
+
+class _PendingBatch:
+
+    def __init__(self):
+        self.texts: Dict[str, List[asyncio.Future]] = {}
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class EmbeddingBatcher:
+
+    def __init__(self, embed: Callable[[List[str], str], Awaitable[Optional[List[list]]]],
+                 window_ms: float = 5, max_size: int = 32):
+        """embed(texts, document_type) -> one vector per text, or None on failure."""
+        self.embed = embed
+        self.window = window_ms / 1000.0
+        self.max_size = max(1, max_size)
+        self._pending: Dict[str, _PendingBatch] = {}
+        self._tasks = set()
+
+    async def submit(self, text: str, document_type: str = None) -> Optional[list]:
+        """The vector of text, embedded together with the other texts submitted meanwhile (None on failure)."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        batch = self._pending.get(document_type)
+        if batch is None:
+            batch = self._pending[document_type] = _PendingBatch()
+            batch.timer = loop.call_later(self.window, self._flush, document_type)
+        batch.texts.setdefault(text, []).append(future)
+        if len(batch.texts) >= self.max_size:
+            self._flush(document_type)
+
+        return await future
+
+    def _flush(self, document_type: str):
+        batch = self._pending.pop(document_type, None)
+        if batch is None:
+            return
+        batch.timer.cancel()
+        task = asyncio.get_running_loop().create_task(self._run(batch, document_type))
+        # keep a reference until done: the event loop only holds weak references to tasks
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: _PendingBatch, document_type: str):
+        # callers that gave up while queued do not need their text embedded
+        texts = [text for text, futures in batch.texts.items() if not all(f.done() for f in futures)]
+        vectors, error = None, None
+        if texts:
+            EMBEDDING_BATCH_SIZE.observe(len(texts))
+            try:
+                vectors = await self.embed(texts, document_type)
+            except Exception as e:
+                error = e
+        if vectors is not None and len(vectors) != len(texts):
+            vectors = None
+
+        results = dict(zip(texts, vectors)) if vectors is not None else {}
+        for text, futures in batch.texts.items():
+            for future in futures:
+                if future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(results.get(text))
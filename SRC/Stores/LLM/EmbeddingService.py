@@ -0,0 +1,110 @@
+"""
+Embedding client used by the controllers: the provider's blocking embed_text, run in a worker
+thread behind the provider's ProviderScheduler (rate limits, priority classes) with async
+jittered backoff on rate limits and transient errors.
+Interactive queries and background indexing share the embedding API key; indexing calls
+aembed_text with RequestPriorityEnum.BACKGROUND so it never starves user queries.
+With batch_window_ms > 0, concurrent interactive single-text calls (query embeddings) are
+micro-batched into one provider call by EmbeddingBatcher.
+With a QueryEmbeddingCache, query embeddings are looked up first (keyed by backend, model and
+normalized text) and only the misses reach the provider.
+"""
+import asyncio
+import logging
+from typing import List, Optional, Union
+
+from .LLMEnums import RequestPriorityEnum, DocumentTypeEnum
+from .ContextBuilder import CHARS_PER_TOKEN
+from .ResilientLLM import is_retryable, backoff_delay
+from .EmbeddingBatcher import EmbeddingBatcher
+from Utils.metrics import EMBEDDING_RETRIES
+
+logger = logging.getLogger("uvicorn")
+
+
+class EmbeddingService:
+
+    def __init__(self, client, scheduler=None, max_retries: int = 3,
+                 backoff_base_ms: float = 500, backoff_max_ms: float = 8000,
+                 batch_window_ms: float = 0, batch_max_size: int = 32,
+                 cache=None, backend: str = None):
+        self.client = client
+        self.cache = cache
+        self.backend = backend or type(client).__name__
+        self.scheduler = scheduler
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base_ms / 1000.0
+        self.backoff_max = backoff_max_ms / 1000.0
+        self.batcher = None
+        if batch_window_ms and batch_window_ms > 0:
+            self.batcher = EmbeddingBatcher(
+                lambda texts, document_type: self._embed(texts, document_type, RequestPriorityEnum.INTERACTIVE),
+                window_ms=batch_window_ms, max_size=batch_max_size)
+
+    # the provider's embedding settings, as on LLMInterface
+
+    @property
+    def embedding_model_id(self):
+        return self.client.embedding_model_id
+
+    @property
+    def embedding_size(self):
+        return self.client.embedding_size
+
+    def set_embedding_model(self, model_id: str, embedding_size: int):
+        self.client.set_embedding_model(model_id=model_id, embedding_size=embedding_size)
+
+    def embed_text(self, text: Union[str, List[str]], document_type: str = None):
+        """Blocking call straight to the provider (no scheduling, no retries)."""
+        return self.client.embed_text(text=text, document_type=document_type)
+
+    @staticmethod
+    def estimate_tokens(texts: List[str]) -> int:
+        return sum(-(-len(text or "") // CHARS_PER_TOKEN) for text in texts)
+
+    async def aembed_text(self, text: Union[str, List[str]], document_type: str = None,
+                          priority: RequestPriorityEnum = RequestPriorityEnum.INTERACTIVE) -> Optional[List[list]]:
+        """One vector per text, or None when the provider keeps failing."""
+        texts = [text] if isinstance(text, str) else list(text)
+        if self.cache is None or document_type != DocumentTypeEnum.QUERY.value:
+            return await self._embed_uncached(texts, document_type, priority)
+
+        namespace = f"{self.backend}:{self.embedding_model_id}"
+        keys = [self.cache.key(namespace, document_type, t) for t in texts]
+        vectors = await self.cache.get_many(keys)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            fresh = await self._embed_uncached([texts[i] for i in missing], document_type, priority)
+            if not fresh or len(fresh) != len(missing):
+                return None
+            for i, vector in zip(missing, fresh):
+                vectors[i] = vector
+            await self.cache.put_many([keys[i] for i in missing], fresh)
+        return vectors
+
+    async def _embed_uncached(self, texts: List[str], document_type: str,
+                              priority: RequestPriorityEnum) -> Optional[List[list]]:
+        if len(texts) == 1 and self.batcher is not None and priority == RequestPriorityEnum.INTERACTIVE:
+            vector = await self.batcher.submit(texts[0], document_type)
+            return [vector] if vector is not None else None
+
+        return await self._embed(texts, document_type, priority)
+
+    async def _embed(self, texts: List[str], document_type: str, priority: RequestPriorityEnum) -> Optional[List[list]]:
+        tokens = self.estimate_tokens(texts)
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                if self.scheduler is None:
+                    return await asyncio.to_thread(self.client.embed_text, text=texts, document_type=document_type)
+                async with self.scheduler.slot(priority, tokens):
+                    return await asyncio.to_thread(self.client.embed_text, text=texts, document_type=document_type)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    logger.error("Embedding failed: %s", e)
+                    return None
+                EMBEDDING_RETRIES.inc()
+                delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+                logger.warning("Embedding rate limited or unavailable (%s); retrying in %.1fs", e, delay)
+                await asyncio.sleep(delay)
+        return None
@@ -4,6 +4,7 @@ class LLMEnums(Enum) :
     OPENAI = "OPENAI"
     COHERE = "COHERE"
     GEMINI = "GEMINI"
+    STUB = "STUB"
 
 
 class OpenAIEnum(Enum) :
@@ -28,4 +29,10 @@ class GeminiEnum(Enum) :
 class DocumentTypeEnum(Enum) :
     DOCUMENT = "document"
     QUERY = "query"
-    
\ No newline at end of file
+
+
+class RequestPriorityEnum(Enum) :
+    # lower value is served first
+    INTERACTIVE = 0
+    BACKGROUND = 1
+    
\ No newline at end of file
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import Iterator
 
 class LLMInterface(ABC):
     
@@ -14,6 +15,13 @@ class LLMInterface(ABC):
     def genrate_text(self ,prompt : str , max_output_tokens : int =None ,temperature : float =None , chat_history : list =[]) :
         pass
 
+    def stream_text(self ,prompt : str , max_output_tokens : int =None ,temperature : float =None , chat_history : list =[]) -> Iterator[str] :
+        """Yield the answer in pieces as the provider produces them. Override with the provider's streaming API."""
+        text = self.genrate_text(prompt = prompt , max_output_tokens = max_output_tokens ,
+                                 temperature = temperature , chat_history = list(chat_history))
+        if text :
+            yield text
+
     @abstractmethod
     def embed_text(self, text : str, document_type :str =None) :
         pass
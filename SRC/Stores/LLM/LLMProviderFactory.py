@@ -1,5 +1,6 @@
 from .LLMEnums import LLMEnums
-from .Providers import OpenAIProvider , CohereProvider, GeminiProvider
+from .Providers import OpenAIProvider , CohereProvider, GeminiProvider, StubProvider
+from .ResilientLLM import ResilientLLM
 
 
 class LLMProviderFactory :
@@ -33,4 +34,33 @@ class LLMProviderFactory :
                 default_genration_temperature = self.config.GENRATION_DEFUALT_TEMPERATURE   
             )
 
-        return None
\ No newline at end of file
+        if provider == LLMEnums.STUB.value :
+            return StubProvider()
+
+        return None
+
+    def create_genration_client (self) :
+        """GENRATION_BACKEND, then GENRATION_FALLBACK_BACKENDS, behind retries, circuit breakers and failover."""
+        providers = []
+        for backend in [self.config.GENRATION_BACKEND] + list(self.config.GENRATION_FALLBACK_BACKENDS) :
+            client = self.create(provider = backend)
+            if client is None :
+                continue
+            model_id = self.config.GENRATION_MODEL_ID
+            if providers :
+                model_id = self.config.GENRATION_FALLBACK_MODEL_IDS.get(backend, model_id)
+            client.set_genration_model(model_id = model_id)
+            providers.append((backend , client))
+
+        return ResilientLLM(
+            providers = providers,
+            max_retries = self.config.LLM_MAX_RETRIES,
+            backoff_base_ms = self.config.LLM_BACKOFF_BASE_MS,
+            backoff_max_ms = self.config.LLM_BACKOFF_MAX_MS,
+            failure_threshold = self.config.LLM_CIRCUIT_FAILURE_THRESHOLD,
+            reset_seconds = self.config.LLM_CIRCUIT_RESET_SECONDS,
+            hedge = self.config.LLM_HEDGE_ENABLED,
+            hedge_percentile = self.config.LLM_HEDGE_PERCENTILE,
+            hedge_min_delay_ms = self.config.LLM_HEDGE_MIN_DELAY_MS,
+            worker_threads = self.config.LLM_WORKER_THREADS
+        )
\ No newline at end of file
@@ -0,0 +1,173 @@
+"""
+Admission control for one provider + model (one API key quota).
+Calls take a slot with `async with scheduler.slot(priority, tokens):`. A slot is granted when
+- a concurrency slot is free (background calls may hold at most background_max_concurrency),
+- the request and token buckets (refilled continuously at the per-minute budgets) can pay for it;
+  background calls must leave interactive_reserve of each bucket untouched,
+- and, with a shared quota, the per-minute counters shared by all workers (Postgres) accept it;
+  there too background calls stop at (1 - interactive_reserve) of the limits. The shared quota is
+  claimed before the local slot is taken, so a call waiting on it blocks no other local caller,
+  and a full window is polled every SHARED_POLL_SECONDS rather than slept out.
+Waiters are served strictly by priority, then arrival: a queued interactive query goes ahead of
+every queued background batch, so ingestion only uses what user traffic leaves over.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from .LLMEnums import RequestPriorityEnum
+from Utils.metrics import SCHEDULER_WAIT_SECONDS, SCHEDULER_QUEUE_DEPTH
+
+logger = logging.getLogger("uvicorn")
+
+SHARED_POLL_SECONDS = 1.0
+
+
+class TokenBucket:
+    """Capacity = one minute of budget, refilled continuously. A budget of 0 means unlimited."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.capacity <= 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, reserve: float = 0.0) -> float:
+        """Seconds until amount can be taken while keeping reserve (fraction of capacity) in the bucket."""
+        if self.unlimited:
+            return 0.0
+        self._refill()
+        # a single call larger than the whole budget is let through once the bucket is full
+        needed = min(amount + reserve * self.capacity, self.capacity)
+        return 0.0 if self.level >= needed else (needed - self.level) / self.rate
+
+    def take(self, amount: float):
+        if not self.unlimited:
+            self._refill()
+            self.level -= amount
+
+
+class ProviderScheduler:
+
+    def __init__(self, name: str, requests_per_minute: int = 0, tokens_per_minute: int = 0,
+                 max_concurrency: int = 8, background_max_concurrency: int = 2,
+                 interactive_reserve: float = 0.2, shared_quota=None):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_concurrency = max(1, max_concurrency)
+        self.background_max_concurrency = max(1, min(background_max_concurrency, self.max_concurrency))
+        self.interactive_reserve = interactive_reserve
+        self.shared_quota = shared_quota
+
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        self._background_in_flight = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._last_cleanup_window = None
+
+    def _queue_depth(self, priority: RequestPriorityEnum):
+        return SCHEDULER_QUEUE_DEPTH.labels(provider=self.name, priority=priority.name.lower())
+
+    def _dispatch(self):
+        """Grant slots to queued waiters, best priority first, until the head of the queue has to wait."""
+        self._timer = None
+        while self._waiters:
+            priority, _, tokens, future = self._waiters[0]
+            if future.done():
+                # cancelled while queued
+                heapq.heappop(self._waiters)
+                continue
+
+            background = priority != RequestPriorityEnum.INTERACTIVE.value
+            if self._in_flight >= self.max_concurrency or \
+                    (background and self._background_in_flight >= self.background_max_concurrency):
+                return
+
+            reserve = self.interactive_reserve if background else 0.0
+            wait = max(self.requests.wait_time(1, reserve), self.tokens.wait_time(tokens, reserve))
+            if wait > 0:
+                self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+
+            heapq.heappop(self._waiters)
+            self.requests.take(1)
+            self.tokens.take(tokens)
+            self._in_flight += 1
+            if background:
+                self._background_in_flight += 1
+            future.set_result(None)
+
+    def _release(self, priority: RequestPriorityEnum):
+        self._in_flight -= 1
+        if priority != RequestPriorityEnum.INTERACTIVE:
+            self._background_in_flight -= 1
+        if self._timer is None:
+            self._dispatch()
+
+    async def _acquire(self, priority: RequestPriorityEnum, tokens: int):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority.value, next(self._sequence), tokens, future))
+        depth = self._queue_depth(priority)
+        depth.inc()
+        try:
+            if self._timer is not None:
+                # a better-placed waiter may be able to go before the timer fires
+                self._timer.cancel()
+            self._dispatch()
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # granted just as we were cancelled: give the slot back
+                self._release(priority)
+            raise
+        finally:
+            depth.dec()
+
+    async def _claim_shared(self, priority: RequestPriorityEnum, tokens: int):
+        """Count the call in the cross-worker window for this minute, polling while the window is full."""
+        share = 1.0 if priority == RequestPriorityEnum.INTERACTIVE else 1.0 - self.interactive_reserve
+        max_requests = max(1, int(self.requests_per_minute * share)) if self.requests_per_minute > 0 else 0
+        max_tokens = max(1, int(self.tokens_per_minute * share)) if self.tokens_per_minute > 0 else 0
+        while True:
+            window = int(time.time() // 60)
+            try:
+                if self._last_cleanup_window != window:
+                    self._last_cleanup_window = window
+                    await self.shared_quota.delete_windows_before(window - 60)
+                if await self.shared_quota.claim(self.name, window, 1, tokens, max_requests, max_tokens):
+                    return
+            except Exception as e:
+                # the shared counter is best effort: never fail the call because it is unavailable
+                logger.warning("Shared quota unavailable for %s: %s", self.name, e)
+                return
+            await asyncio.sleep(min(SHARED_POLL_SECONDS, max(0.05, (window + 1) * 60 - time.time())))
+
+    @asynccontextmanager
+    async def slot(self, priority: RequestPriorityEnum = RequestPriorityEnum.INTERACTIVE, tokens: int = 0):
+        started = time.perf_counter()
+        if self.shared_quota is not None:
+            await self._claim_shared(priority, tokens)
+        await self._acquire(priority, tokens)
+        try:
+            SCHEDULER_WAIT_SECONDS.labels(provider=self.name, priority=priority.name.lower()).observe(
+                time.perf_counter() - started)
+            yield
+        finally:
+            self._release(priority)
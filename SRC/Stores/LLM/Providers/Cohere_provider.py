@@ -51,7 +51,8 @@ class CohereProvider(LLMInterface):
         try:
             response = self.client.chat(
                 model=self.genration_model_id,
-                message=self.process_text(current_prompt_text),
+                # untruncated: the RAG prompt is already sized by ContextBuilder and ends with the question
+                message=prompt,
                 chat_history=chat_history,
                 temperature=temperature,
                 max_tokens=max_output_tokens
@@ -64,8 +65,37 @@ class CohereProvider(LLMInterface):
             return response.text
             
         except Exception as e:
+            # raised so ResilientLLM can tell rate limits / outages apart and retry or fail over
             self.logger.error(f"Exception during Cohere generation: {e}")
-            return None
+            raise
+
+    def stream_text(self, prompt: str, max_output_tokens: int = None, temperature: float = None, chat_history: list = []):
+        if not self.client:
+            self.logger.error("Cohere client is not initialized")
+            return
+
+        if not self.genration_model_id:
+            self.logger.error("Cohere genration model is not initialized")
+            return
+
+        max_output_tokens = max_output_tokens if max_output_tokens else self.default_genrated_max_output_tokens
+        temperature = temperature if temperature else self.default_genration_temperature
+
+        stream = self.client.chat_stream(
+            model=self.genration_model_id,
+            message=prompt,
+            chat_history=chat_history,
+            temperature=temperature,
+            max_tokens=max_output_tokens
+        )
+        try:
+            for event in stream:
+                if getattr(event, "event_type", None) == "text-generation" and event.text:
+                    yield event.text
+        finally:
+            close = getattr(stream, "close", None)
+            if close:
+                close()
 
     def embed_text(self, text: Union[str,List[str]], document_type: str = None):
         if not self.client:
@@ -107,7 +137,7 @@ class CohereProvider(LLMInterface):
             
         except Exception as e:
             self.logger.error(f"Exception during Cohere embedding: {e}")
-            return None
+            raise
 
     def construct_prompt(self, prompt: str, role: str):
         # Cohere expects 'role' and 'message' (or 'text' in some contexts, but 'message' is standard for chat history objects)
@@ -4,7 +4,6 @@ from google import genai
 from google.genai import types
 import logging
 import os
-import time
 from typing import List, Union
 
 
@@ -42,15 +41,7 @@ class GeminiProvider(LLMInterface):
         # Removed truncation as requested
         return text.strip()
 
-    def genrate_text(self, prompt: str, max_output_tokens: int = None, temperature: float = None, chat_history: list = []):
-        if not self.client:
-            self.logger.error("Gemini client is not initialized")
-            return None
-
-        if not self.genration_model_id:
-            self.logger.error("Gemini generation model is not initialized")
-            return None
-
+    def _build_request(self, prompt: str, max_output_tokens: int, temperature: float, chat_history: list):
         max_output_tokens = max_output_tokens if max_output_tokens else self.default_genrated_max_output_tokens
         temperature = temperature if temperature else self.default_genration_temperature
 
@@ -77,38 +68,61 @@ class GeminiProvider(LLMInterface):
             temperature=temperature,
             system_instruction=system_instruction
         )
-        
-        retries = 3
-        for attempt in range(retries + 1):
-            try:
-                response = self.client.models.generate_content(
-                    model=self.genration_model_id,
-                    contents=gemini_history,
-                    config=generation_config
-                )
-                
-                if not response or not response.text:
-                    if attempt < retries:
-                        self.logger.error("Error while generating text using Gemini: Empty response")
-                        return None
-                    return None
-                    
-                return response.text
-                
-            except Exception as e:
-                is_rate_limit = "429" in str(e) or "RESOURCE_EXHAUSTED" in str(e) or "503" in str(e) or "UNAVAILABLE" in str(e)
-                if is_rate_limit:
-                    if attempt < retries:
-                        wait_time = 4 * (2 ** attempt) # 4, 8, 16 
-                        self.logger.warning(f"Gemini rate limit hit. Retrying in {wait_time}s...")
-                        time.sleep(wait_time)
-                        continue
-                    else:
-                        self.logger.error(f"Gemini rate limit exhausted after {retries} retries: {e}")
-                else:
-                    self.logger.error(f"Error calling Gemini API: {e}")
-                
-                return None
+        return gemini_history, generation_config
+
+    def genrate_text(self, prompt: str, max_output_tokens: int = None, temperature: float = None, chat_history: list = []):
+        if not self.client:
+            self.logger.error("Gemini client is not initialized")
+            return None
+
+        if not self.genration_model_id:
+            self.logger.error("Gemini generation model is not initialized")
+            return None
+
+        gemini_history, generation_config = self._build_request(prompt, max_output_tokens, temperature, chat_history)
+
+        # no retry here: 429/503 are retried with async backoff (or failed over) by ResilientLLM
+        try:
+            response = self.client.models.generate_content(
+                model=self.genration_model_id,
+                contents=gemini_history,
+                config=generation_config
+            )
+        except Exception as e:
+            self.logger.error(f"Error calling Gemini API: {e}")
+            raise
+
+        if not response or not response.text:
+            self.logger.error("Error while generating text using Gemini: Empty response")
+            return None
+
+        return response.text
+
+    def stream_text(self, prompt: str, max_output_tokens: int = None, temperature: float = None, chat_history: list = []):
+        if not self.client:
+            self.logger.error("Gemini client is not initialized")
+            return
+
+        if not self.genration_model_id:
+            self.logger.error("Gemini generation model is not initialized")
+            return
+
+        gemini_history, generation_config = self._build_request(prompt, max_output_tokens, temperature, chat_history)
+
+        stream = self.client.models.generate_content_stream(
+            model=self.genration_model_id,
+            contents=gemini_history,
+            config=generation_config
+        )
+        try:
+            for chunk in stream:
+                if chunk and chunk.text:
+                    yield chunk.text
+        finally:
+            # stop reading the upstream response when the consumer goes away
+            close = getattr(stream, "close", None)
+            if close:
+                close()
 
     def embed_text(self, text: Union[str,List[str]], document_type: str = None):
         if not self.client:
@@ -122,41 +136,27 @@ class GeminiProvider(LLMInterface):
             self.logger.error("Gemini embedding model is not initialized")
             return None
 
-        retries = 3
-        for attempt in range(retries + 1):
-            try:
-                # Gemini embedding task type
-                task_type = "RETRIEVAL_DOCUMENT" if document_type == "document" else "RETRIEVAL_QUERY"
-                
-                result = self.client.models.embed_content(
-                    model=self.embedding_model_id,
-                    contents=text,
-                    config=types.EmbedContentConfig(
-                        task_type=task_type,
-                        title="Embedding" if task_type == "RETRIEVAL_DOCUMENT" else None 
-                    )
+        # Gemini embedding task type
+        task_type = "RETRIEVAL_DOCUMENT" if document_type == "document" else "RETRIEVAL_QUERY"
+
+        # no retry here: EmbeddingService retries 429/503 with async backoff under the provider's rate limits
+        try:
+            result = self.client.models.embed_content(
+                model=self.embedding_model_id,
+                contents=text,
+                config=types.EmbedContentConfig(
+                    task_type=task_type,
+                    title="Embedding" if task_type == "RETRIEVAL_DOCUMENT" else None 
                 )
-                
-                if not result or not result.embeddings:
-                    self.logger.error("Error while embedding text using Gemini")
-                    return None
-                return [res.values for res in result.embeddings ]
-                
-                
-            except Exception as e:
-                is_rate_limit = "429" in str(e) or "RESOURCE_EXHAUSTED" in str(e) or "503" in str(e) or "UNAVAILABLE" in str(e)
-                if is_rate_limit:
-                    if attempt < retries:
-                        wait_time = 4 * (2 ** attempt) # 4, 8, 16
-                        self.logger.warning(f"Gemini rate limit hit (Embedding). Retrying in {wait_time}s...")
-                        time.sleep(wait_time)
-                        continue
-                    else:
-                        self.logger.error(f"Gemini embedding rate limit exhausted after {retries} retries: {e}")
-                else:
-                    self.logger.error(f"Error calling Gemini Embedding API: {e}")
-                
-                return None
+            )
+        except Exception as e:
+            self.logger.error(f"Error calling Gemini Embedding API: {e}")
+            raise
+
+        if not result or not result.embeddings:
+            self.logger.error("Error while embedding text using Gemini")
+            return None
+        return [res.values for res in result.embeddings ]
 
     def construct_prompt(self, prompt: str, role: str):
         # This is used by the controller to append to history. 
@@ -72,6 +72,36 @@ class OpenAIProvider(LLMInterface) :
         return response.choices[0].message.content
 
 
+    def stream_text(self ,prompt : str , max_output_tokens : int =None ,temperature : float =None , chat_history : list =[]) :
+        if not self.client :
+            self.logger.error("OpenAI client is not initialized")
+            return
+
+        if not self.genration_model_id :
+            self.logger.error("OpenAI genration model is not initialized")
+            return
+
+        max_output_tokens = max_output_tokens if max_output_tokens else self.default_genrated_max_output_tokens
+        temperature = temperature if temperature else self.default_genration_temperature
+
+        messages = list(chat_history) + [self.construct_prompt(prompt = prompt,role = OpenAIEnum.USER.value)]
+
+        stream = self.client.chat.completions.create(
+            model=self.genration_model_id,
+            messages=messages,
+            max_tokens=max_output_tokens,
+            temperature=temperature,
+            stream=True )
+
+        try:
+            for chunk in stream :
+                if chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content :
+                    yield chunk.choices[0].delta.content
+        finally:
+            # closing the generator early (client gone) closes the HTTP stream and stops generation
+            stream.close()
+
+
     def embed_text(self, text: Union[str,List[str]] , document_type :str =None) :
         if not self.client :
             self.logger.error("OpenAI client is not initialized")
@@ -97,4 +127,4 @@ class OpenAIProvider(LLMInterface) :
 
     def construct_prompt(self, prompt : str ,role : str) :
         return {"role": role,
-         "content": prompt}
\ No newline at end of file
+         "content": prompt}
\ No newline at end of file
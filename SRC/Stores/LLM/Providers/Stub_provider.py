@@ -0,0 +1,73 @@
+from ..LLMInterface import LLMInterface
+from ..LLMEnums import OpenAIEnum
+import hashlib
+import logging
+import time
+from typing import List, Union
+
+import numpy as np
+
+
+class StubProvider(LLMInterface):
+    """
+    Local provider for offline tests and resilience drills: no network, deterministic output.
+    genrate_text echoes the prompt tail, embed_text returns unit vectors seeded from the text hash.
+    latency_seconds delays every call (and each streamed token); fail_with raises that exception.
+    """
+
+    def __init__(self, response_text: str = None, latency_seconds: float = 0.0,
+                 fail_with: Exception = None, default_embedding_size: int = 384):
+        self.response_text = response_text
+        self.latency_seconds = latency_seconds
+        self.fail_with = fail_with
+
+        self.genration_model_id = "stub"
+        self.embedding_model_id = "stub"
+        self.embedding_size = default_embedding_size
+
+        self.enums = OpenAIEnum
+        self.logger = logging.getLogger(__name__)
+
+    def set_genration_model(self, model_id: str):
+        self.genration_model_id = model_id or "stub"
+
+    def set_embedding_model(self, model_id: str, embedding_size: int):
+        self.embedding_model_id = model_id or "stub"
+        self.embedding_size = embedding_size or self.embedding_size
+
+    def _call(self):
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        if self.fail_with is not None:
+            raise self.fail_with
+
+    def _answer(self, prompt: str) -> str:
+        if self.response_text is not None:
+            return self.response_text
+        return f"Stub answer to: {prompt.strip()[-200:]}"
+
+    def genrate_text(self, prompt: str, max_output_tokens: int = None, temperature: float = None, chat_history: list = []):
+        self._call()
+        return self._answer(prompt)
+
+    def stream_text(self, prompt: str, max_output_tokens: int = None, temperature: float = None, chat_history: list = []):
+        self._call()
+        words = self._answer(prompt).split(" ")
+        for i, word in enumerate(words):
+            if i and self.latency_seconds:
+                time.sleep(self.latency_seconds / len(words))
+            yield word if i == 0 else " " + word
+
+    def embed_text(self, text: Union[str, List[str]], document_type: str = None):
+        self._call()
+        if isinstance(text, str):
+            text = [text]
+        vectors = []
+        for t in text:
+            seed = int.from_bytes(hashlib.sha256((t or "").encode("utf-8")).digest()[:8], "little")
+            vector = np.random.default_rng(seed).standard_normal(self.embedding_size)
+            vectors.append((vector / np.linalg.norm(vector)).tolist())
+        return vectors
+
+    def construct_prompt(self, prompt: str, role: str):
+        return {"role": role, "content": prompt}
@@ -1,3 +1,4 @@
 from .Cohere_provider import CohereProvider
 from .OpenAI_provider import OpenAIProvider
-from .Gemini_provider import GeminiProvider
\ No newline at end of file
+from .Gemini_provider import GeminiProvider
+from .Stub_provider import StubProvider
\ No newline at end of file
@@ -0,0 +1,361 @@
+"""
+Resilience layer for text generation over an ordered list of providers (primary first).
+- Retries: retryable errors (429, 5xx, timeouts, connection errors) are retried on the same
+  provider after an async, fully jittered exponential backoff; the event loop is never blocked.
+- Circuit breaker per provider: after failure_threshold consecutive failures the provider is
+  skipped for reset_seconds, then one trial call decides whether it closes again.
+- Failover: when a provider fails (or its circuit is open) the next one is tried. Chat history
+  built with the primary's roles/format is translated for the fallback provider.
+- Hedging (optional): if the provider has not answered (or streamed its first token) within the
+  p95 of its recent latencies (at least hedge_min_delay_ms), the next provider is started too
+  and the first result wins.
+A stream only fails over before its first token; after that, errors reach the caller.
+Blocking provider calls and streams run on a pool of worker_threads threads owned by this client,
+not on the default executor that embeddings, BM25 and reranking use through asyncio.to_thread.
+The synchronous LLMInterface methods delegate to the primary provider.
+"""
+import asyncio
+import functools
+import logging
+import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, List, Optional, Tuple
+
+import numpy as np
+
+from .LLMInterface import LLMInterface
+from Utils.AsyncStream import iterate_in_thread
+from Utils.metrics import LLM_PROVIDER_FAILURES, LLM_FALLBACKS, LLM_HEDGED_REQUESTS, LLM_CIRCUIT_OPEN
+
+logger = logging.getLogger("uvicorn")
+
+_RETRYABLE_MARKERS = ("429", "RESOURCE_EXHAUSTED", "rate limit", "500", "502", "503", "504",
+                      "UNAVAILABLE", "overloaded", "timed out", "timeout")
+
+
+class ProviderError(Exception):
+    """A provider returned no result."""
+
+
+def is_retryable(error: BaseException) -> bool:
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    if isinstance(error, (TimeoutError, ConnectionError, asyncio.TimeoutError)):
+        return True
+    message = str(error)
+    return any(marker.lower() in message.lower() for marker in _RETRYABLE_MARKERS)
+
+
+def backoff_delay(attempt: int, base_seconds: float, max_seconds: float) -> float:
+    """Full jitter: uniform in [0, min(max, base * 2^attempt)]."""
+    return random.uniform(0, min(max_seconds, base_seconds * (2 ** attempt)))
+
+
+class CircuitBreaker:
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        """Call right before using the provider: a half-open circuit hands its single trial to the caller."""
+        if self.opened_at is None:
+            return True
+        if time.monotonic() - self.opened_at < self.reset_seconds or self._trial_running:
+            return False
+        # half-open: let one call through
+        self._trial_running = True
+        return True
+
+    def release_trial(self):
+        """Give back a trial that ended without a result (cancelled), so the next call can take it."""
+        self._trial_running = False
+
+    def record_success(self):
+        self.failures = 0
+        self._trial_running = False
+        if self.opened_at is not None:
+            self.opened_at = None
+            LLM_CIRCUIT_OPEN.labels(provider=self.name).set(0)
+            logger.info("LLM provider %s circuit closed", self.name)
+
+    def record_failure(self):
+        self.failures += 1
+        trial_failed = self._trial_running
+        self._trial_running = False
+        if trial_failed or (self.opened_at is None and self.failures >= self.failure_threshold):
+            self.opened_at = time.monotonic()
+            LLM_CIRCUIT_OPEN.labels(provider=self.name).set(1)
+            logger.warning("LLM provider %s circuit open for %.0fs", self.name, self.reset_seconds)
+
+
+class LatencyTracker:
+    """Recent latencies of one provider; deadline() is their percentile, never below min_seconds."""
+
+    def __init__(self, window: int = 200, percentile: float = 95, min_samples: int = 20,
+                 min_seconds: float = 2.0):
+        self.samples = deque(maxlen=window)
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_seconds = min_seconds
+
+    def observe(self, seconds: float):
+        self.samples.append(seconds)
+
+    def deadline(self) -> float:
+        if len(self.samples) < self.min_samples:
+            return self.min_seconds
+        return max(self.min_seconds, float(np.percentile(np.fromiter(self.samples, dtype=np.float64), self.percentile)))
+
+
+class _Provider:
+
+    def __init__(self, name: str, client: LLMInterface, failure_threshold: int, reset_seconds: float,
+                 percentile: float, min_hedge_seconds: float):
+        self.name = name
+        self.client = client
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_seconds)
+        self.answer_latency = LatencyTracker(percentile=percentile, min_seconds=min_hedge_seconds)
+        self.first_token_latency = LatencyTracker(percentile=percentile, min_seconds=min_hedge_seconds)
+
+
+class ResilientLLM(LLMInterface):
+
+    def __init__(self, providers: List[Tuple[str, LLMInterface]], max_retries: int = 2,
+                 backoff_base_ms: float = 250, backoff_max_ms: float = 4000,
+                 failure_threshold: int = 5, reset_seconds: float = 30,
+                 hedge: bool = False, hedge_percentile: float = 95, hedge_min_delay_ms: float = 2000,
+                 worker_threads: int = 32):
+        if not providers:
+            raise ValueError("ResilientLLM needs at least one provider")
+        self.providers = [
+            _Provider(name, client, failure_threshold, reset_seconds, hedge_percentile, hedge_min_delay_ms / 1000.0)
+            for name, client in providers
+        ]
+        self.primary = self.providers[0].client
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base_ms / 1000.0
+        self.backoff_max = backoff_max_ms / 1000.0
+        self.hedge = hedge and len(self.providers) > 1
+        self.executor = ThreadPoolExecutor(max_workers=max(1, worker_threads), thread_name_prefix="llm")
+
+    # LLMInterface: the primary provider's model, roles and prompt format
+
+    @property
+    def enums(self):
+        return self.primary.enums
+
+    @property
+    def genration_model_id(self):
+        return self.primary.genration_model_id
+
+    def set_genration_model(self, model_id: str):
+        self.primary.set_genration_model(model_id)
+
+    def set_embedding_model(self, model_id: str, embedding_size: int):
+        self.primary.set_embedding_model(model_id, embedding_size)
+
+    def embed_text(self, text, document_type: str = None):
+        return self.primary.embed_text(text, document_type)
+
+    def construct_prompt(self, prompt: str, role: str):
+        return self.primary.construct_prompt(prompt, role)
+
+    def genrate_text(self, prompt: str, max_output_tokens: int = None, temperature: float = None, chat_history: list = []):
+        """Blocking variant for sync callers: failover only, no backoff sleeps or hedging."""
+        for provider in self.providers:
+            trial = provider.breaker.is_open
+            if not provider.breaker.allow():
+                continue
+            try:
+                answer = provider.client.genrate_text(prompt=prompt, max_output_tokens=max_output_tokens,
+                                                      temperature=temperature,
+                                                      chat_history=self._history_for(provider, chat_history))
+                if not answer:
+                    raise ProviderError("empty response")
+                provider.breaker.record_success()
+                return answer
+            except Exception as e:
+                self._failed(provider, e)
+            finally:
+                if trial:
+                    provider.breaker.release_trial()
+        return None
+
+    def stream_text(self, prompt: str, max_output_tokens: int = None, temperature: float = None, chat_history: list = []):
+        return self.primary.stream_text(prompt=prompt, max_output_tokens=max_output_tokens,
+                                        temperature=temperature, chat_history=chat_history)
+
+    # helpers
+
+    def _failed(self, provider: _Provider, error: BaseException):
+        provider.breaker.record_failure()
+        LLM_PROVIDER_FAILURES.labels(provider=provider.name).inc()
+        logger.warning("LLM provider %s failed: %s", provider.name, error)
+
+    def _history_for(self, provider: _Provider, chat_history: list) -> list:
+        """Chat history in the provider's roles and message format (it is built with the primary's)."""
+        chat_history = list(chat_history or [])
+        if provider.client is self.primary or provider.client.enums is self.primary.enums:
+            return chat_history
+        role_names = {member.value: member.name for member in self.primary.enums}
+        translated = []
+        for message in chat_history:
+            role = role_names.get(message.get("role"), "USER")
+            content = message.get("content", message.get("text"))
+            translated.append(provider.client.construct_prompt(prompt=content, role=provider.client.enums[role].value))
+        return translated
+
+    async def _call_with_retries(self, provider: _Provider, call):
+        """Run call() in a thread; retry retryable errors with jittered backoff. Raises when exhausted."""
+        for attempt in range(self.max_retries + 1):
+            started = time.perf_counter()
+            try:
+                result = await call()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._failed(provider, e)
+                if attempt >= self.max_retries or not is_retryable(e) or provider.breaker.is_open:
+                    raise
+                await asyncio.sleep(backoff_delay(attempt, self.backoff_base, self.backoff_max))
+                continue
+            provider.breaker.record_success()
+            return result, time.perf_counter() - started
+
+    # async generation
+
+    async def agenrate_text(self, prompt: str, max_output_tokens: int = None, temperature: float = None,
+                            chat_history: list = []) -> Optional[str]:
+        """Answer from the first provider that succeeds (hedged when enabled), or None."""
+
+        def attempt(provider: _Provider):
+            async def call():
+                answer = await asyncio.get_running_loop().run_in_executor(self.executor, functools.partial(
+                    provider.client.genrate_text, prompt=prompt, max_output_tokens=max_output_tokens,
+                    temperature=temperature, chat_history=self._history_for(provider, chat_history)))
+                if not answer:
+                    raise ProviderError("empty response")
+                return answer
+
+            async def run():
+                answer, latency = await self._call_with_retries(provider, call)
+                provider.answer_latency.observe(latency)
+                return answer
+            return run()
+
+        return await self._first_success(attempt, lambda provider: provider.answer_latency.deadline())
+
+    async def astream_text(self, prompt: str, max_output_tokens: int = None, temperature: float = None,
+                           chat_history: list = []) -> AsyncIterator[str]:
+        """Stream from the first provider that produces a token (hedged when enabled)."""
+
+        def attempt(provider: _Provider):
+            async def call():
+                stream = iterate_in_thread(provider.client.stream_text(
+                    prompt=prompt, max_output_tokens=max_output_tokens, temperature=temperature,
+                    chat_history=self._history_for(provider, chat_history)), executor=self.executor)
+                try:
+                    first = await stream.__anext__()
+                except StopAsyncIteration:
+                    raise ProviderError("empty stream")
+                except BaseException:
+                    await stream.aclose()
+                    raise
+                return first, stream
+
+            async def run():
+                (first, stream), latency = await self._call_with_retries(provider, call)
+                provider.first_token_latency.observe(latency)
+                return first, stream
+            return run()
+
+        started = await self._first_success(attempt,
+                                            lambda provider: provider.first_token_latency.deadline(),
+                                            discard=lambda result: result[1].aclose())
+        if started is None:
+            raise ProviderError("No LLM provider could start the answer stream")
+
+        first, stream = started
+        try:
+            yield first
+            async for token in stream:
+                yield token
+        finally:
+            await stream.aclose()
+
+    async def _first_success(self, attempt, deadline, discard=None):
+        """
+        Try providers in order. With hedging, the next provider also starts when the running ones
+        have not finished within the current provider's deadline; the first success wins and the
+        other attempts are cancelled (discard() releases a result that lost the race).
+        A circuit breaker is only asked when its provider is about to be called, and a half-open
+        trial whose attempt is cancelled is handed back.
+        """
+        running = {}
+        index = 0
+        winner = None
+
+        def start_next() -> Optional[_Provider]:
+            nonlocal index
+            while index < len(self.providers):
+                provider = self.providers[index]
+                index += 1
+                trial = provider.breaker.is_open
+                if not provider.breaker.allow():
+                    continue
+                if provider is not self.providers[0]:
+                    LLM_FALLBACKS.labels(provider=provider.name).inc()
+                task = asyncio.create_task(attempt(provider))
+                if trial:
+                    # done callbacks also run for a task cancelled before it started
+                    task.add_done_callback(lambda _, breaker=provider.breaker: breaker.release_trial())
+                running[task] = provider
+                return provider
+            return None
+
+        try:
+            while winner is None:
+                if not running:
+                    current = start_next()
+                    if current is None:
+                        break
+                timeout = deadline(current) if self.hedge and index < len(self.providers) else None
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged = start_next()
+                    if hedged is not None:
+                        LLM_HEDGED_REQUESTS.inc()
+                        current = hedged
+                    continue
+                for task in done:
+                    running.pop(task)
+                    if winner is None and not task.cancelled() and task.exception() is None:
+                        winner = task.result()
+                    elif winner is not None and discard and not task.cancelled() and task.exception() is None:
+                        await discard(task.result())
+        finally:
+            for task in running:
+                task.cancel()
+            for task in running:
+                try:
+                    result = await task
+                except BaseException:
+                    continue
+                if discard:
+                    await discard(result)
+
+        if winner is None:
+            logger.error("All LLM providers failed or are unavailable")
+        return winner
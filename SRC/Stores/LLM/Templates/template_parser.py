@@ -1,56 +1,155 @@
-import os 
-
-
-class template_parser : 
-    def __init__(self , language : str = None ,default_language : str = "en") : 
+"""
+Prompt template registry.
+Every locale package under Locales/ (one module per template group) is imported and validated
+once, when the parser is created, and its string.Template objects are kept in a dict:
+    {language: {group: {key: Template}}}
+Rendering is a dict lookup plus Template.substitute, with no filesystem checks or imports per call.
+A template missing from a locale falls back to the default language. reload() re-imports the
+locale modules (after editing prompts) and swaps the registry in one assignment.
+Every worker process has its own registry: reload(publish=True) also touches Locales/.reload, and
+the other workers reload when they see its mtime change (checked at most every RELOAD_CHECK_SECONDS).
+"""
+from string import Template
+from typing import Dict, Optional
+import importlib
+import logging
+import os
+import pkgutil
+import time
+
+logger = logging.getLogger("uvicorn")
+
+LOCALES_PACKAGE = "Stores.LLM.Templates.Locales"
+
+Registry = Dict[str, Dict[str, Dict[str, Template]]]
+
+RELOAD_STAMP_FILE = ".reload"
+RELOAD_CHECK_SECONDS = 2
+
+
+class template_parser :
+    def __init__(self , language : str = None ,default_language : str = "en") :
         self.current_path  = os.path.dirname (os.path.abspath(__file__))
         self.default_language = default_language
         self.language = None
+        self.templates : Registry = {}
+        self.reload_stamp_path = os.path.join(self.current_path, "Locales", RELOAD_STAMP_FILE)
+        self.reload_stamp = self._read_stamp()
+        self._next_stamp_check = time.monotonic() + RELOAD_CHECK_SECONDS
 
+        self.reload(reimport = False)
         self.set_language(language)
 
 
-    def set_language(self , language : str) : 
+    def _load_locale(self , language : str , reimport : bool) -> Dict[str, Dict[str, Template]] :
+        groups = {}
+        locale_path = os.path.join(self.current_path, "Locales", language)
+        for module_info in pkgutil.iter_modules([locale_path]) :
+            module = importlib.import_module(f"{LOCALES_PACKAGE}.{language}.{module_info.name}")
+            if reimport :
+                module = importlib.reload(module)
+            templates = {key : value for key , value in vars(module).items() if isinstance(value, Template)}
+            if templates :
+                groups[module_info.name] = templates
+        return groups
+
+
+    @staticmethod
+    def _validate(templates : Registry , default_language : str) :
+        """Drop locale templates whose placeholders differ from the default language's (they would fail to render)."""
+        for language , groups in templates.items() :
+            for group , keys in groups.items() :
+                for key , template in list(keys.items()) :
+                    if not template.is_valid() :
+                        raise ValueError(f"Invalid template {language}/{group}.{key}")
+                    default = templates.get(default_language, {}).get(group, {}).get(key)
+                    if language == default_language or default is None :
+                        continue
+                    if set(template.get_identifiers()) != set(default.get_identifiers()) :
+                        logger.warning("Template %s/%s.%s has other placeholders than %s; using %s",
+                                       language, group, key, default_language, default_language)
+                        del keys[key]
+
+
+    def _read_stamp(self) -> Optional[int] :
+        try :
+            return os.stat(self.reload_stamp_path).st_mtime_ns
+        except OSError :
+            return None
+
 
-        if not language : 
+    def _sync(self) :
+        """Reload when another worker published a reload since this registry was loaded."""
+        now = time.monotonic()
+        if now < self._next_stamp_check :
+            return
+        self._next_stamp_check = now + RELOAD_CHECK_SECONDS
+
+        stamp = self._read_stamp()
+        if stamp == self.reload_stamp :
+            return
+        self.reload_stamp = stamp
+        try :
+            self.reload()
+        except Exception as e :
+            logger.error("Prompt template reload from %s failed, keeping the current templates: %s",
+                         self.reload_stamp_path, e)
+
+
+    def reload(self , reimport : bool = True , publish : bool = False) -> Registry :
+        """Load (or re-import) all locales and replace the registry; publish=True makes the other workers follow."""
+        locales_path = os.path.join(self.current_path, "Locales")
+        templates = {
+            entry.name : self._load_locale(entry.name, reimport)
+            for entry in os.scandir(locales_path)
+            if entry.is_dir() and not entry.name.startswith("__")
+        }
+        if not templates.get(self.default_language) :
+            raise ValueError(f"No prompt templates found for default language '{self.default_language}'")
+        self._validate(templates, self.default_language)
+
+        self.templates = templates
+        if self.language is not None and self.language not in templates :
             self.language = self.default_language
-        
-        language_path = os.path.join(self.current_path,"Locales", language)
-        if os.path.exists(language_path) :
+
+        if publish :
+            with open(self.reload_stamp_path, "w") as stamp_file :
+                stamp_file.write(str(time.time_ns()))
+            self.reload_stamp = self._read_stamp()
+        return templates
+
+
+    def set_language(self , language : str) :
+
+        if language and language in self.templates :
             self.language = language
         else :
             self.language = self.default_language
 
 
+    def language_for(self , language : Optional[str] = None) -> str :
+        """The locale a request for `language` renders with: itself when loaded, else the parser's language."""
+        self._sync()
+        return language if language and language in self.templates else self.language
 
-    def get(self,group :str ,key : str , vars : dict = {} ):
-        if not group or not key : 
-            return None
-        
-        group_path = os.path.join(self.current_path,"Locales", self.language, f"{group}.py")
-        targeted_language = self.language
-        if not os.path.exists(group_path) :
-            group_path = os.path.join(self.current_path,"Locales", self.default_language, f"{group}.py")
-            targeted_language = self.default_language
-        
-        if not os.path.exists(group_path) :
-            return None
-        
 
-        # import module 
-        module = __import__(f"Stores.LLM.Templates.Locales.{targeted_language}.{group}",fromlist=[group] ) 
+    def resolve(self , group : str , key : str , language : Optional[str] = None) -> Optional[Template] :
+        """The Template for group/key in language (default: the parser's), else in the default language."""
+        self._sync()
+        templates = self.templates
+        for lang in (language or self.language , self.default_language) :
+            template = templates.get(lang, {}).get(group, {}).get(key)
+            if template is not None :
+                return template
+        return None
 
 
-        if not module :
+    def get(self,group :str ,key : str , vars : dict = None , language : Optional[str] = None):
+        if not group or not key :
             return None
-        
 
-        key_attribute = getattr(module,key)
-        return key_attribute.substitute(vars)
-        
-        
-
-        
-
-        
+        template = self.resolve(group , key , language)
+        if template is None :
+            return None
 
+        return template.substitute(vars or {})
@@ -0,0 +1,28 @@
+from ..RerankInterface import RerankInterface
+import cohere
+import logging
+from typing import List
+
+
+class CohereReranker(RerankInterface):
+
+    def __init__(self, api_key: str, model_id: str = "rerank-english-v3.0"):
+        self.model_id = model_id
+        self.client = cohere.Client(api_key=api_key) if api_key else None
+        self.logger = logging.getLogger("uvicorn")
+
+    def score(self, query: str, texts: List[str]) -> List[float]:
+        if not self.client:
+            raise RuntimeError("Cohere rerank client is not initialized")
+
+        response = self.client.rerank(
+            model=self.model_id,
+            query=query,
+            documents=texts,
+            top_n=len(texts)
+        )
+
+        scores = [0.0] * len(texts)
+        for result in response.results:
+            scores[result.index] = float(result.relevance_score)
+        return scores
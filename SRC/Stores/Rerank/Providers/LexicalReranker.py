@@ -0,0 +1,57 @@
+from ..RerankInterface import RerankInterface
+from Utils.NLPPreprocess import analyze
+from collections import Counter
+from typing import List
+import math
+
+
+class LexicalReranker(RerankInterface):
+    """
+    Local feature-based scorer, no model download: BM25 of the query over the candidate set, plus
+    query term coverage and query bigram (phrase) matches. Each feature is scaled to [0, 1].
+    Document frequencies and the BM25 scale come from the texts of the call, hence not batchable.
+    """
+
+    batchable = False
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75,
+                 bm25_weight: float = 0.5, coverage_weight: float = 0.3, phrase_weight: float = 0.2):
+        self.k1 = k1
+        self.b = b
+        self.bm25_weight = bm25_weight
+        self.coverage_weight = coverage_weight
+        self.phrase_weight = phrase_weight
+
+    def score(self, query: str, texts: List[str]) -> List[float]:
+        query_terms = analyze(query)
+        if not texts or not query_terms:
+            return [0.0] * len(texts)
+
+        unique_terms = set(query_terms)
+        query_bigrams = set(zip(query_terms, query_terms[1:]))
+        docs = [analyze(text) for text in texts]
+        freqs = [Counter(doc) for doc in docs]
+        avg_len = max(1.0, sum(len(doc) for doc in docs) / len(docs))
+        df = Counter(term for doc_freqs in freqs for term in unique_terms if term in doc_freqs)
+        n_docs = len(docs)
+
+        bm25, coverage, phrase = [], [], []
+        for doc, doc_freqs in zip(docs, freqs):
+            norm = self.k1 * (1.0 - self.b + self.b * len(doc) / avg_len)
+            bm25.append(sum(
+                math.log1p((n_docs - df[term] + 0.5) / (df[term] + 0.5))
+                * doc_freqs[term] * (self.k1 + 1.0) / (doc_freqs[term] + norm)
+                for term in unique_terms if term in doc_freqs
+            ))
+            coverage.append(sum(1 for term in unique_terms if term in doc_freqs) / len(unique_terms))
+            if query_bigrams:
+                doc_bigrams = set(zip(doc, doc[1:]))
+                phrase.append(len(query_bigrams & doc_bigrams) / len(query_bigrams))
+            else:
+                phrase.append(0.0)
+
+        bm25_max = max(bm25) or 1.0
+        return [
+            self.bm25_weight * b25 / bm25_max + self.coverage_weight * cov + self.phrase_weight * ph
+            for b25, cov, ph in zip(bm25, coverage, phrase)
+        ]
@@ -0,0 +1,12 @@
+from ..RerankInterface import RerankInterface
+from typing import List
+
+
+class StubReranker(RerankInterface):
+    """Offline reranker for tests: keeps the retrieval order (decreasing scores), no network, no models."""
+
+    # scores are positions in the call, so it must see the whole candidate set at once
+    batchable = False
+
+    def score(self, query: str, texts: List[str]) -> List[float]:
+        return [1.0 / (1 + i) for i in range(len(texts))]
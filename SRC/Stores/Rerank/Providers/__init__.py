@@ -0,0 +1,3 @@
+from .CohereReranker import CohereReranker
+from .LexicalReranker import LexicalReranker
+from .StubReranker import StubReranker
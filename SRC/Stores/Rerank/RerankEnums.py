@@ -0,0 +1,7 @@
+from enum import Enum
+
+class RerankerEnums (Enum) :
+
+    COHERE = "COHERE"
+    LEXICAL = "LEXICAL"
+    STUB = "STUB"
@@ -0,0 +1,14 @@
+from abc import ABC, abstractmethod
+from typing import List
+
+class RerankInterface(ABC):
+
+    # True when a text's score does not depend on the other texts of the call, so candidates can be
+    # scored in separate batches and cached per chunk. Set-relative scorers (statistics over the
+    # texts, positions) set it to False and get the whole candidate set in one call.
+    batchable = True
+
+    @abstractmethod
+    def score(self, query: str, texts: List[str]) -> List[float]:
+        """Relevance of each text to query, higher is better, in input order. Blocking call."""
+        pass
@@ -0,0 +1,23 @@
+from .RerankEnums import RerankerEnums
+from .Providers import CohereReranker, LexicalReranker, StubReranker
+
+
+class RerankProviderFactory :
+
+    def __init__(self, config : dict):
+        self.config = config
+
+    def create (self , provider : str ) :
+        if provider == RerankerEnums.COHERE.value :
+            return CohereReranker(
+                api_key = self.config.COHERE_API_KEY,
+                model_id = self.config.RERANK_MODEL_ID
+            )
+
+        if provider == RerankerEnums.LEXICAL.value :
+            return LexicalReranker()
+
+        if provider == RerankerEnums.STUB.value :
+            return StubReranker()
+
+        return None
@@ -0,0 +1,123 @@
+"""
+Reranking stage between retrieval and generation.
+Retrieval over-fetches candidates (RERANK_CANDIDATES) and the reranker keeps the best `limit`.
+Candidates are scored in batches of batch_size, run concurrently in worker threads; scores are
+cached per (normalized query, chunk) so repeated questions only score chunks they have not seen.
+Rerankers whose scores are relative to the candidate set (batchable = False) score all candidates
+in one call, and their cached scores are only reused for the same candidate set.
+Scoring runs under a time budget: batches still running when it expires are dropped and their
+candidates rank after the scored ones, in retrieval order. A failing reranker never fails the
+answer: the retrieval order is kept.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Hashable, List, Optional
+
+from Models.DB_Schemes import RetrivedDocument
+from Utils.AnswerCache import normalize_question
+from Utils.metrics import RERANK_CACHE_HITS, RERANK_LATENCY, RERANK_TIMEOUTS
+from .RerankInterface import RerankInterface
+
+logger = logging.getLogger("uvicorn")
+
+
+class RerankService:
+
+    def __init__(self, reranker: RerankInterface, batch_size: int = 16,
+                 time_budget_ms: float = 800, cache_size: int = 10000):
+        self.reranker = reranker
+        self.batch_size = max(1, batch_size)
+        self.time_budget = time_budget_ms / 1000.0 if time_budget_ms and time_budget_ms > 0 else None
+        self.cache_size = cache_size
+        self._scores: "OrderedDict[tuple, float]" = OrderedDict()
+
+    @staticmethod
+    def _chunk_key(document: RetrivedDocument) -> Hashable:
+        return document.chunk_id if document.chunk_id is not None else hash(document.text)
+
+    def _query_key(self, query: str, documents: List[RetrivedDocument]) -> Hashable:
+        query_key = normalize_question(query)
+        if self.reranker.batchable:
+            return query_key
+        return (query_key, hash(tuple(self._chunk_key(document) for document in documents)))
+
+    def _cached(self, key: tuple) -> Optional[float]:
+        score = self._scores.get(key)
+        if score is not None:
+            self._scores.move_to_end(key)
+        return score
+
+    def _store(self, query_key: Hashable, documents: List[RetrivedDocument], scores: List[float]):
+        if self.cache_size <= 0:
+            return
+        for document, score in zip(documents, scores):
+            self._scores[(query_key, self._chunk_key(document))] = float(score)
+        while len(self._scores) > self.cache_size:
+            self._scores.popitem(last=False)
+
+    async def _score_batches(self, query: str, query_key: Hashable, documents: List[RetrivedDocument]) -> dict:
+        """{position in documents: score} for the batches that finish within the time budget."""
+        batch_size = self.batch_size if self.reranker.batchable else len(documents)
+        tasks = {
+            asyncio.create_task(asyncio.to_thread(
+                self.reranker.score, query, [doc.text for doc in documents[start:start + batch_size]])): start
+            for start in range(0, len(documents), batch_size)
+        }
+        done, pending = await asyncio.wait(tasks, timeout=self.time_budget)
+        if pending:
+            RERANK_TIMEOUTS.inc()
+            logger.warning("Reranking exceeded its time budget: %d of %d batches dropped", len(pending), len(tasks))
+
+        def store_late(task, start):
+            # a dropped batch still finishes in its thread: keep its scores for the next identical question
+            if not task.cancelled() and task.exception() is None:
+                self._store(query_key, documents[start:start + batch_size], task.result())
+
+        for task in pending:
+            task.add_done_callback(lambda t, start=tasks[task]: store_late(t, start))
+
+        scores = {}
+        for task in done:
+            start = tasks[task]
+            if task.exception() is not None:
+                logger.error("Reranker batch failed: %s", task.exception())
+                continue
+            batch = documents[start:start + batch_size]
+            batch_scores = task.result()
+            self._store(query_key, batch, batch_scores)
+            scores.update({start + i: float(score) for i, score in enumerate(batch_scores)})
+        return scores
+
+    async def rerank(self, query: str, documents: List[RetrivedDocument], limit: int) -> List[RetrivedDocument]:
+        """The best `limit` documents by reranker score (written to their score), best first."""
+        if not documents:
+            return []
+
+        started = time.perf_counter()
+        query_key = self._query_key(query, documents)
+        scores, missing = {}, []
+        for position, document in enumerate(documents):
+            cached = self._cached((query_key, self._chunk_key(document)))
+            if cached is None:
+                missing.append(position)
+            else:
+                scores[position] = cached
+        RERANK_CACHE_HITS.inc(len(scores))
+
+        if missing:
+            missing_scores = await self._score_batches(query, query_key, [documents[i] for i in missing])
+            scores.update({missing[i]: score for i, score in missing_scores.items()})
+        RERANK_LATENCY.observe(time.perf_counter() - started)
+
+        scored = sorted(scores, key=lambda position: scores[position], reverse=True)
+        # documents of failed batches keep their retrieval order, below every reranked one
+        # (their retrieval scores are on a different scale than the reranker's)
+        floor = min(scores.values(), default=0.0)
+        unscored = [position for position in range(len(documents)) if position not in scores]
+        scores.update({position: floor - 1 - i for i, position in enumerate(unscored)})
+        return [
+            documents[position].model_copy(update={"score": scores[position]})
+            for position in (scored + unscored)[:limit]
+        ]
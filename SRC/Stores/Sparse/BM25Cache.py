@@ -0,0 +1,83 @@
+"""
+Process-wide LRU cache of loaded BM25 indexes, keyed by project_id.
+Entries are validated against the index manifest's mtime/size on every lookup, so a change
+by another worker is picked up on the next query (the loader gets the stale entry so it can
+reuse unchanged segments). Memory use is bounded by max_bytes, using the index's nbytes
+(or the file size for objects without one).
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+
+from Utils.metrics import BM25_CACHE_HITS, BM25_CACHE_MISSES, BM25_CACHE_EVICTIONS, BM25_CACHE_BYTES
+
+
+class BM25IndexCache:
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[int, Tuple[Tuple[int, int], int, Any]]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _file_version(path: str) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self, project_id: int, path: str, loader: Callable[[str, Any], Any]) -> Any:
+        """Return the cached index for project_id, (re)loading it from path when missing or stale."""
+        version = self._file_version(path)
+        if version is None:
+            self.invalidate(project_id)
+            return None
+
+        with self._lock:
+            entry = self._entries.get(project_id)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(project_id)
+                BM25_CACHE_HITS.inc()
+                return entry[2]
+            previous = entry[2] if entry is not None else None
+
+        BM25_CACHE_MISSES.inc()
+        # load outside the lock: reading a large index must not block hits on other projects
+        data = loader(path, previous)
+        if data is not None:
+            self.put(project_id, version, data)
+        return data
+
+    def put(self, project_id: int, version: Tuple[int, int], data: Any):
+        size = int(getattr(data, "nbytes", version[1]))
+        with self._lock:
+            self._pop(project_id)
+            if self.max_bytes and size > self.max_bytes:
+                # larger than the whole budget: serve it uncached
+                return
+            self._entries[project_id] = (version, size, data)
+            self._total_bytes += size
+            while self.max_bytes and self._total_bytes > self.max_bytes and len(self._entries) > 1:
+                oldest_id = next(iter(self._entries))
+                self._pop(oldest_id)
+                BM25_CACHE_EVICTIONS.inc()
+            BM25_CACHE_BYTES.set(self._total_bytes)
+
+    def invalidate(self, project_id: int):
+        with self._lock:
+            self._pop(project_id)
+            BM25_CACHE_BYTES.set(self._total_bytes)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+            BM25_CACHE_BYTES.set(0)
+
+    def _pop(self, project_id: int):
+        entry = self._entries.pop(project_id, None)
+        if entry is not None:
+            self._total_bytes -= entry[1]
@@ -1,18 +1,49 @@
 """
 BM25 sparse index for hybrid search: build from (chunk_id, text), persist by project_id, search by query.
-Corpus and query are lemmatized for BM25 only.
+Corpus and query are lemmatized for BM25 only. Scoring runs on a native inverted index (see InvertedIndex).
+
+On disk a project index is a directory of append-only segments plus a manifest:
+    bm25_{project_id}/manifest.json        segment list, N and total document length
+    bm25_{project_id}/seg_000001.seg       immutable postings of one batch of chunks (memory-mapped, see SegmentFormat)
+    bm25_{project_id}/seg_000001.live.npy  tombstones (live mask) of that segment
+Adding chunks writes one new segment; deleting chunks rewrites the live masks they are in.
+Small segments are merged in the background once there are more than BM25_MAX_SEGMENTS.
 """
 import os
-from typing import List, Tuple, Any
+import json
+import uuid
+import shutil
+import logging
+import contextlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+from typing import List, Tuple, Any, Dict, Optional
 
 try:
-    from rank_bm25 import BM25Okapi
     import numpy as np
+    from .InvertedIndex import InvertedIndex, IndexSegment
+    from .SegmentFormat import write_segment as write_segment_file, open_segment as open_segment_file
     _HAS_BM25 = True
 except ImportError:
     _HAS_BM25 = False
 
-from Utils.NLPPreprocess import lemmatize_text, tokenize
+try:
+    import fcntl
+except ImportError:  # non-POSIX: single process only
+    fcntl = None
+
+from Utils.NLPPreprocess import analyze, analyze_many
+from .BM25Cache import BM25IndexCache
+
+logger = logging.getLogger("uvicorn")
+
+_cache = None
+_project_locks: Dict[int, threading.RLock] = {}
+_project_locks_guard = threading.Lock()
+_held_locks = threading.local()
+_merge_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bm25-merge")
+_merges_pending = set()
 
 
 def _get_index_dir() -> str:
@@ -27,40 +58,362 @@ def _get_index_dir() -> str:
 
 
 def _index_path(project_id: int) -> str:
+    """Legacy single-file index (rank_bm25 pickle), read once and converted to segments."""
     base = _get_index_dir()
     os.makedirs(base, exist_ok=True)
     return os.path.join(base, f"bm25_{project_id}.joblib")
 
 
+def _project_dir(project_id: int) -> str:
+    return os.path.join(_get_index_dir(), f"bm25_{project_id}")
+
+
+def _manifest_path(project_id: int) -> str:
+    return os.path.join(_project_dir(project_id), "manifest.json")
+
+
+def _max_segments() -> int:
+    try:
+        from Helpers.Config import get_settings
+        return max(1, getattr(get_settings(), "BM25_MAX_SEGMENTS", 8))
+    except Exception:
+        return 8
+
+
+def _get_cache() -> BM25IndexCache:
+    global _cache
+    if _cache is None:
+        max_bytes = 512 * 1024 * 1024
+        try:
+            from Helpers.Config import get_settings
+            max_bytes = getattr(get_settings(), "BM25_CACHE_MAX_BYTES", max_bytes)
+        except Exception:
+            pass
+        _cache = BM25IndexCache(max_bytes=max_bytes)
+    return _cache
+
+
+def _write_atomic(path: str, write):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def _analyze_corpus(texts: List[str]) -> List[Dict[str, int]]:
+    """Term frequencies of each text; large corpora are lemmatized in a process pool."""
+    workers, min_parallel_docs, data_dir = 0, 2000, None
+    try:
+        from Helpers.Config import get_settings
+        settings = get_settings()
+        workers = getattr(settings, "BM25_ANALYZER_WORKERS", workers)
+        min_parallel_docs = getattr(settings, "BM25_ANALYZER_PARALLEL_MIN_DOCS", min_parallel_docs)
+        data_dir = getattr(settings, "NLTK_DATA_DIR", None)
+    except Exception:
+        pass
+    terms = analyze_many([text or "" for text in texts], workers=workers, data_dir=data_dir,
+                         min_parallel_docs=min_parallel_docs)
+    return [Counter(doc_terms) for doc_terms in terms]
+
+
+def _chunk_fields(c: Any) -> Tuple[int, str]:
+    chunk_id = c.chunk_id if hasattr(c, "chunk_id") else c[0]
+    text = c.chunk_text if hasattr(c, "chunk_text") else c[1]
+    return chunk_id, text
+
+
+def _stored_term_freqs(c: Any) -> Optional[Dict[str, int]]:
+    """Term vector persisted with the chunk at process time (chunk_terms / chunk_term_freqs), if loaded."""
+    try:
+        terms = getattr(c, "chunk_terms", None)
+        freqs = getattr(c, "chunk_term_freqs", None)
+    except Exception:
+        # deferred columns that were not loaded can not be fetched from a detached row
+        return None
+    if terms is None or freqs is None or len(terms) != len(freqs):
+        return None
+    return dict(zip(terms, freqs))
+
+
+def _chunks_term_freqs(chunks: List[Any]) -> Tuple[List[int], List[Dict[str, int]]]:
+    """Chunk ids and term frequencies: stored term vectors are used as is, only chunks without one are analyzed."""
+    chunk_ids, term_freqs, pending = [], [], []
+    for c in chunks:
+        chunk_id, text = _chunk_fields(c)
+        chunk_ids.append(chunk_id)
+        stored = _stored_term_freqs(c)
+        if stored is None:
+            pending.append((len(term_freqs), text))
+        term_freqs.append(stored)
+    if pending:
+        for (position, _), freqs in zip(pending, _analyze_corpus([text for _, text in pending])):
+            term_freqs[position] = freqs
+    return chunk_ids, term_freqs
+
+
+class _ProjectLock:
+    """
+    Serializes writers of one project index: a thread lock plus a file lock for other worker processes.
+    Reentrant within a thread; the file lock is taken by the outermost holder only.
+    """
+
+    def __init__(self, project_id: int):
+        with _project_locks_guard:
+            self.thread_lock = _project_locks.setdefault(project_id, threading.RLock())
+        self.project_id = project_id
+        self.project_dir = _project_dir(project_id)
+
+    def __enter__(self):
+        self.thread_lock.acquire()
+        held = _held_locks.__dict__.setdefault("files", {})
+        if self.project_id not in held:
+            os.makedirs(self.project_dir, exist_ok=True)
+            lock_file = open(os.path.join(self.project_dir, ".lock"), "a")
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            held[self.project_id] = [lock_file, 0]
+        held[self.project_id][1] += 1
+        return self
+
+    def __exit__(self, *exc):
+        held = _held_locks.__dict__["files"]
+        held[self.project_id][1] -= 1
+        if not held[self.project_id][1]:
+            held.pop(self.project_id)[0].close()
+        self.thread_lock.release()
+
+
+class _SegmentStore:
+    """Reads and writes one project's segments and manifest."""
+
+    def __init__(self, project_id: int):
+        self.project_id = project_id
+        self.project_dir = _project_dir(project_id)
+        self.manifest_path = _manifest_path(project_id)
+
+    def segment_path(self, name: str) -> str:
+        return os.path.join(self.project_dir, name)
+
+    def read_manifest(self) -> Optional[dict]:
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def write_manifest(self, manifest: dict):
+        _write_atomic(self.manifest_path, lambda f: f.write(json.dumps(manifest).encode("utf-8")))
+
+    def write_segment(self, name: str, segment: IndexSegment) -> IndexSegment:
+        """Persist segment and return it re-opened from disk, so this process shares the mapped pages too."""
+        base_path = self.segment_path(name)
+        self.write_live(name, segment)
+        write_segment_file(f"{base_path}.seg", segment)
+        return open_segment_file(f"{base_path}.seg", live=segment.live)
+
+    def write_live(self, name: str, segment: IndexSegment):
+        _write_atomic(f"{self.segment_path(name)}.live.npy", lambda f: np.save(f, segment.live))
+
+    def read_segment(self, name: str) -> IndexSegment:
+        base_path = self.segment_path(name)
+        if os.path.exists(f"{base_path}.seg"):
+            return open_segment_file(f"{base_path}.seg", live=self.read_live(name))
+        # segments written before the memory-mapped format
+        import joblib
+        data = joblib.load(f"{base_path}.joblib")
+        return IndexSegment(live=self.read_live(name), **data)
+
+    def read_live(self, name: str) -> np.ndarray:
+        return np.load(f"{self.segment_path(name)}.live.npy")
+
+    def remove_segment_files(self, name: str):
+        for suffix in (".seg", ".joblib", ".live.npy"):
+            path = f"{self.segment_path(name)}{suffix}"
+            if os.path.exists(path):
+                os.remove(path)
+
+    def load(self, previous: Optional[InvertedIndex] = None) -> Optional[InvertedIndex]:
+        """Load the index, reusing the segments of previous that the manifest still lists unchanged."""
+        try:
+            return self._load(previous)
+        except FileNotFoundError:
+            # a rewrite removed segments between reading the manifest and opening them: read it again
+            return self._load(previous)
+
+    def _load(self, previous: Optional[InvertedIndex]) -> Optional[InvertedIndex]:
+        manifest = self.read_manifest()
+        if manifest is None:
+            return None
+        reusable = {}
+        previous_manifest = getattr(previous, "manifest", None) or {}
+        if previous is not None and previous_manifest.get("index_id") == manifest.get("index_id"):
+            reusable = {entry["name"]: (entry, seg) for entry, seg in
+                        zip(previous_manifest.get("segments", []), previous.segments)}
+
+        segments = []
+        for entry in manifest["segments"]:
+            known = reusable.get(entry["name"])
+            if known is None:
+                segments.append(self.read_segment(entry["name"]))
+            elif known[0].get("deletes") != entry.get("deletes"):
+                segments.append(known[1].with_live(self.read_live(entry["name"])))
+            else:
+                segments.append(known[1])
+
+        index = InvertedIndex(segments, n_docs=manifest["n_docs"], total_len=manifest["total_len"])
+        index.manifest = manifest
+        return index
+
+    def save(self, index: InvertedIndex, manifest: dict, retired: Optional[List[str]] = None):
+        """
+        Write manifest. retired names the segments it no longer lists: their files are kept until the
+        next rewrite, as readers of the previous manifest may still be opening them, and the segments
+        retired by the previous rewrite are removed.
+        """
+        stale = []
+        if retired is not None:
+            stale = manifest.get("retired", [])
+            manifest["retired"] = list(retired)
+        manifest["n_docs"] = index.n_docs
+        manifest["total_len"] = index.total_len
+        self.write_manifest(manifest)
+        index.manifest = manifest
+        version = BM25IndexCache._file_version(self.manifest_path)
+        if version is not None:
+            _get_cache().put(self.project_id, version, index)
+        listed = {entry["name"] for entry in manifest["segments"]}
+        for name in stale:
+            if name not in listed:
+                self.remove_segment_files(name)
+
+    def next_segment_name(self, manifest: dict) -> str:
+        manifest["next_segment"] = manifest.get("next_segment", 0) + 1
+        return f"seg_{manifest['next_segment']:06d}"
+
+
+def _load_legacy_file(path: str) -> Optional[InvertedIndex]:
+    try:
+        import joblib
+        data = joblib.load(path)
+    except Exception:
+        return None
+    if "bm25" in data:
+        return InvertedIndex.from_term_freqs(data["chunk_ids"], data["bm25"].doc_freqs)
+    return None
+
+
+def _load_project(project_id: int) -> Optional[InvertedIndex]:
+    store = _SegmentStore(project_id)
+    index = _get_cache().get(project_id, store.manifest_path, lambda path, previous: store.load(previous))
+    if index is not None:
+        return index
+    legacy_path = _index_path(project_id)
+    if os.path.isfile(legacy_path):
+        with _ProjectLock(project_id):
+            index = store.load()
+            if index is None:
+                index = _load_legacy_file(legacy_path)
+                if index is None:
+                    # unreadable or old format: keep the file until build_index supersedes it
+                    return None
+                _write_new_index(store, index.segments)
+            # only once a migrated copy exists; another thread may have removed it already
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(legacy_path)
+        return index
+    return None
+
+
+def _write_new_index(store: _SegmentStore, segments: List[IndexSegment]) -> InvertedIndex:
+    """Replace the project index with segments (caller holds the project lock)."""
+    old_manifest = store.read_manifest() or {}
+    manifest = {"index_id": uuid.uuid4().hex, "segments": [], "next_segment": old_manifest.get("next_segment", 0),
+                "retired": old_manifest.get("retired", [])}
+    mapped_segments = []
+    for segment in segments:
+        name = store.next_segment_name(manifest)
+        mapped_segments.append(store.write_segment(name, segment))
+        manifest["segments"].append({"name": name, "deletes": 0})
+    index = InvertedIndex(mapped_segments)
+    store.save(index, manifest, retired=[entry["name"] for entry in old_manifest.get("segments", [])])
+    return index
+
+
+def _schedule_merge(project_id: int, segment_count: int):
+    if segment_count <= _max_segments() or project_id in _merges_pending:
+        return
+    _merges_pending.add(project_id)
+    _merge_executor.submit(BM25Index.merge_segments, project_id)
+
+
 class BM25Index:
     """Build, persist, and search BM25 index keyed by project_id."""
 
     @staticmethod
     def build_index(project_id: int, chunks: List[Any]) -> bool:
         """
-        Build BM25 index from chunks (objects with chunk_id and chunk_text).
-        Lemmatizes text for indexing. Persists to disk.
+        Build BM25 index from chunks (objects with chunk_id and chunk_text), replacing any existing one.
+        Chunks carrying a stored term vector (see term_vectors) are aggregated without re-analysis;
+        the others are lemmatized. Persists to disk.
         """
         if not _HAS_BM25:
             return False
         if not chunks:
             return False
-        chunk_ids = []
-        corpus_tokens = []
-        for c in chunks:
-            chunk_ids.append(getattr(c, "chunk_id", c[0]) if hasattr(c, "chunk_id") else c[0])
-            text = getattr(c, "chunk_text", c[1]) if hasattr(c, "chunk_text") else c[1]
-            normalized = lemmatize_text(text or "")
-            tokens = normalized.split() if normalized else []
-            corpus_tokens.append(tokens)
         try:
-            bm25 = BM25Okapi(corpus_tokens)
-            import joblib
-            joblib.dump({"chunk_ids": chunk_ids, "bm25": bm25}, _index_path(project_id))
+            chunk_ids, term_freqs = _chunks_term_freqs(chunks)
+            segment = IndexSegment.from_term_freqs(chunk_ids, term_freqs)
+            with _ProjectLock(project_id):
+                _write_new_index(_SegmentStore(project_id), [segment])
             return True
-        except Exception:
+        except Exception as e:
+            logger.warning("BM25 index build failed for project %s: %s", project_id, e)
             return False
 
+    @staticmethod
+    def add_chunks(project_id: int, chunks: List[Any]) -> int:
+        """
+        Index the chunks that are not in the project index yet as one new segment.
+        Cost is proportional to the new chunks, not to the index. Returns how many were added.
+        """
+        if not _HAS_BM25 or not chunks:
+            return 0
+        by_id = {_chunk_fields(c)[0]: c for c in chunks}
+        try:
+            with _ProjectLock(project_id):
+                store = _SegmentStore(project_id)
+                index = _load_project(project_id) or InvertedIndex()
+                new_ids = index.missing(list(by_id))
+                if not new_ids:
+                    return 0
+                new_ids, term_freqs = _chunks_term_freqs([by_id[cid] for cid in new_ids])
+                segment = IndexSegment.from_term_freqs(new_ids, term_freqs)
+
+                manifest = dict(getattr(index, "manifest", None) or {"index_id": uuid.uuid4().hex, "segments": []})
+                manifest["segments"] = list(manifest["segments"])
+                name = store.next_segment_name(manifest)
+                segment = store.write_segment(name, segment)
+                manifest["segments"].append({"name": name, "deletes": 0})
+                index = index.add_segment(segment)
+                store.save(index, manifest)
+        except Exception as e:
+            logger.warning("BM25 add failed for project %s: %s", project_id, e)
+            return 0
+        _schedule_merge(project_id, len(index.segments))
+        return len(new_ids)
+
+    @staticmethod
+    def term_vectors(texts: List[str]) -> List[Tuple[List[str], List[int]]]:
+        """
+        Analyzed (terms, frequencies) of each text, terms sorted. Stored with the chunks when they
+        are created so index builds only aggregate them.
+        """
+        vectors = []
+        for freqs in _analyze_corpus(texts):
+            terms = sorted(freqs)
+            vectors.append((terms, [freqs[term] for term in terms]))
+        return vectors
+
     @staticmethod
     def search(project_id: int, query: str, top_k: int = 10) -> List[Tuple[int, float]]:
         """
@@ -68,34 +421,108 @@ class BM25Index:
         """
         if not _HAS_BM25:
             return []
-        path = _index_path(project_id)
-        if not os.path.isfile(path):
+        index = _load_project(project_id)
+        if index is None:
             return []
-        try:
-            import joblib
-            data = joblib.load(path)
-            chunk_ids = data["chunk_ids"]
-            bm25 = data["bm25"]
-        except Exception:
-            return []
-        query_norm = lemmatize_text(query or "")
-        query_tokens = query_norm.split() if query_norm else []
+        query_tokens = analyze(query or "")
         if not query_tokens:
             return []
-        scores = bm25.get_scores(query_tokens)
-        if not len(scores):
-            return []
-        top_indices = np.argsort(scores)[::-1][:top_k]
-        return [(chunk_ids[i], float(scores[i])) for i in top_indices if scores[i] > 0]
+        return index.search(query_tokens, top_k=top_k)
+
+    @staticmethod
+    def delete_chunks(project_id: int, chunk_ids: List[int]) -> int:
+        """
+        Tombstone chunk_ids in the project's index. Only the live masks of the segments holding
+        them are rewritten; N and the total document length are updated in the manifest.
+        Returns the number of removed documents.
+        """
+        if not _HAS_BM25 or not chunk_ids:
+            return 0
+        try:
+            with _ProjectLock(project_id):
+                store = _SegmentStore(project_id)
+                index = _load_project(project_id)
+                if index is None:
+                    return 0
+                updated, changed = index.delete(chunk_ids)
+                if not changed:
+                    return 0
+                manifest = dict(index.manifest)
+                manifest["segments"] = [dict(entry) for entry in manifest["segments"]]
+                for position in changed:
+                    entry = manifest["segments"][position]
+                    store.write_live(entry["name"], updated.segments[position])
+                    entry["deletes"] = entry.get("deletes", 0) + 1
+                store.save(updated, manifest)
+        except Exception as e:
+            logger.warning("BM25 delete failed for project %s: %s", project_id, e)
+            return 0
+        return index.n_docs - updated.n_docs
+
+    @staticmethod
+    def merge_segments(project_id: int) -> bool:
+        """Merge the smallest segments (dropping tombstoned docs) until at most BM25_MAX_SEGMENTS remain."""
+        try:
+            with _ProjectLock(project_id):
+                _merges_pending.discard(project_id)
+                store = _SegmentStore(project_id)
+                index = _load_project(project_id)
+                if index is None or len(index.segments) <= _max_segments():
+                    return False
+
+                by_size = sorted(range(len(index.segments)), key=lambda i: index.segments[i].live_count)
+                positions = by_size[:len(index.segments) - _max_segments() + 1]
+                merged = IndexSegment.merge([index.segments[i] for i in sorted(positions)])
+
+                manifest = dict(index.manifest)
+                old_entries = [manifest["segments"][i] for i in positions]
+                name = store.next_segment_name(manifest)
+                merged = store.write_segment(name, merged)
+                first = min(positions)
+                manifest["segments"] = [
+                    {"name": name, "deletes": 0} if i == first else entry
+                    for i, entry in enumerate(manifest["segments"]) if i == first or i not in positions
+                ]
+                store.save(index.replace_segments(positions, merged), manifest,
+                           retired=[entry["name"] for entry in old_entries])
+            return True
+        except Exception as e:
+            logger.warning("BM25 segment merge failed for project %s: %s", project_id, e)
+            return False
 
     @staticmethod
     def delete_index(project_id: int) -> bool:
         """Remove persisted index for project_id."""
-        path = _index_path(project_id)
-        if os.path.isfile(path):
+        _get_cache().invalidate(project_id)
+        deleted = False
+        legacy_path = _index_path(project_id)
+        if os.path.isfile(legacy_path):
             try:
-                os.remove(path)
-                return True
+                os.remove(legacy_path)
+                deleted = True
             except Exception:
                 pass
-        return False
+        project_dir = _project_dir(project_id)
+        if os.path.isdir(project_dir):
+            with _ProjectLock(project_id):
+                store = _SegmentStore(project_id)
+                manifest = store.read_manifest() or {}
+                if os.path.exists(store.manifest_path):
+                    os.remove(store.manifest_path)
+                for name in [entry["name"] for entry in manifest.get("segments", [])] + manifest.get("retired", []):
+                    store.remove_segment_files(name)
+            shutil.rmtree(project_dir, ignore_errors=True)
+            _get_cache().invalidate(project_id)
+            deleted = True
+        return deleted
+
+    @staticmethod
+    def preload(project_ids: List[int]) -> int:
+        """Load the indexes of hot projects into the cache ahead of the first query. Returns how many were loaded."""
+        if not _HAS_BM25:
+            return 0
+        loaded = 0
+        for project_id in project_ids or []:
+            if _load_project(project_id) is not None:
+                loaded += 1
+        return loaded
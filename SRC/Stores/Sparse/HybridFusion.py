@@ -0,0 +1,49 @@
+"""
+Rank fusion of the dense and sparse candidate lists of a hybrid query.
+Both legs are unioned on chunk_id (a chunk found by only one leg keeps its share of the score)
+and fused over NumPy arrays with either reciprocal rank fusion or a min-max normalized
+weighted sum.
+"""
+from typing import List, Tuple
+
+import numpy as np
+
+from .SparseEnums import HybridFusionEnums
+
+
+def _min_max(scores: np.ndarray) -> np.ndarray:
+    if scores.shape[0] == 0:
+        return scores
+    low, high = scores.min(), scores.max()
+    if high - low <= 0:
+        return np.ones_like(scores)
+    return (scores - low) / (high - low)
+
+
+def fuse_rankings(dense_ids: List[int], dense_scores: List[float],
+                  sparse_ids: List[int], sparse_scores: List[float],
+                  limit: int, method: str = HybridFusionEnums.RRF.value,
+                  alpha: float = 0.6, rrf_k: int = 60) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Fuse two ranked lists (best first) into the top `limit` (chunk_ids, scores).
+    RRF: sum of 1 / (rrf_k + rank). WEIGHTED: alpha * dense + (1 - alpha) * sparse, each min-max normalized.
+    """
+    dense_ids = np.asarray(dense_ids, dtype=np.int64)
+    sparse_ids = np.asarray(sparse_ids, dtype=np.int64)
+    ids = np.union1d(dense_ids, sparse_ids)
+    if ids.shape[0] == 0:
+        return ids, np.zeros(0, dtype=np.float64)
+
+    dense_pos = np.searchsorted(ids, dense_ids)
+    sparse_pos = np.searchsorted(ids, sparse_ids)
+    fused = np.zeros(ids.shape[0], dtype=np.float64)
+
+    if method == HybridFusionEnums.WEIGHTED.value:
+        fused[dense_pos] += alpha * _min_max(np.asarray(dense_scores, dtype=np.float64))
+        fused[sparse_pos] += (1.0 - alpha) * _min_max(np.asarray(sparse_scores, dtype=np.float64))
+    else:
+        fused[dense_pos] += 1.0 / (rrf_k + np.arange(1, dense_ids.shape[0] + 1))
+        fused[sparse_pos] += 1.0 / (rrf_k + np.arange(1, sparse_ids.shape[0] + 1))
+
+    order = np.argsort(-fused, kind="stable")[:limit]
+    return ids[order], fused[order]
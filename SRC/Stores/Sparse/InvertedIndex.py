@@ -0,0 +1,347 @@
+"""
+In-memory BM25 inverted index made of append-only segments.
+Each segment holds a term dictionary and CSR postings (doc-sorted, term frequencies) in NumPy
+arrays, plus a live mask used as tombstones for deleted chunk ids. Global statistics (N, total
+document length) are maintained incrementally on add/delete; document frequencies are summed
+over the live postings of the query terms. Queries only touch the postings of their terms and
+use MaxScore pruning to stop admitting new documents once the remaining terms can no longer
+lift one into the top-k.
+"""
+import copy
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+def _max_score_top_k(term_postings: List[Tuple[np.ndarray, np.ndarray, float]], top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    term_postings: one (doc keys sorted ascending, impacts, upper bound) tuple per query term.
+    Returns (doc keys, scores) of the top_k documents, best first.
+    """
+    empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32))
+    if not term_postings or top_k <= 0:
+        return empty
+
+    # highest upper bound first: the lists that can add the most are merged while new docs still qualify
+    term_postings = sorted(term_postings, key=lambda posting: -posting[2])
+    upper_bounds = np.asarray([posting[2] for posting in term_postings], dtype=np.float64)
+    # remaining[i]: the most terms after i can still add to any document
+    remaining = np.concatenate((np.cumsum(upper_bounds[::-1])[::-1][1:], [0.0]))
+
+    def kth_score(scores: np.ndarray) -> float:
+        if len(scores) < top_k:
+            return 0.0
+        return float(np.partition(scores, len(scores) - top_k)[len(scores) - top_k])
+
+    cand_docs, cand_scores = empty
+    for i, (docs, impacts, upper_bound) in enumerate(term_postings):
+        threshold = kth_score(cand_scores)
+
+        if remaining[i] + upper_bound > threshold or len(cand_docs) < top_k:
+            # essential term: union its postings into the candidates
+            cand_docs, inverse = np.unique(np.concatenate((cand_docs, docs)), return_inverse=True)
+            cand_scores = np.bincount(inverse, weights=np.concatenate((cand_scores, impacts)),
+                                      minlength=len(cand_docs)).astype(np.float32)
+        elif len(cand_docs) and len(docs):
+            # non-essential term: only look up the candidates in its (doc-sorted) postings
+            positions = np.searchsorted(docs, cand_docs)
+            positions[positions >= len(docs)] = 0
+            hit = docs[positions] == cand_docs
+            cand_scores[hit] += impacts[positions[hit]]
+
+        threshold = kth_score(cand_scores)
+        if len(cand_docs) > top_k and threshold > 0:
+            keep = cand_scores + remaining[i] >= threshold
+            cand_docs, cand_scores = cand_docs[keep], cand_scores[keep]
+
+    positive = cand_scores > 0
+    cand_docs, cand_scores = cand_docs[positive], cand_scores[positive]
+    if not len(cand_docs):
+        return empty
+
+    k = min(top_k, len(cand_docs))
+    top = np.argpartition(-cand_scores, k - 1)[:k]
+    top = top[np.argsort(-cand_scores[top], kind="stable")]
+    return cand_docs[top], cand_scores[top]
+
+
+class MappedTermTable:
+    """
+    Sorted term dictionary read straight from a memory-mapped segment: a UTF-8 blob plus offsets.
+    Lookups binary-search the blob, so opening a segment never builds a Python dict.
+    """
+
+    def __init__(self, offsets: np.ndarray, blob: np.ndarray):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def _key(self, term_id: int) -> bytes:
+        return self.blob[self.offsets[term_id]:self.offsets[term_id + 1]].tobytes()
+
+    def __iter__(self):
+        for term_id in range(len(self)):
+            yield self._key(term_id).decode("utf-8")
+
+    def get(self, term: str, default=None) -> Optional[int]:
+        key = term.encode("utf-8")
+        low, high = 0, len(self)
+        while low < high:
+            mid = (low + high) // 2
+            if self._key(mid) < key:
+                low = mid + 1
+            else:
+                high = mid
+        if low < len(self) and self._key(low) == key:
+            return low
+        return default
+
+
+class IndexSegment:
+    """
+    Immutable postings for one batch of documents (sorted by chunk id, terms sorted) and a mutable live mask.
+    The arrays may be memory-mapped views of a segment file (see SegmentFormat); they are never written to.
+    """
+
+    def __init__(self, vocabulary, indptr: np.ndarray, postings_docs: np.ndarray,
+                 postings_tf: np.ndarray, doc_len: np.ndarray, chunk_ids: np.ndarray,
+                 term_max_tf: np.ndarray, term_min_len: np.ndarray, live: Optional[np.ndarray] = None):
+        self.vocabulary = vocabulary
+        self.mapped = isinstance(vocabulary, MappedTermTable)
+        self.terms = vocabulary if self.mapped else {term: term_id for term_id, term in enumerate(vocabulary)}
+        self.indptr = indptr
+        self.postings_docs = postings_docs
+        self.postings_tf = postings_tf
+        self.doc_len = doc_len
+        self.chunk_ids = chunk_ids
+        self.term_max_tf = term_max_tf
+        self.term_min_len = term_min_len
+        self.live = live if live is not None else np.ones(len(chunk_ids), dtype=bool)
+
+    @classmethod
+    def from_postings(cls, vocabulary: List[str], posting_terms: np.ndarray, posting_chunk_ids: np.ndarray,
+                      posting_tfs: np.ndarray, doc_chunk_ids: np.ndarray, doc_len: np.ndarray) -> "IndexSegment":
+        """Build from flat (term id, chunk id, tf) postings; unused vocabulary entries are dropped and terms sorted."""
+        doc_order = np.argsort(doc_chunk_ids, kind="stable")
+        doc_chunk_ids = np.asarray(doc_chunk_ids, dtype=np.int64)[doc_order]
+        doc_len = np.asarray(doc_len, dtype=np.int32)[doc_order]
+        posting_docs = np.searchsorted(doc_chunk_ids, posting_chunk_ids).astype(np.int32)
+
+        df = np.bincount(posting_terms, minlength=len(vocabulary))
+        used = np.flatnonzero(df > 0)
+        # sorted term ids let a memory-mapped term table be binary searched
+        sorted_terms = sorted(used.tolist(), key=vocabulary.__getitem__)
+        new_term_ids = np.zeros(len(vocabulary), dtype=np.int64)
+        new_term_ids[sorted_terms] = np.arange(len(sorted_terms))
+        posting_terms = new_term_ids[posting_terms]
+        vocabulary = [vocabulary[term_id] for term_id in sorted_terms]
+        df = df[sorted_terms]
+
+        # group postings by term, doc ids ascending inside each list
+        order = np.lexsort((posting_docs, posting_terms))
+        posting_docs = posting_docs[order]
+        posting_tfs = np.asarray(posting_tfs, dtype=np.int32)[order]
+        indptr = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(df, out=indptr[1:])
+
+        starts = indptr[:-1]
+        term_max_tf = np.maximum.reduceat(posting_tfs, starts) if len(vocabulary) else np.zeros(0, dtype=np.int32)
+        term_min_len = np.minimum.reduceat(doc_len[posting_docs], starts) if len(vocabulary) else np.zeros(0, dtype=np.int32)
+
+        return cls(vocabulary=vocabulary, indptr=indptr, postings_docs=posting_docs, postings_tf=posting_tfs,
+                   doc_len=doc_len, chunk_ids=doc_chunk_ids,
+                   term_max_tf=term_max_tf.astype(np.int32), term_min_len=term_min_len.astype(np.int32))
+
+    @classmethod
+    def from_term_freqs(cls, chunk_ids: List[int], doc_term_freqs: Iterable[Dict[str, int]]) -> "IndexSegment":
+        """Build from one {term: frequency} mapping per document, in chunk_ids order."""
+        terms: Dict[str, int] = {}
+        posting_terms, posting_chunk_ids, posting_tfs, doc_len = [], [], [], []
+        for chunk_id, term_freqs in zip(chunk_ids, doc_term_freqs):
+            doc_len.append(sum(term_freqs.values()))
+            for term, tf in term_freqs.items():
+                posting_terms.append(terms.setdefault(term, len(terms)))
+                posting_chunk_ids.append(chunk_id)
+                posting_tfs.append(tf)
+
+        return cls.from_postings(vocabulary=list(terms),
+                                 posting_terms=np.asarray(posting_terms, dtype=np.int64),
+                                 posting_chunk_ids=np.asarray(posting_chunk_ids, dtype=np.int64),
+                                 posting_tfs=np.asarray(posting_tfs, dtype=np.int32),
+                                 doc_chunk_ids=np.asarray(chunk_ids, dtype=np.int64),
+                                 doc_len=np.asarray(doc_len, dtype=np.int32))
+
+    @classmethod
+    def merge(cls, segments: List["IndexSegment"]) -> "IndexSegment":
+        """One segment holding the live documents of all given segments."""
+        terms: Dict[str, int] = {}
+        posting_terms, posting_chunk_ids, posting_tfs, doc_chunk_ids, doc_len = [], [], [], [], []
+        for seg in segments:
+            term_map = np.asarray([terms.setdefault(term, len(terms)) for term in seg.vocabulary], dtype=np.int64)
+            seg_terms = np.repeat(np.arange(len(seg.vocabulary)), np.diff(seg.indptr))
+            live_postings = seg.live[seg.postings_docs]
+            posting_terms.append(term_map[seg_terms[live_postings]] if len(term_map) else seg_terms[live_postings])
+            posting_chunk_ids.append(seg.chunk_ids[seg.postings_docs[live_postings]])
+            posting_tfs.append(seg.postings_tf[live_postings])
+            doc_chunk_ids.append(seg.chunk_ids[seg.live])
+            doc_len.append(seg.doc_len[seg.live])
+
+        return cls.from_postings(vocabulary=list(terms),
+                                 posting_terms=np.concatenate(posting_terms).astype(np.int64),
+                                 posting_chunk_ids=np.concatenate(posting_chunk_ids),
+                                 posting_tfs=np.concatenate(posting_tfs),
+                                 doc_chunk_ids=np.concatenate(doc_chunk_ids),
+                                 doc_len=np.concatenate(doc_len))
+
+    @property
+    def live_count(self) -> int:
+        return int(self.live.sum())
+
+    @property
+    def nbytes(self) -> int:
+        if self.mapped:
+            # postings live in the page cache, shared by every worker process
+            return int(self.live.nbytes)
+        arrays = (self.indptr, self.postings_docs, self.postings_tf, self.doc_len, self.chunk_ids,
+                  self.term_max_tf, self.term_min_len, self.live)
+        return int(sum(array.nbytes for array in arrays)) + 64 * len(self.vocabulary)
+
+    def find(self, chunk_ids: np.ndarray) -> np.ndarray:
+        """Local doc ids of the live documents among chunk_ids (chunk ids are sorted, so this is a binary search)."""
+        if not len(self.chunk_ids) or not len(chunk_ids):
+            return np.zeros(0, dtype=np.int64)
+        positions = np.searchsorted(self.chunk_ids, chunk_ids)
+        positions[positions >= len(self.chunk_ids)] = 0
+        found = positions[self.chunk_ids[positions] == chunk_ids]
+        return found[self.live[found]]
+
+    def with_live(self, live: np.ndarray) -> "IndexSegment":
+        """Shallow copy sharing the postings with a different live mask; readers of the original are unaffected."""
+        seg = copy.copy(self)
+        seg.live = live
+        return seg
+
+    def with_deleted(self, doc_ids: np.ndarray) -> "IndexSegment":
+        live = self.live.copy()
+        live[doc_ids] = False
+        return self.with_live(live)
+
+    def term_postings(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, int, int]]:
+        """(chunk ids, tf, doc length) of the live postings of term, plus its max tf and min doc length bounds."""
+        term_id = self.terms.get(term)
+        if term_id is None:
+            return None
+        start, end = self.indptr[term_id], self.indptr[term_id + 1]
+        docs = self.postings_docs[start:end]
+        live = self.live[docs]
+        docs = docs[live]
+        if not len(docs):
+            return None
+        return (self.chunk_ids[docs], self.postings_tf[start:end][live], self.doc_len[docs],
+                int(self.term_max_tf[term_id]), int(self.term_min_len[term_id]))
+
+
+class InvertedIndex:
+    """A project's BM25 index: a list of segments plus the global statistics BM25 needs."""
+
+    def __init__(self, segments: List[IndexSegment] = None, n_docs: int = None, total_len: int = None,
+                 k1: float = 1.5, b: float = 0.75):
+        self.segments = list(segments or [])
+        self.n_docs = n_docs if n_docs is not None else sum(seg.live_count for seg in self.segments)
+        self.total_len = total_len if total_len is not None else \
+            int(sum(int(seg.doc_len[seg.live].sum()) for seg in self.segments))
+        self.k1 = k1
+        self.b = b
+
+    @classmethod
+    def from_term_freqs(cls, chunk_ids: List[int], doc_term_freqs: Iterable[Dict[str, int]],
+                        k1: float = 1.5, b: float = 0.75) -> "InvertedIndex":
+        return cls([IndexSegment.from_term_freqs(chunk_ids, doc_term_freqs)], k1=k1, b=b)
+
+    @classmethod
+    def build(cls, chunk_ids: List[int], corpus_tokens: List[List[str]], k1: float = 1.5, b: float = 0.75):
+        return cls.from_term_freqs(chunk_ids, (Counter(tokens) for tokens in corpus_tokens), k1=k1, b=b)
+
+    def __len__(self) -> int:
+        return self.n_docs
+
+    @property
+    def nbytes(self) -> int:
+        return sum(seg.nbytes for seg in self.segments)
+
+    def _derive(self, segments: List[IndexSegment], n_docs: int, total_len: int) -> "InvertedIndex":
+        return InvertedIndex(segments, n_docs=n_docs, total_len=total_len, k1=self.k1, b=self.b)
+
+    def missing(self, chunk_ids: List[int]) -> List[int]:
+        """The chunk ids that are not live in the index yet."""
+        ids = np.asarray(chunk_ids, dtype=np.int64)
+        present = np.zeros(len(ids), dtype=bool)
+        for seg in self.segments:
+            present |= np.isin(ids, seg.chunk_ids[seg.find(ids)])
+        return [int(chunk_id) for chunk_id in ids[~present]]
+
+    def add_segment(self, segment: IndexSegment) -> "InvertedIndex":
+        """New index with segment appended; cost is proportional to the segment, not the index."""
+        return self._derive(self.segments + [segment],
+                            n_docs=self.n_docs + segment.live_count,
+                            total_len=self.total_len + int(segment.doc_len[segment.live].sum()))
+
+    def delete(self, chunk_ids: List[int]) -> Tuple["InvertedIndex", List[int]]:
+        """New index with chunk_ids tombstoned, and the positions of the segments that changed."""
+        ids = np.asarray(sorted(set(chunk_ids)), dtype=np.int64)
+        segments, changed = list(self.segments), []
+        n_docs, total_len = self.n_docs, self.total_len
+        for position, seg in enumerate(self.segments):
+            doc_ids = seg.find(ids)
+            if not len(doc_ids):
+                continue
+            segments[position] = seg.with_deleted(doc_ids)
+            n_docs -= len(doc_ids)
+            total_len -= int(seg.doc_len[doc_ids].sum())
+            changed.append(position)
+        return self._derive(segments, n_docs=n_docs, total_len=total_len), changed
+
+    def replace_segments(self, positions: List[int], merged: IndexSegment) -> "InvertedIndex":
+        """New index with the segments at positions replaced by merged (placed where the first one was)."""
+        positions = set(positions)
+        segments = []
+        for position, seg in enumerate(self.segments):
+            if position == min(positions):
+                segments.append(merged)
+            elif position not in positions:
+                segments.append(seg)
+        return self._derive(segments, n_docs=self.n_docs, total_len=self.total_len)
+
+    def search(self, query_tokens: List[str], top_k: int = 10) -> List[Tuple[int, float]]:
+        if not self.n_docs or top_k <= 0:
+            return []
+        avgdl = self.total_len / self.n_docs if self.total_len else 1.0
+        k1, b = self.k1, self.b
+
+        term_postings = []
+        for term, query_tf in Counter(query_tokens).items():
+            parts = [postings for postings in (seg.term_postings(term) for seg in self.segments) if postings]
+            if not parts:
+                continue
+            docs = np.concatenate([part[0] for part in parts])
+            tf = np.concatenate([part[1] for part in parts]).astype(np.float32)
+            doc_len = np.concatenate([part[2] for part in parts]).astype(np.float32)
+            if len(parts) > 1:
+                order = np.argsort(docs, kind="stable")
+                docs, tf, doc_len = docs[order], tf[order], doc_len[order]
+
+            # Lucene-style IDF: always positive, so terms present in most documents still count a little
+            df = len(docs)
+            idf = float(np.log1p((self.n_docs - df + 0.5) / (df + 0.5))) * query_tf
+            impacts = (idf * tf * (k1 + 1.0) / (tf + k1 * (1.0 - b + b * doc_len / avgdl))).astype(np.float32)
+
+            # the BM25 term score grows with tf and shrinks with doc length: bound it per segment
+            upper_bound = max(idf * max_tf * (k1 + 1.0) / (max_tf + k1 * (1.0 - b + b * min_len / avgdl))
+                              for _, _, _, max_tf, min_len in parts)
+            term_postings.append((docs, impacts, upper_bound))
+
+        docs, scores = _max_score_top_k(term_postings, top_k)
+        return [(int(doc), float(score)) for doc, score in zip(docs, scores)]
@@ -0,0 +1,104 @@
+"""
+Columnar on-disk format of one BM25 index segment, opened with np.memmap so every worker
+process shares the same pages through the OS page cache (zero-copy, nothing unpickled).
+
+Layout (little endian, every section 8-byte aligned):
+    header        8 x uint64: magic, version, n_terms, n_docs, n_postings, term blob bytes, 0, 0
+    indptr        int64[n_terms + 1]   postings range of each term
+    term_offsets  int64[n_terms + 1]   range of each term in the term blob
+    chunk_ids     int64[n_docs]        sorted
+    postings_docs int32[n_postings]    local doc ids, ascending inside each term
+    postings_tf   int32[n_postings]
+    doc_len       int32[n_docs]
+    term_max_tf   int32[n_terms]
+    term_min_len  int32[n_terms]
+    term_blob     uint8[...]           UTF-8 terms, sorted
+Files are written to a temporary name and renamed into place, so readers never see a partial segment.
+"""
+import os
+from typing import List, Tuple
+
+import numpy as np
+
+from .InvertedIndex import IndexSegment, MappedTermTable
+
+SEGMENT_MAGIC = int.from_bytes(b"BM25SEG1", "little")
+SEGMENT_VERSION = 1
+HEADER_FIELDS = 8
+
+_SECTIONS = (
+    ("indptr", "<i8"),
+    ("term_offsets", "<i8"),
+    ("chunk_ids", "<i8"),
+    ("postings_docs", "<i4"),
+    ("postings_tf", "<i4"),
+    ("doc_len", "<i4"),
+    ("term_max_tf", "<i4"),
+    ("term_min_len", "<i4"),
+    ("term_blob", "u1"),
+)
+
+
+def _section_lengths(n_terms: int, n_docs: int, n_postings: int, blob_len: int) -> dict:
+    return {
+        "indptr": n_terms + 1, "term_offsets": n_terms + 1, "chunk_ids": n_docs,
+        "postings_docs": n_postings, "postings_tf": n_postings, "doc_len": n_docs,
+        "term_max_tf": n_terms, "term_min_len": n_terms, "term_blob": blob_len,
+    }
+
+
+def _layout(lengths: dict) -> List[Tuple[str, str, int, int]]:
+    """(name, dtype, byte offset, length) of each section."""
+    offset = HEADER_FIELDS * 8
+    layout = []
+    for name, dtype in _SECTIONS:
+        layout.append((name, dtype, offset, lengths[name]))
+        offset += lengths[name] * np.dtype(dtype).itemsize
+        offset += -offset % 8
+    return layout
+
+
+def write_segment(path: str, segment: IndexSegment):
+    encoded = [term.encode("utf-8") for term in segment.vocabulary]
+    term_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(term) for term in encoded], out=term_offsets[1:])
+    blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+    arrays = {
+        "indptr": segment.indptr, "term_offsets": term_offsets, "chunk_ids": segment.chunk_ids,
+        "postings_docs": segment.postings_docs, "postings_tf": segment.postings_tf, "doc_len": segment.doc_len,
+        "term_max_tf": segment.term_max_tf, "term_min_len": segment.term_min_len, "term_blob": blob,
+    }
+    lengths = _section_lengths(len(encoded), len(segment.chunk_ids), len(segment.postings_docs), len(blob))
+    header = np.array([SEGMENT_MAGIC, SEGMENT_VERSION, len(encoded), len(segment.chunk_ids),
+                       len(segment.postings_docs), len(blob), 0, 0], dtype="<u8")
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header.tobytes())
+        for name, dtype, offset, _ in _layout(lengths):
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(np.ascontiguousarray(arrays[name], dtype=dtype).tobytes())
+        f.write(b"\0" * (-f.tell() % 8))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def open_segment(path: str, live: np.ndarray = None) -> IndexSegment:
+    data = np.memmap(path, dtype=np.uint8, mode="r")
+    header = data[:HEADER_FIELDS * 8].view("<u8")
+    if int(header[0]) != SEGMENT_MAGIC or int(header[1]) != SEGMENT_VERSION:
+        raise ValueError(f"Not a BM25 segment file: {path}")
+
+    lengths = _section_lengths(int(header[2]), int(header[3]), int(header[4]), int(header[5]))
+    sections = {
+        name: data[offset:offset + length * np.dtype(dtype).itemsize].view(dtype)
+        for name, dtype, offset, length in _layout(lengths)
+    }
+    return IndexSegment(
+        vocabulary=MappedTermTable(sections["term_offsets"], sections["term_blob"]),
+        indptr=sections["indptr"], postings_docs=sections["postings_docs"], postings_tf=sections["postings_tf"],
+        doc_len=sections["doc_len"], chunk_ids=sections["chunk_ids"],
+        term_max_tf=sections["term_max_tf"], term_min_len=sections["term_min_len"], live=live,
+    )
@@ -0,0 +1,48 @@
+"""
+Sparse (term -> weight) vectors for vector databases with native sparse search (Qdrant).
+Terms are the BM25 analyzer's lemmas, hashed into a 31-bit index space so no vocabulary has to
+be stored. Documents carry BM25 term-frequency saturation; the IDF part is applied by the
+server (Qdrant Modifier.IDF), so indexed vectors stay valid as the collection grows.
+"""
+import zlib
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from Utils.NLPPreprocess import analyze
+
+
+def term_hash(term: str) -> int:
+    return zlib.crc32(term.encode("utf-8")) & 0x7fffffff
+
+
+class SparseEncoder:
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, avg_doc_len: float = 256):
+        self.k1 = k1
+        self.b = b
+        self.avg_doc_len = avg_doc_len
+
+    @staticmethod
+    def _terms(text: str) -> List[str]:
+        return analyze(text or "")
+
+    @staticmethod
+    def _hashed(weights: Dict[str, float]) -> Tuple[List[int], List[float]]:
+        # hash collisions are summed: sparse vectors need unique indices
+        hashed: Dict[int, float] = {}
+        for term, weight in weights.items():
+            index = term_hash(term)
+            hashed[index] = hashed.get(index, 0.0) + weight
+        indices = sorted(hashed)
+        return indices, [hashed[index] for index in indices]
+
+    def encode_document(self, text: str) -> Tuple[List[int], List[float]]:
+        terms = self._terms(text)
+        if not terms:
+            return [], []
+        norm = self.k1 * (1.0 - self.b + self.b * len(terms) / self.avg_doc_len)
+        weights = {term: tf * (self.k1 + 1.0) / (tf + norm) for term, tf in Counter(terms).items()}
+        return self._hashed(weights)
+
+    def encode_query(self, text: str) -> Tuple[List[int], List[float]]:
+        return self._hashed({term: float(tf) for term, tf in Counter(self._terms(text)).items()})
@@ -0,0 +1,13 @@
+from enum import Enum
+
+class SparseBackendEnums (Enum) :
+
+    BM25 = "BM25"
+    POSTGRES = "POSTGRES"
+    QDRANT = "QDRANT"
+
+
+class HybridFusionEnums (Enum) :
+
+    RRF = "RRF"
+    WEIGHTED = "WEIGHTED"
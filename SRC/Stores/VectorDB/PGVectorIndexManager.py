@@ -0,0 +1,96 @@
+from .VectorDBEnums import PgvectorIndexTypeEnums
+from dataclasses import dataclass, asdict
+from typing import Optional
+import json
+import math
+
+
+@dataclass
+class IndexPlan :
+    index_type : str
+    row_count : int
+    lists : Optional[int] = None
+    probes : Optional[int] = None
+    m : Optional[int] = None
+    ef_construction : Optional[int] = None
+    ef_search : Optional[int] = None
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def from_json(cls, value: str):
+        try:
+            data = json.loads(value)
+        except (TypeError, ValueError):
+            return None
+        if not isinstance(data, dict) or "index_type" not in data:
+            return None
+        return cls(**{k: data.get(k) for k in cls.__dataclass_fields__})
+
+    def with_options_sql(self) -> str:
+        if self.index_type == PgvectorIndexTypeEnums.HNSW.value:
+            return f" WITH (m = {int(self.m)}, ef_construction = {int(self.ef_construction)})"
+        if self.index_type == PgvectorIndexTypeEnums.IVFFLAT.value:
+            return f" WITH (lists = {int(self.lists)})"
+        return ""
+
+
+class PGVectorIndexManager :
+    """
+    Pick the pgvector index type and its parameters for a collection from its row count.
+    HNSW is used while its estimated build time fits the budget, IVFFlat beyond that
+    (lists ~ rows/1000 up to 1M rows, sqrt(rows) above; probes ~ sqrt(lists)).
+    A plan is rebuilt once the collection grows past drift_factor x the rows it was built on.
+    """
+
+    IVFFLAT_SQRT_ROWS_FROM = 1_000_000
+
+    def __init__(self, hnsw_m: int = 16, hnsw_ef_construction: int = 64, hnsw_ef_search: int = 40,
+                 build_time_budget_seconds: float = 300, hnsw_build_rows_per_second: float = 2000,
+                 drift_factor: float = 10.0, forced_index_type: str = None):
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construction = hnsw_ef_construction
+        self.hnsw_ef_search = hnsw_ef_search
+        self.build_time_budget_seconds = build_time_budget_seconds
+        self.hnsw_build_rows_per_second = hnsw_build_rows_per_second
+        self.drift_factor = drift_factor
+        self.forced_index_type = forced_index_type or None
+
+    def estimate_hnsw_build_seconds(self, row_count: int) -> float:
+        if not self.hnsw_build_rows_per_second:
+            return 0.0
+        return row_count / self.hnsw_build_rows_per_second
+
+    def choose_index_type(self, row_count: int) -> str:
+        if self.forced_index_type:
+            return self.forced_index_type
+        if self.estimate_hnsw_build_seconds(row_count) <= self.build_time_budget_seconds:
+            return PgvectorIndexTypeEnums.HNSW.value
+        return PgvectorIndexTypeEnums.IVFFLAT.value
+
+    def ivfflat_lists(self, row_count: int) -> int:
+        if row_count <= self.IVFFLAT_SQRT_ROWS_FROM:
+            return max(1, row_count // 1000)
+        return max(1, int(math.sqrt(row_count)))
+
+    def ivfflat_probes(self, lists: int) -> int:
+        return max(1, int(round(math.sqrt(lists))))
+
+    def plan(self, row_count: int, index_type: str = None) -> IndexPlan:
+        index_type = index_type or self.choose_index_type(row_count)
+
+        if index_type == PgvectorIndexTypeEnums.IVFFLAT.value:
+            lists = self.ivfflat_lists(row_count)
+            return IndexPlan(index_type=index_type, row_count=row_count,
+                             lists=lists, probes=self.ivfflat_probes(lists))
+
+        return IndexPlan(index_type=index_type, row_count=row_count,
+                         m=self.hnsw_m, ef_construction=self.hnsw_ef_construction,
+                         ef_search=self.hnsw_ef_search)
+
+    def needs_rebuild(self, plan: IndexPlan, row_count: int) -> bool:
+        if plan is None or not self.drift_factor or self.drift_factor <= 1:
+            return False
+        built_on = max(plan.row_count or 0, 1)
+        return row_count >= built_on * self.drift_factor
@@ -0,0 +1,90 @@
+from sqlalchemy.sql import text as sql_text
+from typing import Optional
+
+
+class PGVectorStatsStore :
+    """
+    Collection statistics that never scan the vector tables.
+    Exact row counters live in a small side table and are updated inside the same
+    transaction as the inserts/deletes they count; approximate counts and sizes come
+    from the catalog (pg_class.reltuples, pg_stat_user_tables).
+    """
+
+    def __init__(self, table_name: str = "pgvector_collection_stats"):
+        self.table_name = table_name
+
+    async def create_table(self, session):
+        await session.execute(sql_text(
+            f'CREATE TABLE IF NOT EXISTS {self.table_name} ('
+            f'collection_name text PRIMARY KEY, '
+            f'row_count bigint NOT NULL DEFAULT 0, '
+            f'updated_at timestamptz NOT NULL DEFAULT now()'
+            f')'
+        ))
+
+    async def init_counter(self, session, collection_name: str):
+        await session.execute(sql_text(
+            f'INSERT INTO {self.table_name} (collection_name, row_count) VALUES (:collection_name, 0) '
+            f'ON CONFLICT (collection_name) DO UPDATE SET row_count = 0, updated_at = now()'
+        ), {"collection_name": collection_name})
+
+    async def drop_counter(self, session, collection_name: str):
+        await session.execute(sql_text(f'DELETE FROM {self.table_name} WHERE collection_name = :collection_name'),
+                              {"collection_name": collection_name})
+
+    async def increment(self, session, collection_name: str, delta: int):
+        """Apply delta to the counter; a collection without a counter is left to seed_counter."""
+        if not delta:
+            return
+        await session.execute(sql_text(
+            f'UPDATE {self.table_name} SET row_count = GREATEST(row_count + :delta, 0), updated_at = now() '
+            f'WHERE collection_name = :collection_name'
+        ), {"collection_name": collection_name, "delta": int(delta)})
+
+    async def get_exact_count(self, session, collection_name: str) -> Optional[int]:
+        result = await session.execute(sql_text(
+            f'SELECT row_count FROM {self.table_name} WHERE collection_name = :collection_name'
+        ), {"collection_name": collection_name})
+        return result.scalar_one_or_none()
+
+    async def seed_counter(self, session, collection_name: str) -> int:
+        """
+        One-off exact count for collections created before counters existed.
+        Blocks writers on the collection for the duration of the transaction, so only call it off the request path.
+        """
+        await session.execute(sql_text(f'LOCK TABLE {collection_name} IN SHARE MODE'))
+        result = await session.execute(sql_text(
+            f'INSERT INTO {self.table_name} (collection_name, row_count) '
+            f'SELECT :collection_name, COUNT(*) FROM {collection_name} '
+            f'ON CONFLICT (collection_name) DO UPDATE SET row_count = EXCLUDED.row_count, updated_at = now() '
+            f'RETURNING row_count'
+        ), {"collection_name": collection_name})
+        return result.scalar_one()
+
+    async def get_table_stats(self, session, relation_name: str) -> Optional[dict]:
+        result = await session.execute(sql_text('''SELECT c.reltuples::bigint AS reltuples,
+                s.n_live_tup, s.n_dead_tup,
+                pg_table_size(c.oid) AS table_size,
+                pg_indexes_size(c.oid) AS index_size,
+                pg_total_relation_size(c.oid) AS total_size,
+                s.last_autovacuum, s.last_autoanalyze
+            FROM pg_class c
+            LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+            WHERE c.oid = to_regclass(:relation_name)
+        '''), {"relation_name": relation_name})
+        record = result.fetchone()
+        if record is None:
+            return None
+
+        # reltuples is -1 until the table has been vacuumed/analyzed once
+        approximate_count = record.reltuples if record.reltuples is not None and record.reltuples >= 0 else record.n_live_tup
+        return {
+            "approximate_count": approximate_count,
+            "live_tuples": record.n_live_tup,
+            "dead_tuples": record.n_dead_tup,
+            "table_size_bytes": record.table_size,
+            "index_size_bytes": record.index_size,
+            "total_size_bytes": record.total_size,
+            "last_autovacuum": record.last_autovacuum.isoformat() if record.last_autovacuum else None,
+            "last_autoanalyze": record.last_autoanalyze.isoformat() if record.last_autoanalyze else None,
+        }
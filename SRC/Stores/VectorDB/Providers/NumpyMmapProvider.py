@@ -0,0 +1,440 @@
+from ..VectorDBInterface import VectorDBInterface
+from ..VectorDBEnums import DistanceMethodEnums, NumpyVectorDTypeEnums
+from Models.DB_Schemes import RetrivedDocument
+from typing import List, Dict, Optional
+import numpy as np
+import logging
+import asyncio
+import shutil
+import json
+import os
+
+try:
+    import fcntl
+except ImportError:  # non-POSIX: single process only
+    fcntl = None
+
+
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _popcount_rows(bits: np.ndarray) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(bits).sum(axis=1, dtype=np.int32)
+    return _POPCOUNT_TABLE[bits].sum(axis=1, dtype=np.int32)
+
+
+def _write_npy_atomic(path: str, array: np.ndarray):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def _write_text_atomic(path: str, content: str):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+class _Segment:
+    """One immutable block of rows: vectors (mmap), chunk ids, optional sign bits, payload sidecar and a live mask."""
+
+    def __init__(self, collection_dir: str, name: str):
+        self.name = name
+        self.base_path = os.path.join(collection_dir, name)
+        self.vectors = np.load(f"{self.base_path}.vectors.npy", mmap_mode="r")
+        self.ids = np.load(f"{self.base_path}.ids.npy")
+        bits_path = f"{self.base_path}.bits.npy"
+        self.bits = np.load(bits_path, mmap_mode="r") if os.path.exists(bits_path) else None
+        self.live = np.load(f"{self.base_path}.live.npy").copy()
+        self._payloads = None
+
+    @property
+    def count(self) -> int:
+        return int(self.ids.shape[0])
+
+    def payloads(self) -> list:
+        if self._payloads is None:
+            with open(f"{self.base_path}.meta.jsonl", "r", encoding="utf-8") as f:
+                self._payloads = [json.loads(line) for line in f]
+        return self._payloads
+
+    def save_live(self):
+        _write_npy_atomic(f"{self.base_path}.live.npy", self.live)
+
+    @staticmethod
+    def write(collection_dir: str, name: str, vectors: np.ndarray, ids: np.ndarray, payloads: list, with_bits: bool):
+        base_path = os.path.join(collection_dir, name)
+        with open(f"{base_path}.meta.jsonl.tmp", "w", encoding="utf-8") as f:
+            for payload in payloads:
+                f.write(json.dumps(payload, ensure_ascii=False) + "\n")
+        os.replace(f"{base_path}.meta.jsonl.tmp", f"{base_path}.meta.jsonl")
+        _write_npy_atomic(f"{base_path}.ids.npy", ids.astype(np.int64))
+        _write_npy_atomic(f"{base_path}.live.npy", np.ones(ids.shape[0], dtype=bool))
+        if with_bits:
+            _write_npy_atomic(f"{base_path}.bits.npy", np.packbits(vectors > 0, axis=1))
+        # vectors last: a segment is only listed in the manifest once all of its files exist
+        _write_npy_atomic(f"{base_path}.vectors.npy", vectors)
+
+    @staticmethod
+    def remove_files(collection_dir: str, name: str):
+        base_path = os.path.join(collection_dir, name)
+        for suffix in (".vectors.npy", ".ids.npy", ".bits.npy", ".live.npy", ".meta.jsonl"):
+            path = f"{base_path}{suffix}"
+            if os.path.exists(path):
+                os.remove(path)
+
+
+class _Collection:
+
+    def __init__(self, collection_dir: str):
+        self.collection_dir = collection_dir
+        self.manifest_path = os.path.join(collection_dir, "manifest.json")
+        self.manifest_mtime = None
+        self.manifest = None
+        self.segments: List[_Segment] = []
+        self.reload()
+
+    def reload(self):
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self.manifest_mtime = os.stat(self.manifest_path).st_mtime_ns
+        self.segments = [_Segment(self.collection_dir, name) for name in self.manifest["segments"]]
+
+    def refresh_if_changed(self):
+        """Pick up segments written by other worker processes."""
+        if os.stat(self.manifest_path).st_mtime_ns != self.manifest_mtime:
+            self.reload()
+
+    def save_manifest(self):
+        _write_text_atomic(self.manifest_path, json.dumps(self.manifest))
+        self.manifest_mtime = os.stat(self.manifest_path).st_mtime_ns
+
+    @property
+    def live_count(self) -> int:
+        return int(sum(int(seg.live.sum()) for seg in self.segments))
+
+
+class NumpyMmapProvider(VectorDBInterface):
+    """
+    In-process vector store for small deployments: each collection is a set of append-only
+    segments of memory-mapped float32/float16 NumPy matrices with a chunk id array and a JSONL
+    payload sidecar. Search is a vectorized brute-force scan with argpartition top-k, optionally
+    preceded by a binary-quantized (sign bit / Hamming) prefilter. Deletes flip a per-segment live
+    mask; segments are compacted once there are more than max_segments of them. Compacted segments
+    are kept on disk until the next compaction, as searches running in this or other workers may
+    still read their payloads.
+    """
+
+    INLINE_SEARCH_MAX_ROWS = 50_000
+
+    def __init__(self, db_client: str, distance_method: str = None, default_vector_size: int = 786,
+                 dtype: str = NumpyVectorDTypeEnums.FLOAT32.value, binary_prefilter: bool = False,
+                 prefilter_oversample: int = 10, max_segments: int = 8):
+        self.db_client = db_client
+        self.distance_method = distance_method
+        self.default_vector_size = default_vector_size
+        self.dtype = np.float16 if dtype == NumpyVectorDTypeEnums.FLOAT16.value else np.float32
+        self.binary_prefilter = binary_prefilter
+        self.prefilter_oversample = max(1, prefilter_oversample)
+        self.max_segments = max(1, max_segments)
+
+        self.collections: Dict[str, _Collection] = {}
+        self.write_locks: Dict[str, asyncio.Lock] = {}
+        self.logger = logging.getLogger("uvicorn")
+
+    async def connect(self):
+        os.makedirs(self.db_client, exist_ok=True)
+
+    async def disconnect(self):
+        self.collections.clear()
+
+    def _collection_dir(self, collection_name: str) -> str:
+        return os.path.join(self.db_client, collection_name)
+
+    def _get_collection(self, collection_name: str) -> Optional[_Collection]:
+        collection = self.collections.get(collection_name)
+        if collection is not None:
+            try:
+                collection.refresh_if_changed()
+                return collection
+            except FileNotFoundError:
+                self.collections.pop(collection_name, None)
+                return None
+
+        if not os.path.exists(os.path.join(self._collection_dir(collection_name), "manifest.json")):
+            return None
+        collection = _Collection(self._collection_dir(collection_name))
+        self.collections[collection_name] = collection
+        return collection
+
+    def _write_lock(self, collection_name: str) -> asyncio.Lock:
+        if collection_name not in self.write_locks:
+            self.write_locks[collection_name] = asyncio.Lock()
+        return self.write_locks[collection_name]
+
+    def _file_lock(self, collection_name: str):
+        """Cross-process write lock (other uvicorn workers)."""
+        lock_file = open(os.path.join(self._collection_dir(collection_name), ".lock"), "a")
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return lock_file
+
+    def _prepare_vectors(self, vectors) -> np.ndarray:
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+        if self.distance_method == DistanceMethodEnums.COSINE.value:
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix = matrix / np.where(norms == 0, 1, norms)
+        return matrix
+
+    async def is_collection_exists(self, collection_name: str) -> bool:
+        return self._get_collection(collection_name) is not None
+
+    async def list_all_collections(self) -> List[str]:
+        if not os.path.isdir(self.db_client):
+            return []
+        return sorted(
+            name for name in os.listdir(self.db_client)
+            if os.path.exists(os.path.join(self._collection_dir(name), "manifest.json"))
+        )
+
+    async def get_collection_info(self, collection_name: str) -> dict:
+        collection = self._get_collection(collection_name)
+        if collection is None:
+            return None
+
+        return {
+            "embedding_size": collection.manifest["embedding_size"],
+            "dtype": collection.manifest["dtype"],
+            "distance_method": self.distance_method,
+            "segments_count": len(collection.segments),
+            "record_count": collection.live_count,
+            "stored_rows": int(sum(seg.count for seg in collection.segments)),
+            "binary_prefilter": self.binary_prefilter,
+            "size_bytes": int(sum(
+                os.path.getsize(os.path.join(collection.collection_dir, f))
+                for f in os.listdir(collection.collection_dir)
+            )),
+        }
+
+    async def delete_collection(self, collection_name: str):
+        self.collections.pop(collection_name, None)
+        collection_dir = self._collection_dir(collection_name)
+        if os.path.isdir(collection_dir):
+            self.logger.info(f"Deleting collection: {collection_name}")
+            await asyncio.to_thread(shutil.rmtree, collection_dir, True)
+        return True
+
+    async def create_collection(self, collection_name: str, embedding_size: int, do_reset: bool = False):
+        if do_reset:
+            _ = await self.delete_collection(collection_name=collection_name)
+
+        if await self.is_collection_exists(collection_name):
+            return False
+
+        self.logger.info(f"Creating collection: {collection_name}")
+        collection_dir = self._collection_dir(collection_name)
+        os.makedirs(collection_dir, exist_ok=True)
+        manifest = {
+            "embedding_size": embedding_size,
+            "dtype": np.dtype(self.dtype).name,
+            "segments": [],
+            "next_segment": 1,
+        }
+        _write_text_atomic(os.path.join(collection_dir, "manifest.json"), json.dumps(manifest))
+        return True
+
+    async def insert_one(self, collection_name: str, text: str, vector: list, metadata: dict = None, record_id: str = None):
+        return await self.insert_many(collection_name=collection_name, texts=[text], vectors=[vector],
+                                      metadata=[metadata], record_ids=[record_id])
+
+    async def insert_many(self, collection_name: str, texts: list, vectors: list, metadata: list = None,
+                          record_ids: list = None, batch_size: int = 50):
+        if not await self.is_collection_exists(collection_name):
+            self.logger.info(f"Can not insert records to non existing collection: {collection_name}")
+            return False
+        if not record_ids or len(vectors) != len(record_ids) or len(texts) != len(vectors):
+            self.logger.info(f"Invalid data items for collection: {collection_name}")
+            return False
+        if not metadata:
+            metadata = [None] * len(texts)
+
+        matrix = self._prepare_vectors(vectors).astype(self.dtype)
+        ids = np.asarray(record_ids, dtype=np.int64)
+        payloads = [{"text": t, "metadata": m or {}} for t, m in zip(texts, metadata)]
+
+        async with self._write_lock(collection_name):
+            await asyncio.to_thread(self._append_segment, collection_name, matrix, ids, payloads)
+        return True
+
+    def _append_segment(self, collection_name: str, matrix: np.ndarray, ids: np.ndarray, payloads: list):
+        lock_file = self._file_lock(collection_name)
+        try:
+            collection = self._get_collection(collection_name)
+            if collection is None:
+                return
+
+            # re-inserted chunk ids replace their previous rows
+            for seg in collection.segments:
+                replaced = np.isin(seg.ids, ids) & seg.live
+                if replaced.any():
+                    seg.live[replaced] = False
+                    seg.save_live()
+
+            name = f"seg_{collection.manifest['next_segment']:06d}"
+            _Segment.write(collection.collection_dir, name, matrix, ids, payloads, with_bits=self.binary_prefilter)
+            collection.manifest["segments"].append(name)
+            collection.manifest["next_segment"] += 1
+            collection.save_manifest()
+            collection.segments.append(_Segment(collection.collection_dir, name))
+
+            if len(collection.segments) > self.max_segments:
+                self._compact(collection)
+        finally:
+            lock_file.close()
+
+    def _compact(self, collection: _Collection):
+        """Merge every segment into one, dropping deleted rows."""
+        old_segments = collection.segments
+        vectors, ids, payloads = [], [], []
+        for seg in old_segments:
+            vectors.append(np.asarray(seg.vectors[seg.live]))
+            ids.append(seg.ids[seg.live])
+            seg_payloads = seg.payloads()
+            payloads.extend(seg_payloads[i] for i in np.flatnonzero(seg.live))
+
+        name = f"seg_{collection.manifest['next_segment']:06d}"
+        previously_retired = collection.manifest.get("retired", [])
+        _Segment.write(collection.collection_dir, name,
+                       np.concatenate(vectors).astype(self.dtype) if vectors else np.zeros((0, collection.manifest["embedding_size"]), dtype=self.dtype),
+                       np.concatenate(ids) if ids else np.zeros(0, dtype=np.int64),
+                       payloads, with_bits=self.binary_prefilter)
+        collection.manifest["segments"] = [name]
+        collection.manifest["retired"] = [seg.name for seg in old_segments]
+        collection.manifest["next_segment"] += 1
+        collection.save_manifest()
+        collection.segments = [_Segment(collection.collection_dir, name)]
+        # the segments replaced one compaction ago: every worker has reloaded past them since
+        for retired_name in previously_retired:
+            _Segment.remove_files(collection.collection_dir, retired_name)
+        self.logger.info(f"Compacted {len(old_segments)} segments of {collection.collection_dir}")
+
+    def _search_segment(self, seg: _Segment, query: np.ndarray, query_bits: Optional[np.ndarray], limit: int):
+        if seg.count == 0 or not seg.live.any():
+            return None
+
+        rows = None
+        candidates_count = limit * self.prefilter_oversample
+        if query_bits is not None and seg.bits is not None and seg.count > candidates_count:
+            hamming = _popcount_rows(np.bitwise_xor(seg.bits, query_bits))
+            hamming = np.where(seg.live, hamming, np.iinfo(np.int32).max)
+            rows = np.argpartition(hamming, candidates_count - 1)[:candidates_count]
+            scores = np.asarray(seg.vectors[rows], dtype=np.float32) @ query
+            live = seg.live[rows]
+        else:
+            scores = np.asarray(seg.vectors, dtype=np.float32) @ query
+            live = seg.live
+
+        scores = np.where(live, scores, -np.inf)
+        k = min(limit, scores.shape[0])
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.isfinite(scores[top])]
+        return scores[top], (rows[top] if rows is not None else top)
+
+    def _search(self, collection: _Collection, vector: list, limit: int) -> List[RetrivedDocument]:
+        query = self._prepare_vectors(vector)[0]
+        query_bits = np.packbits(query > 0) if self.binary_prefilter else None
+
+        all_scores, all_refs = [], []
+        for seg_idx, seg in enumerate(collection.segments):
+            found = self._search_segment(seg, query, query_bits, limit)
+            if found is None:
+                continue
+            scores, rows = found
+            all_scores.append(scores)
+            all_refs.append(np.stack([np.full(rows.shape[0], seg_idx), rows], axis=1))
+
+        if not all_scores:
+            return []
+
+        scores = np.concatenate(all_scores)
+        refs = np.concatenate(all_refs)
+        order = np.argsort(-scores)[:limit]
+
+        results = []
+        for i in order:
+            seg = collection.segments[int(refs[i, 0])]
+            row = int(refs[i, 1])
+            payload = seg.payloads()[row]
+            results.append(RetrivedDocument(
+                text=payload["text"],
+                score=float(scores[i]),
+                metadata=payload.get("metadata") or {},
+                chunk_id=int(seg.ids[row]),
+            ))
+        return results
+
+    async def search_by_vector(self, collection_name: str, vector: list, limit: int = 5) -> List[RetrivedDocument]:
+        collection = self._get_collection(collection_name)
+        if collection is None:
+            self.logger.info(f"Can not search for records in a non existing collection: {collection_name}")
+            return []
+
+        # small collections answer faster than a thread hop
+        if sum(seg.count for seg in collection.segments) <= self.INLINE_SEARCH_MAX_ROWS:
+            return self._search(collection, vector, limit)
+        return await asyncio.to_thread(self._search, collection, vector, limit)
+
+    async def search_many(self, collection_name: str, vectors: List[list], limit: int = 5) -> List[List[RetrivedDocument]]:
+        collection = self._get_collection(collection_name)
+        if collection is None:
+            self.logger.info(f"Can not search for records in a non existing collection: {collection_name}")
+            return [[] for _ in vectors]
+
+        return await asyncio.to_thread(
+            lambda: [self._search(collection, vector, limit) for vector in vectors]
+        )
+
+    async def get_by_chunk_ids(self, collection_name: str, chunk_ids: List[int]) -> List[RetrivedDocument]:
+        collection = self._get_collection(collection_name)
+        if collection is None or not chunk_ids:
+            return []
+        ids = np.asarray(chunk_ids, dtype=np.int64)
+        results = []
+        for seg in collection.segments:
+            for row in np.flatnonzero(np.isin(seg.ids, ids) & seg.live):
+                payload = seg.payloads()[int(row)]
+                results.append(RetrivedDocument(
+                    text=payload["text"],
+                    score=0.0,
+                    metadata=payload.get("metadata") or {},
+                    chunk_id=int(seg.ids[row]),
+                ))
+        return results
+
+    async def delete_by_chunk_ids(self, collection_name: str, chunk_ids: List[int]):
+        if not chunk_ids or not await self.is_collection_exists(collection_name):
+            return
+        ids = np.asarray(chunk_ids, dtype=np.int64)
+        async with self._write_lock(collection_name):
+            await asyncio.to_thread(self._delete_rows, collection_name, ids)
+
+    def _delete_rows(self, collection_name: str, ids: np.ndarray):
+        lock_file = self._file_lock(collection_name)
+        try:
+            collection = self._get_collection(collection_name)
+            if collection is None:
+                return
+            for seg in collection.segments:
+                deleted = np.isin(seg.ids, ids) & seg.live
+                if deleted.any():
+                    seg.live[deleted] = False
+                    seg.save_live()
+            # live masks are not part of the manifest; bump it so other workers reload
+            collection.save_manifest()
+        finally:
+            lock_file.close()
@@ -0,0 +1,222 @@
+from .PGVectorProvider import PGVectorProvider
+from ..VectorDBEnums import PgVectorTableSchemeEnums, PgvectorIndexTypeEnums
+from ..PGVectorIndexManager import IndexPlan
+from sqlalchemy.sql import text as sql_text
+from typing import List, Optional
+
+
+class PGVectorPartitionedProvider(PGVectorProvider):
+    """
+    Multi-tenant pgvector storage: every collection lives in one shared table, HASH-partitioned
+    on the collection name (one collection per project), so many small projects share each partition.
+    Partitions and their partition-local HNSW indexes are created once on connect; creating a
+    collection is a registry row insert, not DDL, and every query filters on the partition key so
+    Postgres prunes to a single partition.
+    """
+
+    def __init__(self, db_client, partitions_count: int = 64, iterative_scan: str = None, **kwargs):
+        super().__init__(db_client, **kwargs)
+        self.partitions_count = partitions_count
+        self.iterative_scan = iterative_scan
+
+        self.shared_table_name = f"{self.pgvector_table_prefix}_shared_{self.default_vector_size}"
+        self.registry_table_name = f"{self.pgvector_table_prefix}_shared_collections"
+        self.shared_index_name = f"{self.shared_table_name}_vector_idx"
+        self.default_index_name = lambda collection_name: self.shared_index_name
+
+    async def connect(self):
+        await super().connect()
+        try:
+            async with self.db_client() as session:
+                async with session.begin():
+                    # serialize bootstrap between workers starting at the same time
+                    await session.execute(sql_text("SELECT pg_advisory_xact_lock(hashtext(:name))"),
+                                          {"name": self.shared_table_name})
+                    await self._create_shared_schema(session)
+        except Exception as e:
+            self.logger.error(f"Failed to create shared pgvector table: {e}")
+            raise e
+
+        opclass = await self._index_opclass(self.shared_index_name)
+        if opclass is not None and opclass != self.distance_method:
+            # the shared index predates the distance mapping fix (dot products indexed with vector_l2_ops):
+            # searches use the distance_method operator and fall back to scans until it is recreated
+            self.logger.warning(f"{self.shared_index_name} uses {opclass} but VECTORDB_DISTANCE_METHOD needs "
+                                f"{self.distance_method}; recreate the index to use it for search")
+
+    async def _create_shared_schema(self, session):
+        await session.execute(sql_text(
+            f'CREATE TABLE IF NOT EXISTS {self.registry_table_name} ('
+            f'collection_name text PRIMARY KEY, '
+            f'embedding_size integer NOT NULL, '
+            f'created_at timestamptz NOT NULL DEFAULT now()'
+            f')'
+        ))
+
+        result = await session.execute(sql_text("SELECT to_regclass(:name)"), {"name": self.shared_table_name})
+        if result.scalar_one_or_none() is not None:
+            return
+
+        self.logger.info(f"Creating shared collection table: {self.shared_table_name} ({self.partitions_count} partitions)")
+        await session.execute(sql_text(
+            f'CREATE TABLE {self.shared_table_name} ('
+            f'{PgVectorTableSchemeEnums.ID.value} bigserial, '
+            f'{PgVectorTableSchemeEnums.COLLECTION.value} text NOT NULL, '
+            f'{PgVectorTableSchemeEnums.TEXT.value} text, '
+            f'{PgVectorTableSchemeEnums.VECTORS.value} vector({self.default_vector_size}), '
+            f'{PgVectorTableSchemeEnums.METADATA.value} jsonb DEFAULT \'{{}}\', '
+            f'{PgVectorTableSchemeEnums.CHUNK_ID.value} integer, '
+            f'PRIMARY KEY ({PgVectorTableSchemeEnums.COLLECTION.value}, {PgVectorTableSchemeEnums.ID.value}), '
+            f'FOREIGN KEY ({PgVectorTableSchemeEnums.CHUNK_ID.value}) REFERENCES chunks(chunk_id) ON DELETE CASCADE '
+            f') PARTITION BY HASH ({PgVectorTableSchemeEnums.COLLECTION.value})'
+        ))
+        for remainder in range(self.partitions_count):
+            await session.execute(sql_text(
+                f'CREATE TABLE {self.shared_table_name}_p{remainder} PARTITION OF {self.shared_table_name} '
+                f'FOR VALUES WITH (MODULUS {int(self.partitions_count)}, REMAINDER {remainder})'
+            ))
+
+        # indexes on the partitioned parent are created on (and maintained per) partition;
+        # the partitions are empty here so this is instant
+        plan = self.index_manager.plan(0, index_type=PgvectorIndexTypeEnums.HNSW.value)
+        await session.execute(sql_text(
+            f'CREATE INDEX {self.shared_index_name} ON {self.shared_table_name} '
+            f'USING {plan.index_type} ({PgVectorTableSchemeEnums.VECTORS.value} {self.distance_method})'
+            f'{plan.with_options_sql()}'
+        ))
+        await session.execute(sql_text(
+            f'CREATE INDEX {self.shared_table_name}_chunk_idx ON {self.shared_table_name} '
+            f'({PgVectorTableSchemeEnums.COLLECTION.value}, {PgVectorTableSchemeEnums.CHUNK_ID.value})'
+        ))
+
+    def _collection_table(self, collection_name: str) -> str:
+        return self.shared_table_name
+
+    def _collection_filter(self, collection_name: str) -> str:
+        return f"{PgVectorTableSchemeEnums.COLLECTION.value} = :scope_collection"
+
+    def _collection_params(self, collection_name: str) -> dict:
+        return {"scope_collection": collection_name}
+
+    def _insert_sql(self, collection_name: str):
+        return sql_text(f'INSERT INTO {self.shared_table_name} '
+                        f'({PgVectorTableSchemeEnums.COLLECTION.value}, '
+                        f'{PgVectorTableSchemeEnums.TEXT.value}, '
+                        f'{PgVectorTableSchemeEnums.VECTORS.value}, '
+                        f'{PgVectorTableSchemeEnums.METADATA.value}, '
+                        f'{PgVectorTableSchemeEnums.CHUNK_ID.value}) '
+                        f'VALUES (:scope_collection, :text, :vector, :metadata, :chunk_id)'
+                        )
+
+    async def is_collection_exists(self, collection_name: str) -> bool:
+        async with self.db_client() as session:
+            async with session.begin():
+                result = await session.execute(sql_text(
+                    f'SELECT 1 FROM {self.registry_table_name} WHERE collection_name = :collection_name'
+                ), {"collection_name": collection_name})
+                return result.scalar_one_or_none() is not None
+
+    async def list_all_collections(self) -> List[str]:
+        async with self.db_client() as session:
+            async with session.begin():
+                result = await session.execute(sql_text(
+                    f'SELECT collection_name FROM {self.registry_table_name} ORDER BY collection_name'
+                ))
+                return result.scalars().all()
+
+    async def get_collection_info(self, collection_name: str) -> dict:
+        async with self.db_client() as session:
+            async with session.begin():
+                registry = await session.execute(sql_text(
+                    f'SELECT embedding_size, created_at FROM {self.registry_table_name} '
+                    f'WHERE collection_name = :collection_name'
+                ), {"collection_name": collection_name})
+                registry_data = registry.fetchone()
+                if not registry_data:
+                    return None
+
+                partition = await session.execute(sql_text(
+                    f'SELECT tableoid::regclass::text FROM {self.shared_table_name} '
+                    f'WHERE {self._collection_filter(collection_name)} LIMIT 1'
+                ), self._collection_params(collection_name))
+                partition_name = partition.scalar_one_or_none()
+
+                exact_count = await self.stats.get_exact_count(session, collection_name)
+                partition_stats = await self.stats.get_table_stats(session, partition_name) if partition_name else None
+
+                return {
+                    "table_info": {
+                        "table_name": self.shared_table_name,
+                        "partition_name": partition_name,
+                        "embedding_size": registry_data.embedding_size,
+                        "created_at": registry_data.created_at.isoformat() if registry_data.created_at else None,
+                    },
+                    "record_count": exact_count,
+                    "record_count_exact": exact_count is not None,
+                    # partitions are shared between collections: sizes cover every tenant in it
+                    "partition_stats": partition_stats,
+                }
+
+    async def delete_collection(self, collection_name: str):
+        async with self.db_client() as session:
+            async with session.begin():
+                self.logger.info(f"Deleting collection rows: {collection_name}")
+                await session.execute(sql_text(
+                    f'DELETE FROM {self.shared_table_name} WHERE {self._collection_filter(collection_name)}'
+                ), self._collection_params(collection_name))
+                await session.execute(sql_text(
+                    f'DELETE FROM {self.registry_table_name} WHERE collection_name = :collection_name'
+                ), {"collection_name": collection_name})
+                await self.stats.drop_counter(session, collection_name)
+                await session.commit()
+        return True
+
+    async def create_collection(self, collection_name: str, embedding_size: int, do_reset: bool = False):
+        if embedding_size != self.default_vector_size:
+            self.logger.error(f"Can not create collection {collection_name} with embedding size {embedding_size} "
+                              f"in shared table {self.shared_table_name}")
+            return False
+
+        if do_reset:
+            _ = await self.delete_collection(collection_name=collection_name)
+
+        async with self.db_client() as session:
+            async with session.begin():
+                result = await session.execute(sql_text(
+                    f'INSERT INTO {self.registry_table_name} (collection_name, embedding_size) '
+                    f'VALUES (:collection_name, :embedding_size) ON CONFLICT (collection_name) DO NOTHING '
+                    f'RETURNING collection_name'
+                ), {"collection_name": collection_name, "embedding_size": embedding_size})
+                is_created = result.scalar_one_or_none() is not None
+                if is_created:
+                    self.logger.info(f"Creating collection: {collection_name}")
+                    await self.stats.init_counter(session, collection_name)
+                await session.commit()
+        return is_created
+
+    async def is_index_exsited(self, collection_name: str) -> bool:
+        async with self.db_client() as session:
+            async with session.begin():
+                result = await session.execute(sql_text("SELECT to_regclass(:index_name)"),
+                                               {"index_name": self.shared_index_name})
+                return result.scalar_one_or_none() is not None
+
+    def schedule_index_build(self, collection_name: str, index_type: str = None) -> bool:
+        # partition-local indexes already exist and are maintained on insert
+        return False
+
+    async def create_index_vector(self, collection_name: str, index_type: str = None):
+        return await self.is_index_exsited(collection_name=collection_name)
+
+    async def reset_vector_index(self, collection_name: str, index_type: str = None) -> bool:
+        return await self.is_index_exsited(collection_name=collection_name)
+
+    async def get_index_plan(self, collection_name: str) -> Optional[IndexPlan]:
+        return self.index_manager.plan(0, index_type=PgvectorIndexTypeEnums.HNSW.value)
+
+    async def _apply_search_settings(self, session, collection_name: str):
+        await super()._apply_search_settings(session, collection_name)
+        # the HNSW index spans every tenant of the partition; keep scanning until LIMIT rows pass the filter
+        if self.iterative_scan:
+            await session.execute(sql_text("SELECT set_config('hnsw.iterative_scan', :value, true)"),
+                                  {"value": self.iterative_scan})
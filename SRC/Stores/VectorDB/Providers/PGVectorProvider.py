@@ -1,17 +1,27 @@
 from sqlalchemy.sql._elements_constructors import false
 from ..VectorDBInterface import VectorDBInterface
+from ..PGVectorIndexManager import PGVectorIndexManager, IndexPlan
+from ..PGVectorStats import PGVectorStatsStore
 from ..VectorDBEnums import (DistanceMethodEnums, PgVectorTableSchemeEnums, 
-                        PgvectorDistanceMethodEnums, PgvectorIndexTypeEnums)
+                        PgvectorDistanceMethodEnums, PgvectorDistanceOperatorEnums, PgvectorIndexTypeEnums)
 from sqlalchemy.sql import text as sql_text
 import logging
-from typing import List, Dict, Any, Optional
-from Models.DB_Schemes import RetrivedDocument
+from typing import List, Dict, Any, Optional, Tuple
+from Models.DB_Schemes import RetrivedDocument, CHUNK_FTS_CONFIG
 from sqlalchemy import create_engine, text, inspect
 from sqlalchemy.engine import Engine
 import json, uuid
+import asyncio
+import time
+
+# how long a worker trusts the index plan it read; another worker may rebuild the index meanwhile
+INDEX_PLAN_TTL_SECONDS = 60
 
 class PGVectorProvider(VectorDBInterface):
-    def __init__(self, db_client, default_vector_size: int = 786, distance_method: str = None, index_threshold: int = 10000):
+    def __init__(self, db_client, default_vector_size: int = 786, distance_method: str = None, index_threshold: int = 10000,
+                 maintenance_work_mem: str = None, max_parallel_maintenance_workers: int = None,
+                 hnsw_m: int = 16, hnsw_ef_construction: int = 64,
+                 index_manager: PGVectorIndexManager = None):
         self.db_client = db_client
         self.default_vector_size = default_vector_size
         self.distance_method = distance_method
@@ -21,25 +31,44 @@ class PGVectorProvider(VectorDBInterface):
              self.distance_method = PgvectorDistanceMethodEnums.DOT.value
         else:
             self.distance_method = distance_method
-            
+        self.distance_operator = {
+            PgvectorDistanceMethodEnums.COSINE.value: PgvectorDistanceOperatorEnums.COSINE.value,
+            PgvectorDistanceMethodEnums.DOT.value: PgvectorDistanceOperatorEnums.DOT.value,
+            PgvectorDistanceMethodEnums.L2.value: PgvectorDistanceOperatorEnums.L2.value,
+        }.get(self.distance_method, PgvectorDistanceOperatorEnums.COSINE.value)
+
         self.index_threshold = index_threshold
+        self.maintenance_work_mem = maintenance_work_mem
+        self.max_parallel_maintenance_workers = max_parallel_maintenance_workers
+        self.index_manager = index_manager or PGVectorIndexManager(hnsw_m=hnsw_m, hnsw_ef_construction=hnsw_ef_construction)
 
         self.pgvector_table_prefix = PgVectorTableSchemeEnums._PREFIX.value
         self.logger = logging.getLogger("uvicorn")
         self.default_index_name = lambda collection_name: f"{collection_name}_vector_idx"
 
+        # collection_name -> running background index build (see schedule_index_build)
+        self.index_build_tasks: Dict[str, asyncio.Task] = {}
+        self.index_build_errors: Dict[str, str] = {}
+        # collection_name -> (IndexPlan the current index was built with, expiry); the plan is stored
+        # as the index comment and re-read after INDEX_PLAN_TTL_SECONDS
+        self.index_plans: Dict[str, Tuple[Optional[IndexPlan], float]] = {}
+        self.stats = PGVectorStatsStore()
+
     async def connect(self):
         try:
             async with self.db_client() as session:
                 async with session.begin():
                     await session.execute(sql_text("CREATE EXTENSION IF NOT EXISTS vector"))
+                    await self.stats.create_table(session)
                     await session.commit()
         except Exception as e:
             self.logger.error(f"Failed to connect to PGVector DB: {e}")
             raise e
 
     async def disconnect(self):
-        pass
+        for task in list(self.index_build_tasks.values()):
+            task.cancel()
+        self.index_build_tasks.clear()
 
     async def is_collection_exists(self, collection_name: str) -> bool:
         try:
@@ -74,15 +103,16 @@ class PGVectorProvider(VectorDBInterface):
                 FROM pg_tables
                 WHERE tablename = :collection_name
                 ''')
-                 
-                count_sql    = sql_text(f'SELECT COUNT(*) FROM {collection_name}')
                 table_info   = await session.execute(table_inf_sql , {"collection_name": collection_name})
-                record_count = await session.execute(count_sql)
 
                 table_data = table_info.fetchone()
                 if not table_data:
                     return None
 
+                # never COUNT(*) here: exact counter if maintained, catalog estimate otherwise
+                exact_count = await self.stats.get_exact_count(session, collection_name)
+                table_stats = await self.stats.get_table_stats(session, collection_name) or {}
+
                 return {
                     "table_info": {
                         "schema_name": table_data[0],
@@ -91,16 +121,23 @@ class PGVectorProvider(VectorDBInterface):
                         "table_space": table_data[3],
                         "has_indexes": table_data[4]
                     },
-                    "record_count": record_count.scalar_one()
+                    "record_count": exact_count if exact_count is not None else table_stats.get("approximate_count"),
+                    "record_count_exact": exact_count is not None,
+                    "table_stats": table_stats,
                 }
 
     async def delete_collection(self, collection_name: str):
         async with self.db_client() as session:
             async with session.begin():
                 self.logger.info(f"Deleting collection: {collection_name}")
+                running_task = self.index_build_tasks.pop(collection_name, None)
+                if running_task is not None:
+                    running_task.cancel()
+                self.index_plans.pop(collection_name, None)
 
                 delete_tbl = sql_text(f'DROP TABLE IF EXISTS {collection_name}')
                 await session.execute(delete_tbl)
+                await self.stats.drop_counter(session, collection_name)
                 await session.commit()
         return True
 
@@ -120,10 +157,11 @@ class PGVectorProvider(VectorDBInterface):
                                         f'{PgVectorTableSchemeEnums.VECTORS.value} vector({embedding_size}), '
                                         f'{PgVectorTableSchemeEnums.METADATA.value} jsonb DEFAULT \'{{}}\', '
                                         f'{PgVectorTableSchemeEnums.CHUNK_ID.value} integer,'
-                                        f'FOREIGN KEY ({PgVectorTableSchemeEnums.CHUNK_ID.value}) REFERENCES chunks(chunk_id) '
+                                        f'FOREIGN KEY ({PgVectorTableSchemeEnums.CHUNK_ID.value}) REFERENCES chunks(chunk_id) ON DELETE CASCADE'
                                         ')'
                                         )
                     await session.execute(create_sql)
+                    await self.stats.init_counter(session, collection_name)
                     await session.commit()
             return True
         return False
@@ -142,41 +180,276 @@ class PGVectorProvider(VectorDBInterface):
                 record = bool(results.scalar_one_or_none())
                 return record
 
-    async def create_index_vector(self, collection_name: str, index_type: str = PgvectorIndexTypeEnums.HNSW.value):
-        is_index_exsited = await self.is_index_exsited(collection_name=collection_name)
-        if is_index_exsited:
-            self.logger.debug(f"Index already exists for collection: {collection_name}")
-            return True
+    def schedule_index_build(self, collection_name: str, index_type: str = None) -> bool:
+        """Start create_index_vector as a background task; returns False if a build is already running."""
+        running_task = self.index_build_tasks.get(collection_name)
+        if running_task is not None and not running_task.done():
+            return False
+
+        task = asyncio.create_task(self.create_index_vector(collection_name=collection_name, index_type=index_type))
+        self.index_build_tasks[collection_name] = task
+        task.add_done_callback(lambda t: self._on_index_build_done(collection_name, t))
+        return True
 
+    def _on_index_build_done(self, collection_name: str, task: asyncio.Task):
+        if self.index_build_tasks.get(collection_name) is task:
+            self.index_build_tasks.pop(collection_name, None)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            self.index_build_errors[collection_name] = str(error)
+            self.logger.error(f"Background index build failed for collection {collection_name}: {error}")
+        else:
+            self.index_build_errors.pop(collection_name, None)
+
+    async def _apply_maintenance_settings(self, connection):
+        if self.maintenance_work_mem:
+            await connection.execute(sql_text("SELECT set_config('maintenance_work_mem', :value, false)"),
+                                     {"value": str(self.maintenance_work_mem)})
+        if self.max_parallel_maintenance_workers is not None:
+            await connection.execute(sql_text("SELECT set_config('max_parallel_maintenance_workers', :value, false)"),
+                                     {"value": str(int(self.max_parallel_maintenance_workers))})
+
+    async def _reset_maintenance_settings(self, connection):
+        await connection.execute(sql_text("RESET maintenance_work_mem"))
+        await connection.execute(sql_text("RESET max_parallel_maintenance_workers"))
+
+    async def get_record_count(self, collection_name: str) -> int:
+        """Exact row count from the stats counter, seeding it once for collections that predate it."""
         async with self.db_client() as session:
             async with session.begin():
-                count_sql = sql_text(f"SELECT COUNT(*) FROM {collection_name}")
-                result = await session.execute(count_sql)
-                records_count = result.scalar_one()
-                
-                if records_count < self.index_threshold:
+                records_count = await self.stats.get_exact_count(session, collection_name)
+                if records_count is None:
+                    records_count = await self.stats.seed_counter(session, collection_name)
+        return records_count
+
+    async def get_index_plan(self, collection_name: str) -> Optional[IndexPlan]:
+        cached = self.index_plans.get(collection_name)
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+
+        index_name = self.default_index_name(collection_name)
+        async with self.db_client() as session:
+            async with session.begin():
+                comment_sql = sql_text("SELECT obj_description(to_regclass(:index_name), 'pg_class')")
+                result = await session.execute(comment_sql, {"index_name": index_name})
+                plan = IndexPlan.from_json(result.scalar_one_or_none())
+
+        self._cache_index_plan(collection_name, plan)
+        return plan
+
+    def _cache_index_plan(self, collection_name: str, plan: Optional[IndexPlan]):
+        self.index_plans[collection_name] = (plan, time.monotonic() + INDEX_PLAN_TTL_SECONDS)
+
+    @staticmethod
+    def _comment_sql(index_name: str, plan: IndexPlan):
+        comment = plan.to_json().replace("'", "''")
+        return sql_text(f"COMMENT ON INDEX {index_name} IS '{comment}'")
+
+    async def _drop_index_concurrently(self, index_name: str):
+        async with self.db_client() as session:
+            connection = await session.connection(execution_options={"isolation_level": "AUTOCOMMIT"})
+            await connection.execute(sql_text(f'DROP INDEX CONCURRENTLY IF EXISTS {index_name}'))
+
+    async def _build_index_concurrently(self, collection_name: str, index_name: str, plan: IndexPlan):
+        create_idx_sql = sql_text(
+                                    f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name} ON {collection_name} '
+                                    f'USING {plan.index_type} ({PgVectorTableSchemeEnums.VECTORS.value} {self.distance_method})'
+                                    f'{plan.with_options_sql()}'
+                                    )
+
+        # CREATE INDEX CONCURRENTLY can not run inside a transaction block
+        async with self.db_client() as session:
+            connection = await session.connection(execution_options={"isolation_level": "AUTOCOMMIT"})
+            try:
+                await self._apply_maintenance_settings(connection)
+                await connection.execute(create_idx_sql)
+            except BaseException:
+                # a failed or cancelled concurrent build leaves an INVALID index behind; drop it on a
+                # fresh connection (this one may be unusable after a cancel) even while being cancelled
+                await asyncio.shield(self._drop_index_concurrently(index_name))
+                raise
+            finally:
+                await self._reset_maintenance_settings(connection)
+
+    async def _index_state(self, collection_name: str, index_name: str) -> Tuple[Optional[bool], bool]:
+        """(pg_index.indisvalid of index_name or None when missing, whether an index build on the table is running)."""
+        async with self.db_client() as session:
+            async with session.begin():
+                valid_sql = sql_text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:index_name)")
+                valid = (await session.execute(valid_sql, {"index_name": index_name})).scalar_one_or_none()
+                building_sql = sql_text('''SELECT 1 FROM pg_stat_progress_create_index p
+                JOIN pg_class c ON c.oid = p.relid
+                WHERE c.relname = :collection_name
+                ''')
+                building = (await session.execute(building_sql, {"collection_name": collection_name})).first() is not None
+        return valid, building
+
+    async def _index_opclass(self, index_name: str) -> Optional[str]:
+        """Operator class the vectors column of index_name was built with (None when the index is missing)."""
+        async with self.db_client() as session:
+            async with session.begin():
+                opclass_sql = sql_text('''SELECT opc.opcname FROM pg_index i
+                JOIN pg_opclass opc ON opc.oid = i.indclass[0]
+                WHERE i.indexrelid = to_regclass(:index_name)
+                ''')
+                return (await session.execute(opclass_sql, {"index_name": index_name})).scalar_one_or_none()
+
+    async def _swap_index(self, collection_name: str, new_index_name: str, plan: IndexPlan):
+        """
+        Put the rebuilt index in place of the current one: both renames and the plan comment commit
+        together, so there is no moment without an index, then the old index is dropped.
+        """
+        index_name = self.default_index_name(collection_name)
+        old_index_name = f"{index_name}_old"
+        await self._drop_index_concurrently(old_index_name)
+        async with self.db_client() as session:
+            async with session.begin():
+                valid_sql = sql_text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:index_name)")
+                result = await session.execute(valid_sql, {"index_name": new_index_name})
+                if not result.scalar_one_or_none():
+                    raise RuntimeError(f"Rebuilt index {new_index_name} is missing or invalid, keeping {index_name}")
+                await session.execute(sql_text(f'ALTER INDEX IF EXISTS {index_name} RENAME TO {old_index_name}'))
+                await session.execute(sql_text(f'ALTER INDEX {new_index_name} RENAME TO {index_name}'))
+                await session.execute(self._comment_sql(index_name, plan))
+        self._cache_index_plan(collection_name, plan)
+        await self._drop_index_concurrently(old_index_name)
+
+    async def _save_index_plan(self, collection_name: str, plan: IndexPlan):
+        index_name = self.default_index_name(collection_name)
+        async with self.db_client() as session:
+            async with session.begin():
+                await session.execute(self._comment_sql(index_name, plan))
+        self._cache_index_plan(collection_name, plan)
+
+    async def create_index_vector(self, collection_name: str, index_type: str = None):
+        """
+        Build the collection index once it crosses index_threshold, with the type/parameters chosen
+        by the index manager, and rebuild it side by side once the collection drifted too far from
+        the size it was built on.
+        """
+        records_count = await self.get_record_count(collection_name=collection_name)
+
+        is_index_exsited = await self.is_index_exsited(collection_name=collection_name)
+        if is_index_exsited:
+            index_name = self.default_index_name(collection_name)
+            valid, building = await self._index_state(collection_name, index_name)
+            if not valid:
+                if building:
+                    # another worker is still building it (an index is INVALID until its build ends)
+                    self.logger.info(f"Index build already running for collection: {collection_name}")
                     return False
+                # left behind by a build that was killed or cancelled: searches can not use it
+                self.logger.warning(f"Dropping invalid index {index_name} of collection {collection_name}")
+                await self._drop_index_concurrently(index_name)
+                self.index_plans.pop(collection_name, None)
+                is_index_exsited = False
 
-                self.logger.info(f"Start:Creating index for collection: {collection_name}")
+        if is_index_exsited:
+            current_plan = await self.get_index_plan(collection_name=collection_name)
+            opclass = await self._index_opclass(self.default_index_name(collection_name))
+            if opclass == self.distance_method:
+                if current_plan is None:
+                    # index created before plans were recorded: adopt it as built on the current size
+                    await self._save_index_plan(collection_name, self.index_manager.plan(records_count, index_type=index_type))
+                    return True
+                if not self.index_manager.needs_rebuild(current_plan, records_count):
+                    self.logger.debug(f"Index already exists for collection: {collection_name}")
+                    return True
+            else:
+                # built for another distance (e.g. dot products indexed with vector_l2_ops): the
+                # search operator can not use it
+                self.logger.warning(f"Index of collection {collection_name} uses {opclass}, "
+                                    f"rebuilding it with {self.distance_method}")
+
+            plan = self.index_manager.plan(records_count, index_type=index_type)
+            new_index_name = f"{self.default_index_name(collection_name)}_rebuild"
+            self.logger.info(f"Start:Rebuilding index for collection: {collection_name} "
+                             f"({current_plan.row_count if current_plan else '?'} -> {records_count} rows, "
+                             f"{plan.index_type})")
+            # a build that crashed earlier may have left an INVALID index under this name
+            await self._drop_index_concurrently(new_index_name)
+            await self._build_index_concurrently(collection_name, new_index_name, plan)
+            await self._swap_index(collection_name, new_index_name, plan)
+            self.logger.info(f"end:Rebuilding index for collection: {collection_name}")
+            return True
 
-                index_name = self.default_index_name(collection_name)
-                create_idx_sql = sql_text(
-                                            f'CREATE INDEX {index_name} ON {collection_name} '
-                                            f'USING {index_type} ({PgVectorTableSchemeEnums.VECTORS.value} {self.distance_method})'
-                                            )
-                await session.execute(create_idx_sql)
+        if records_count < self.index_threshold:
+            return False
 
-                self.logger.info(f"end:Creating index for collection: {collection_name}")
+        plan = self.index_manager.plan(records_count, index_type=index_type)
+        self.logger.info(f"Start:Creating {plan.index_type} index for collection: {collection_name}")
+        await self._build_index_concurrently(collection_name, self.default_index_name(collection_name), plan)
+        await self._save_index_plan(collection_name, plan)
+        self.logger.info(f"end:Creating index for collection: {collection_name}")
+        return True
 
-    async def reset_vector_index(self, collection_name: str, index_type: str = PgvectorIndexTypeEnums.HNSW.value) -> bool:
+    async def get_index_build_status(self, collection_name: str) -> dict:
+        progress = None
+        async with self.db_client() as session:
+            async with session.begin():
+                progress_sql = sql_text('''SELECT p.phase, p.blocks_done, p.blocks_total,
+                        p.tuples_done, p.tuples_total, p.lockers_done, p.lockers_total
+                FROM pg_stat_progress_create_index p
+                JOIN pg_class c ON c.oid = p.relid
+                WHERE c.relname = :collection_name
+                ''')
+                result = await session.execute(progress_sql, {"collection_name": collection_name})
+                record = result.fetchone()
+                if record is not None:
+                    progress = {
+                        "phase": record.phase,
+                        "blocks_done": record.blocks_done,
+                        "blocks_total": record.blocks_total,
+                        "tuples_done": record.tuples_done,
+                        "tuples_total": record.tuples_total,
+                        "lockers_done": record.lockers_done,
+                        "lockers_total": record.lockers_total,
+                    }
+
+        running_task = self.index_build_tasks.get(collection_name)
+        index_plan = await self.get_index_plan(collection_name=collection_name)
+        return {
+            "index_name": self.default_index_name(collection_name),
+            "index_exists": await self.is_index_exsited(collection_name=collection_name),
+            "build_running": running_task is not None and not running_task.done(),
+            "progress": progress,
+            "last_error": self.index_build_errors.get(collection_name),
+            "plan": index_plan.__dict__ if index_plan else None,
+        }
+
+    async def reset_vector_index(self, collection_name: str, index_type: str = None) -> bool:
         index_name = self.default_index_name(collection_name)
         async with self.db_client() as session:
             async with session.begin():
                 drop_sql = sql_text(f'DROP INDEX IF EXISTS {index_name}')
                 await session.execute(drop_sql)
-                
+        self.index_plans.pop(collection_name, None)
+
         return await self.create_index_vector(collection_name=collection_name, index_type=index_type)
 
+    def _collection_table(self, collection_name: str) -> str:
+        """Table holding the collection rows; the collection is its own table here."""
+        return collection_name
+
+    def _collection_filter(self, collection_name: str) -> str:
+        """SQL condition selecting the collection rows inside _collection_table."""
+        return "TRUE"
+
+    def _collection_params(self, collection_name: str) -> dict:
+        """Bind parameters used by _collection_filter/_insert_sql."""
+        return {}
+
+    def _insert_sql(self, collection_name: str):
+        return sql_text(f'INSERT INTO {self._collection_table(collection_name)} '
+                        f'({PgVectorTableSchemeEnums.TEXT.value}, '
+                        f'{PgVectorTableSchemeEnums.VECTORS.value}, '
+                        f'{PgVectorTableSchemeEnums.METADATA.value}, '
+                        f'{PgVectorTableSchemeEnums.CHUNK_ID.value}) '
+                        f'VALUES (:text, :vector, :metadata, :chunk_id)'
+                        )
+
     async def insert_one(self, collection_name: str, text: str, vector: list, metadata: dict = None, record_id: str = None):
         is_collection_exists = await self.is_collection_exists(collection_name=collection_name)
         if not is_collection_exists:
@@ -189,21 +462,20 @@ class PGVectorProvider(VectorDBInterface):
 
         async with self.db_client() as session:
             async with session.begin():
-                insert_sql = sql_text(f'INSERT INTO {collection_name} '
-                f'({PgVectorTableSchemeEnums.TEXT.value},{PgVectorTableSchemeEnums.VECTORS.value},{PgVectorTableSchemeEnums.METADATA.value},{PgVectorTableSchemeEnums.CHUNK_ID.value}) '
-                f'VALUES (:text, :vector, :metadata, :chunk_id)'
-                )
+                insert_sql = self._insert_sql(collection_name)
                 metadata_json = json.dumps(metadata,ensure_ascii=False) if metadata is not None else "{}"
                 await session.execute(insert_sql, 
                     {
                     "text": text,
                     "vector": "[" + ",".join([str(v) for v in vector]) + "]",
                     "metadata": metadata_json,
-                    "chunk_id": record_id
+                    "chunk_id": record_id,
+                    **self._collection_params(collection_name)
                     }
                 )
+                await self.stats.increment(session, collection_name, 1)
                 await session.commit()
-        await self.create_index_vector(collection_name=collection_name)
+        self.schedule_index_build(collection_name=collection_name)
         return True
 
     async def insert_many(self, collection_name: str, texts: list, vectors: list, metadata: list = None, record_ids: list = None, batch_size: int = 50):
@@ -234,27 +506,39 @@ class PGVectorProvider(VectorDBInterface):
                             "text": _text,
                             "vector": "[" + ",".join([str(v) for v in _vector]) + "]",
                             "metadata": metadata_json,
-                            "chunk_id": _record_id
+                            "chunk_id": _record_id,
+                            **self._collection_params(collection_name)
                         })
 
-                        # Note: This query preparation being inside the loop is inefficient if strict SQL alchemy, but logic wise mostly fine. 
-                        # However, for batch insert, we should execute ONCE per batch if using values list? 
-                        # The original code executed inside the loop but with 'values' list which grew? No, 'values' is reset per batch.
-                        # Wait, original code: `values.append(...)` then `await session.execute(..., values)`.
-                        # This executes ONE INSERT with MULTIPLE VALUES? No, SQLAlchemy execute with list of dicts does executemany.
-                    
-                    batch_insert_sql = sql_text(f'INSERT INTO {collection_name} '
-                                                    f'({PgVectorTableSchemeEnums.TEXT.value}, '
-                                                    f'{PgVectorTableSchemeEnums.VECTORS.value}, '
-                                                    f'{PgVectorTableSchemeEnums.METADATA.value}, '
-                                                    f'{PgVectorTableSchemeEnums.CHUNK_ID.value}) '
-                                                    f'VALUES (:text, :vector, :metadata, :chunk_id)'
-                                                    )
+                    # executemany: one INSERT statement per batch
+                    batch_insert_sql = self._insert_sql(collection_name)
                     await session.execute(batch_insert_sql, values)
+                    await self.stats.increment(session, collection_name, len(values))
                     await session.commit()
-        await self.create_index_vector(collection_name=collection_name)
+        self.schedule_index_build(collection_name=collection_name)
         return True
 
+    def _distance_sql(self, query_vector_sql: str) -> str:
+        return f'{PgVectorTableSchemeEnums.VECTORS.value} {self.distance_operator} {query_vector_sql}'
+
+    def _score_sql(self, query_vector_sql: str) -> str:
+        """Higher-is-better score of the distance: cosine similarity, inner product (<#> is its negative) or -L2."""
+        if self.distance_operator == PgvectorDistanceOperatorEnums.COSINE.value:
+            return f'1 - ({self._distance_sql(query_vector_sql)})'
+        return f'-({self._distance_sql(query_vector_sql)})'
+
+    async def _apply_search_settings(self, session, collection_name: str):
+        """SET LOCAL the query-time knob (ivfflat.probes / hnsw.ef_search) of the collection's index plan."""
+        plan = await self.get_index_plan(collection_name=collection_name)
+        if plan is None:
+            return
+        if plan.index_type == PgvectorIndexTypeEnums.IVFFLAT.value and plan.probes:
+            await session.execute(sql_text("SELECT set_config('ivfflat.probes', :value, true)"),
+                                  {"value": str(int(plan.probes))})
+        elif plan.index_type == PgvectorIndexTypeEnums.HNSW.value and plan.ef_search:
+            await session.execute(sql_text("SELECT set_config('hnsw.ef_search', :value, true)"),
+                                  {"value": str(int(plan.ef_search))})
+
     async def search_by_vector(self, collection_name: str, vector: list, limit: int = 5) -> List[RetrivedDocument]:
         is_collection_exists = await self.is_collection_exists(collection_name=collection_name)
         if not is_collection_exists:
@@ -265,17 +549,21 @@ class PGVectorProvider(VectorDBInterface):
 
         async with self.db_client() as session:
             async with session.begin():
+                await self._apply_search_settings(session, collection_name)
+                # order by the raw distance operator so the ANN index can serve the query
                 search_sql = sql_text(
                     f'SELECT {PgVectorTableSchemeEnums.TEXT.value} as text, '
-                    f'1 - ({PgVectorTableSchemeEnums.VECTORS.value} <=> :vector) as score, '
+                    f'{self._score_sql(":vector")} as score, '
                     f'{PgVectorTableSchemeEnums.METADATA.value} as metadata, '
                     f'{PgVectorTableSchemeEnums.CHUNK_ID.value} as chunk_id '
-                    f'FROM {collection_name} '
-                    f'ORDER BY score DESC '
+                    f'FROM {self._collection_table(collection_name)} '
+                    f'WHERE {self._collection_filter(collection_name)} '
+                    f'ORDER BY {self._distance_sql(":vector")} '
                     f'LIMIT :limit'
                 )
 
-                result = await session.execute(search_sql, {"vector": vector_str, "limit": limit})
+                result = await session.execute(search_sql, {"vector": vector_str, "limit": limit,
+                                                            **self._collection_params(collection_name)})
                 records = result.fetchall()
 
                 return [
@@ -288,6 +576,145 @@ class PGVectorProvider(VectorDBInterface):
                     for record in records
                 ]
 
+    async def search_hybrid(self, collection_name: str, vector: list, query_text: str, project_id: int,
+                            limit: int = 5, candidates_limit: int = None, rrf_k: int = 60) -> List[RetrivedDocument]:
+        """
+        Dense + full-text retrieval in one statement: the ANN candidates and the chunks.chunk_tsv
+        (GIN) candidates are ranked in CTEs and fused with reciprocal rank fusion, 1 / (rrf_k + rank).
+        """
+        is_collection_exists = await self.is_collection_exists(collection_name=collection_name)
+        if not is_collection_exists:
+            self.logger.info(f"Can not search for records in a non existing collection: {collection_name}")
+            return []
+
+        vector_str = "[" + ",".join([str(v) for v in vector]) + "]"
+        candidates_limit = candidates_limit or max(limit * 2, 10)
+
+        async with self.db_client() as session:
+            async with session.begin():
+                await self._apply_search_settings(session, collection_name)
+                hybrid_sql = sql_text(
+                    f'WITH dense AS ('
+                    f'SELECT {PgVectorTableSchemeEnums.CHUNK_ID.value} AS chunk_id, '
+                    f'row_number() OVER (ORDER BY distance) AS rank '
+                    f'FROM ('
+                    f'SELECT {PgVectorTableSchemeEnums.CHUNK_ID.value}, '
+                    f'{self._distance_sql(":vector")} AS distance '
+                    f'FROM {self._collection_table(collection_name)} '
+                    f'WHERE {self._collection_filter(collection_name)} '
+                    f'ORDER BY {self._distance_sql(":vector")} '
+                    f'LIMIT :candidates_limit'
+                    f') ann'
+                    f'), sparse AS ('
+                    f'SELECT chunk_id, row_number() OVER (ORDER BY text_rank DESC) AS rank '
+                    f'FROM ('
+                    f'SELECT c.chunk_id, ts_rank_cd(c.chunk_tsv, q.query) AS text_rank '
+                    f'FROM chunks c, websearch_to_tsquery(CAST(:fts_config AS regconfig), :query_text) AS q(query) '
+                    f'WHERE c.chunk_project_id = :project_id AND c.chunk_tsv @@ q.query '
+                    f'ORDER BY text_rank DESC '
+                    f'LIMIT :candidates_limit'
+                    f') fts'
+                    f'), fused AS ('
+                    f'SELECT COALESCE(d.chunk_id, s.chunk_id) AS chunk_id, '
+                    f'COALESCE(1.0 / (:rrf_k + d.rank), 0) + COALESCE(1.0 / (:rrf_k + s.rank), 0) AS score '
+                    f'FROM dense d FULL OUTER JOIN sparse s ON d.chunk_id = s.chunk_id'
+                    f') '
+                    f'SELECT f.chunk_id, f.score, c.chunk_text AS text, c.chunk_metadata AS metadata '
+                    f'FROM fused f JOIN chunks c ON c.chunk_id = f.chunk_id '
+                    f'ORDER BY f.score DESC '
+                    f'LIMIT :limit'
+                )
+
+                result = await session.execute(hybrid_sql, {
+                    "vector": vector_str, "query_text": query_text or "", "project_id": project_id,
+                    "fts_config": CHUNK_FTS_CONFIG, "candidates_limit": candidates_limit,
+                    "rrf_k": rrf_k, "limit": limit, **self._collection_params(collection_name),
+                })
+                records = result.fetchall()
+
+        return [
+            RetrivedDocument(
+                text=record.text,
+                score=float(record.score),
+                metadata=record.metadata if record.metadata is not None else {},
+                chunk_id=record.chunk_id,
+            )
+            for record in records
+        ]
+
+    async def search_many(self, collection_name: str, vectors: List[list], limit: int = 5) -> List[List[RetrivedDocument]]:
+        is_collection_exists = await self.is_collection_exists(collection_name=collection_name)
+        if not is_collection_exists:
+            self.logger.info(f"Can not search for records in a non existing collection: {collection_name}")
+            return [[] for _ in vectors]
+
+        vector_strs = ["[" + ",".join([str(v) for v in vector]) + "]" for vector in vectors]
+
+        async with self.db_client() as session:
+            async with session.begin():
+                await self._apply_search_settings(session, collection_name)
+                # one statement for the whole batch: an index scan per query through LATERAL
+                search_sql = sql_text(
+                    f'SELECT q.query_index, r.text, r.score, r.metadata, r.chunk_id '
+                    f'FROM unnest(CAST(:vectors AS text[])) WITH ORDINALITY AS q(query_vector, query_index) '
+                    f'CROSS JOIN LATERAL ('
+                    f'SELECT {PgVectorTableSchemeEnums.TEXT.value} as text, '
+                    f'{self._score_sql("CAST(q.query_vector AS vector)")} as score, '
+                    f'{PgVectorTableSchemeEnums.METADATA.value} as metadata, '
+                    f'{PgVectorTableSchemeEnums.CHUNK_ID.value} as chunk_id '
+                    f'FROM {self._collection_table(collection_name)} '
+                    f'WHERE {self._collection_filter(collection_name)} '
+                    f'ORDER BY {self._distance_sql("CAST(q.query_vector AS vector)")} '
+                    f'LIMIT :limit'
+                    f') r '
+                    f'ORDER BY q.query_index, r.score DESC'
+                )
+
+                result = await session.execute(search_sql, {"vectors": vector_strs, "limit": limit,
+                                                            **self._collection_params(collection_name)})
+                records = result.fetchall()
+
+        batch_results = [[] for _ in vectors]
+        for record in records:
+            batch_results[record.query_index - 1].append(
+                RetrivedDocument(
+                    text=record.text,
+                    score=record.score,
+                    metadata=record.metadata if record.metadata is not None else {},
+                    chunk_id=record.chunk_id,
+                )
+            )
+        return batch_results
+
+    async def get_by_chunk_ids(self, collection_name: str, chunk_ids: List[int]) -> List[RetrivedDocument]:
+        if not chunk_ids:
+            return []
+        is_collection_exists = await self.is_collection_exists(collection_name=collection_name)
+        if not is_collection_exists:
+            return []
+        async with self.db_client() as session:
+            select_sql = sql_text(
+                f'SELECT {PgVectorTableSchemeEnums.TEXT.value} as text, '
+                f'{PgVectorTableSchemeEnums.METADATA.value} as metadata, '
+                f'{PgVectorTableSchemeEnums.CHUNK_ID.value} as chunk_id '
+                f'FROM {self._collection_table(collection_name)} '
+                f'WHERE {self._collection_filter(collection_name)} '
+                f'AND {PgVectorTableSchemeEnums.CHUNK_ID.value} = ANY(CAST(:chunk_ids AS integer[]))'
+            )
+            result = await session.execute(select_sql, {"chunk_ids": [int(cid) for cid in chunk_ids],
+                                                        **self._collection_params(collection_name)})
+            records = result.fetchall()
+
+        return [
+            RetrivedDocument(
+                text=record.text,
+                score=0.0,
+                metadata=record.metadata if record.metadata is not None else {},
+                chunk_id=record.chunk_id,
+            )
+            for record in records
+        ]
+
     async def delete_by_chunk_ids(self, collection_name: str, chunk_ids: List[int]):
         if not chunk_ids:
             return
@@ -296,9 +723,12 @@ class PGVectorProvider(VectorDBInterface):
             return
         async with self.db_client() as session:
             async with session.begin():
-                placeholders = ",".join([str(cid) for cid in chunk_ids])
                 delete_sql = sql_text(
-                    f"DELETE FROM {collection_name} WHERE {PgVectorTableSchemeEnums.CHUNK_ID.value} IN ({placeholders})"
+                    f"DELETE FROM {self._collection_table(collection_name)} "
+                    f"WHERE {self._collection_filter(collection_name)} "
+                    f"AND {PgVectorTableSchemeEnums.CHUNK_ID.value} = ANY(CAST(:chunk_ids AS integer[]))"
                 )
-                await session.execute(delete_sql)
+                result = await session.execute(delete_sql, {"chunk_ids": [int(cid) for cid in chunk_ids],
+                                                            **self._collection_params(collection_name)})
+                await self.stats.increment(session, collection_name, -result.rowcount)
                 await session.commit()
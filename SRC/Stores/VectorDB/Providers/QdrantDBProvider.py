@@ -1,17 +1,26 @@
 from qdrant_client import models ,QdrantClient
 from ..VectorDBInterface import VectorDBInterface
 import logging
-from ..VectorDBEnums import DistanceMethodEnums
-from typing import List
+from ..VectorDBEnums import DistanceMethodEnums, QdrantVectorNameEnums
+from typing import List, Dict
 from Models.DB_Schemes import RetrivedDocument
+from Stores.Sparse.SparseEncoder import SparseEncoder
 
 class QdrantDBProvider(VectorDBInterface):
-    def __init__(self, db_client: str, distance_method: str = None, default_vector_size: int = 786, index_threshold: int = 10000):
+    def __init__(self, db_client: str, distance_method: str = None, default_vector_size: int = 786, index_threshold: int = 10000,
+                 sparse_vectors: bool = False, fusion: str = "rrf", sparse_encoder: SparseEncoder = None):
         self.db_client = db_client
         self.distance_method = None
         self.default_vector_size = default_vector_size
         self.index_threshold = index_threshold
 
+        # named dense + sparse (BM25, server-side IDF) vectors per point, fused in one Query API call
+        self.sparse_vectors = sparse_vectors
+        self.fusion = fusion
+        self.sparse_encoder = sparse_encoder or SparseEncoder()
+        # collection_name -> whether it was created with named dense + sparse vectors
+        self.hybrid_collections: Dict[str, bool] = {}
+
         self.logger = logging.getLogger('uvicorn')
 
         if distance_method == DistanceMethodEnums.COSINE.value:
@@ -43,35 +52,84 @@ class QdrantDBProvider(VectorDBInterface):
 
 
     async def delete_collection(self, collection_name: str):
-        if self.is_collection_exists(collection_name) :
+        self.hybrid_collections.pop(collection_name, None)
+        if await self.is_collection_exists(collection_name) :
             self.logger.info(f"Deleting collection: {collection_name}")
             return self.client.delete_collection(collection_name = collection_name)
 
 
     async def create_collection(self, collection_name: str, embedding_size: int, do_reset: bool = False):
         if do_reset:
+            self.hybrid_collections.pop(collection_name, None)
             _ = self.client.delete_collection(collection_name=collection_name)
 
-        if not self.is_collection_exists(collection_name):
+        if not await self.is_collection_exists(collection_name):
             self.logger.info(f"Creating new Qdrant collection : {collection_name}")
-            _ = self.client.create_collection(
-                collection_name=collection_name,
-                vectors_config=models.VectorParams(
-                    size=embedding_size,
-                    distance=self.distance_method
-                )
+            dense_params = models.VectorParams(
+                size=embedding_size,
+                distance=self.distance_method
             )
+            if self.sparse_vectors:
+                _ = self.client.create_collection(
+                    collection_name=collection_name,
+                    vectors_config={QdrantVectorNameEnums.DENSE.value: dense_params},
+                    sparse_vectors_config={
+                        QdrantVectorNameEnums.SPARSE.value: models.SparseVectorParams(modifier=models.Modifier.IDF)
+                    }
+                )
+            else:
+                _ = self.client.create_collection(
+                    collection_name=collection_name,
+                    vectors_config=dense_params
+                )
+            self.hybrid_collections[collection_name] = self.sparse_vectors
 
             return True
 
         return False
+
+    def _is_hybrid_collection(self, collection_name: str) -> bool:
+        if collection_name not in self.hybrid_collections:
+            try:
+                params = self.client.get_collection(collection_name = collection_name).config.params
+            except Exception:
+                return False
+            self.hybrid_collections[collection_name] = bool(params.sparse_vectors) and \
+                QdrantVectorNameEnums.SPARSE.value in params.sparse_vectors
+        return self.hybrid_collections[collection_name]
+
+    def _point_vector(self, collection_name: str, text: str, vector: list):
+        if not self._is_hybrid_collection(collection_name):
+            return vector
+        indices, values = self.sparse_encoder.encode_document(text)
+        return {
+            QdrantVectorNameEnums.DENSE.value: vector,
+            QdrantVectorNameEnums.SPARSE.value: models.SparseVector(indices=indices, values=values),
+        }
+
+    def _dense_query(self, collection_name: str, vector: list):
+        if not self._is_hybrid_collection(collection_name):
+            return vector
+        return models.NamedVector(name=QdrantVectorNameEnums.DENSE.value, vector=vector)
+
+    @staticmethod
+    def _to_documents(results) -> List[RetrivedDocument]:
+        return [
+            RetrivedDocument(
+                text=result.payload["text"],
+                score=result.score,
+                metadata=result.payload.get("metadata") or {},
+                chunk_id=result.id if isinstance(result.id, int) else None,
+            )
+            for result in results
+        ]
     
     async def insert_one(self, collection_name: str, 
                         text : str , vector : list ,
                         metadata : dict = None ,
                         record_id : str = None):
 
-        if not self.is_collection_exists (collection_name) :
+        if not await self.is_collection_exists (collection_name) :
             self.logger.error (f"can not insert new record to non-existed collection {collection_name}")
             return False
         
@@ -81,7 +139,7 @@ class QdrantDBProvider(VectorDBInterface):
                 records = [
                     models.Record(
                         id = [record_id] ,
-                        vector = vector ,
+                        vector = self._point_vector(collection_name , text , vector) ,
                         payload = {
                             "text" : text ,
                             "metadata" : metadata
@@ -118,7 +176,7 @@ class QdrantDBProvider(VectorDBInterface):
             batch_records = [
                 models.Record(
                         id = batch_record_ids[x],
-                        vector = batch_vectors[x] ,
+                        vector = self._point_vector(collection_name , batch_texts[x] , batch_vectors[x]) ,
                         payload = {
                             "text" : batch_texts[x] ,
                             "metadata" : batch_metadata[x]
@@ -138,13 +196,13 @@ class QdrantDBProvider(VectorDBInterface):
 
         return True
     async def search_by_vector(self , collection_name : str , vector : list , limit : int = 5 ) :
-        if not self.is_collection_exists(collection_name):
+        if not await self.is_collection_exists(collection_name):
             return []
 
         try:
             results = self.client.search(
                 collection_name = collection_name ,
-                query_vector = vector ,
+                query_vector = self._dense_query(collection_name , vector) ,
                 limit = limit
             )
         except Exception as e:
@@ -154,12 +212,116 @@ class QdrantDBProvider(VectorDBInterface):
         if not results or len(results) == 0 :
             return []
 
+        return self._to_documents(results)
+
+    async def search_many(self, collection_name: str, vectors: List[list], limit: int = 5) -> List[List[RetrivedDocument]]:
+        if not await self.is_collection_exists(collection_name):
+            return [[] for _ in vectors]
+
+        try:
+            batch_results = self.client.search_batch(
+                collection_name = collection_name ,
+                requests = [
+                    models.SearchRequest(vector = self._dense_query(collection_name , vector) , limit = limit , with_payload = True)
+                    for vector in vectors
+                ]
+            )
+        except Exception as e:
+            self.logger.error(f"Error while batch searching collection {collection_name}: {e}")
+            return [[] for _ in vectors]
+
+        return [self._to_documents(results) for results in batch_results]
+
+    async def search_hybrid(self, collection_name: str, vector: list, query_text: str, project_id: int,
+                            limit: int = 5, candidates_limit: int = None, rrf_k: int = 60) -> List[RetrivedDocument]:
+        """
+        One Query API request: dense and sparse prefetches fused server-side (RRF, or DBSF when the
+        server/client support it). Collections without sparse vectors return None so callers fall back.
+        """
+        if not await self.is_collection_exists(collection_name) or not self._is_hybrid_collection(collection_name):
+            return None
+
+        try:
+            response = self.client.query_points(
+                collection_name = collection_name ,
+                **self._hybrid_query(vector , query_text , limit , candidates_limit)
+            )
+        except Exception as e:
+            self.logger.error(f"Error while hybrid searching collection {collection_name}: {e}")
+            return None
+
+        return self._to_documents(response.points)
+
+    async def search_hybrid_many(self, collection_name: str, vectors: List[list], query_texts: List[str], project_id: int,
+                                 limit: int = 5, candidates_limit: int = None, rrf_k: int = 60) -> List[List[RetrivedDocument]]:
+        """Every hybrid query of the batch in one query_batch_points request."""
+        if not await self.is_collection_exists(collection_name) or not self._is_hybrid_collection(collection_name):
+            return [None for _ in vectors]
+
+        try:
+            responses = self.client.query_batch_points(
+                collection_name = collection_name ,
+                requests = [
+                    models.QueryRequest(**self._hybrid_query(vector , query_text , limit , candidates_limit))
+                    for vector, query_text in zip(vectors , query_texts)
+                ]
+            )
+        except Exception as e:
+            self.logger.error(f"Error while batch hybrid searching collection {collection_name}: {e}")
+            return [None for _ in vectors]
+
+        return [self._to_documents(response.points) for response in responses]
+
+    def _hybrid_query(self, vector: list, query_text: str, limit: int, candidates_limit: int = None) -> dict:
+        """Dense and sparse prefetches plus the fusion query, shared by the single and batch requests."""
+        candidates_limit = candidates_limit or max(limit * 2, 10)
+        indices, values = self.sparse_encoder.encode_query(query_text)
+        prefetch = [models.Prefetch(query = vector , using = QdrantVectorNameEnums.DENSE.value , limit = candidates_limit)]
+        if indices:
+            prefetch.append(models.Prefetch(query = models.SparseVector(indices = indices , values = values) ,
+                                            using = QdrantVectorNameEnums.SPARSE.value , limit = candidates_limit))
+
+        fusion = getattr(models.Fusion, str(self.fusion).upper(), None) or models.Fusion.RRF
+        return {"prefetch": prefetch, "query": models.FusionQuery(fusion = fusion), "limit": limit, "with_payload": True}
+
+    async def get_by_chunk_ids(self, collection_name: str, chunk_ids: List[int]) -> List[RetrivedDocument]:
+        if not chunk_ids or not await self.is_collection_exists(collection_name):
+            return []
+        try:
+            records = self.client.retrieve(
+                collection_name = collection_name ,
+                ids = [int(cid) for cid in chunk_ids] ,
+                with_payload = True ,
+                with_vectors = False
+            )
+        except Exception as e:
+            self.logger.error(f"Error while retrieving records from {collection_name}: {e}")
+            return []
+
         return [
             RetrivedDocument(
-                text=result.payload["text"],
-                score=result.score,
-                metadata=result.payload.get("metadata") or {},
-                chunk_id=result.id if isinstance(result.id, int) else None,
+                text=record.payload["text"],
+                score=0.0,
+                metadata=record.payload.get("metadata") or {},
+                chunk_id=record.id if isinstance(record.id, int) else None,
             )
-            for result in results
-        ]
\ No newline at end of file
+            for record in records
+        ]
+
+    async def delete_by_chunk_ids(self, collection_name: str, chunk_ids: List[int]):
+        if not chunk_ids or not await self.is_collection_exists(collection_name):
+            return
+
+        # point ids are the chunk ids: one filter-based delete for the whole set
+        try:
+            self.client.delete(
+                collection_name = collection_name ,
+                points_selector = models.FilterSelector(
+                    filter = models.Filter(
+                        must = [models.HasIdCondition(has_id = [int(cid) for cid in chunk_ids])]
+                    )
+                ) ,
+                wait = True
+            )
+        except Exception as e:
+            self.logger.error(f"Error while deleting points from collection {collection_name}: {e}")
@@ -1,2 +1,4 @@
 from .QdrantDBProvider import QdrantDBProvider  
 from .PGVectorProvider import PGVectorProvider
+from .PGVectorPartitionedProvider import PGVectorPartitionedProvider
+from .NumpyMmapProvider import NumpyMmapProvider
@@ -4,6 +4,7 @@ class VectorDBEnums (Enum) :
 
     QDRANT = "QDRANT"
     PGVECTOR = "PGVECTOR"
+    NUMPY = "NUMPY"
 
 
 class DistanceMethodEnums (Enum) :
@@ -18,14 +19,37 @@ class PgVectorTableSchemeEnums (Enum) :
     VECTORS = "vectors"
     CHUNK_ID = "chunk_id"
     METADATA = "metadata"
+    COLLECTION = "collection_name"
     _PREFIX = "pgvector"
 
 
+class QdrantVectorNameEnums (Enum) :
+    DENSE = "dense"
+    SPARSE = "sparse"
+
+
+class PgVectorStorageModeEnums (Enum) :
+    TABLE = "TABLE"
+    PARTITIONED = "PARTITIONED"
+
+
 class PgvectorDistanceMethodEnums (Enum) :
     COSINE = "vector_cosine_ops"
-    DOT = "vector_l2_ops"
+    DOT = "vector_ip_ops"
+    L2 = "vector_l2_ops"
+
+
+class PgvectorDistanceOperatorEnums (Enum) :
+    # the operator an ORDER BY must use for an index of the matching opclass to serve it
+    COSINE = "<=>"
+    DOT = "<#>"
+    L2 = "<->"
+
+class NumpyVectorDTypeEnums (Enum) :
+    FLOAT32 = "float32"
+    FLOAT16 = "float16"
 
 class PgvectorIndexTypeEnums (Enum) :
     IVFFLAT = "ivfflat"
     HNSW = "hnsw"
-    
\ No newline at end of file
+    
\ No newline at end of file
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+import asyncio
 from typing import List
 from Models.DB_Schemes import RetrivedDocument
 
@@ -51,6 +52,35 @@ class VectorDBInterface(ABC):
     def search_by_vector(self , collection_name : str , vector : list , limit : int ) -> List[RetrivedDocument] :
         pass
 
+    async def search_many(self, collection_name: str, vectors: List[list], limit: int) -> List[List[RetrivedDocument]]:
+        """Search several query vectors at once, one result list per vector. Override in providers with a batch query."""
+        return [
+            await self.search_by_vector(collection_name=collection_name, vector=vector, limit=limit)
+            for vector in vectors
+        ]
+
+    async def search_hybrid(self, collection_name: str, vector: list, query_text: str, project_id: int,
+                            limit: int = 5, candidates_limit: int = None, rrf_k: int = 60) -> List[RetrivedDocument]:
+        """Dense + full-text search fused inside the database. Returns None in providers that can not run it."""
+        return None
+
+    async def search_hybrid_many(self, collection_name: str, vectors: List[list], query_texts: List[str], project_id: int,
+                                 limit: int = 5, candidates_limit: int = None, rrf_k: int = 60) -> List[List[RetrivedDocument]]:
+        """Hybrid search for several queries, one result list (or None) per query. Override in providers with a batch query."""
+        return list(await asyncio.gather(*[
+            self.search_hybrid(collection_name=collection_name, vector=vector, query_text=query_text,
+                               project_id=project_id, limit=limit, candidates_limit=candidates_limit, rrf_k=rrf_k)
+            for vector, query_text in zip(vectors, query_texts)
+        ]))
+
+    async def get_by_chunk_ids(self, collection_name: str, chunk_ids: List[int]) -> List[RetrivedDocument]:
+        """Fetch stored records (text, metadata) by chunk_id, score 0. Used for sparse-only hybrid hits."""
+        return []
+
     async def delete_by_chunk_ids(self, collection_name: str, chunk_ids: List[int]):
         """Remove vector rows for the given chunk_ids (e.g. before deleting chunks). Override in providers that support it."""
         pass
+
+    async def get_index_build_status(self, collection_name: str) -> dict:
+        """Report background index build state/progress for a collection. Override in providers that build indexes."""
+        return None
@@ -1,5 +1,7 @@
-from .Providers import QdrantDBProvider, PGVectorProvider
-from .VectorDBEnums import VectorDBEnums
+from .Providers import QdrantDBProvider, PGVectorProvider, PGVectorPartitionedProvider, NumpyMmapProvider
+from .VectorDBEnums import VectorDBEnums, PgVectorStorageModeEnums
+from Stores.Sparse.SparseEnums import SparseBackendEnums
+from .PGVectorIndexManager import PGVectorIndexManager
 from Controllers.BaseController import basecontroller
 from sqlalchemy.orm import sessionmaker 
 
@@ -20,16 +22,57 @@ class VectorDBProviderFactory :
                 db_client = qdrant_db_client,
                 distance_method = self.config.VECTORDB_DISTANCE_METHOD,
                 default_vector_size = self.config.EMBEDDING_SIZE,
-                index_threshold = self.config.VECTORDB_PGVEC_INDEX_THRESHOLD
+                index_threshold = self.config.VECTORDB_PGVEC_INDEX_THRESHOLD,
+                sparse_vectors = self.config.SPARSE_BACKEND == SparseBackendEnums.QDRANT.value,
+                fusion = self.config.QDRANT_HYBRID_FUSION,
             )
 
 
-        if provider == VectorDBEnums.PGVECTOR.value :
-            return PGVectorProvider(
-                db_client = self.db_client,
+        if provider == VectorDBEnums.NUMPY.value :
+            numpy_db_path = self.base_controller.get_database_path(db_name = self.config.VECTORDB_PATH)
+            return NumpyMmapProvider(
+                db_client = numpy_db_path,
                 distance_method = self.config.VECTORDB_DISTANCE_METHOD,
                 default_vector_size = self.config.EMBEDDING_SIZE,
+                dtype = self.config.VECTORDB_NUMPY_DTYPE,
+                binary_prefilter = self.config.VECTORDB_NUMPY_BINARY_PREFILTER,
+                prefilter_oversample = self.config.VECTORDB_NUMPY_PREFILTER_OVERSAMPLE,
+                max_segments = self.config.VECTORDB_NUMPY_MAX_SEGMENTS,
+            )
+
+
+        if provider == VectorDBEnums.PGVECTOR.value :
+            index_manager = PGVectorIndexManager(
+                hnsw_m = self.config.VECTORDB_PGVEC_HNSW_M,
+                hnsw_ef_construction = self.config.VECTORDB_PGVEC_HNSW_EF_CONSTRUCTION,
+                hnsw_ef_search = self.config.VECTORDB_PGVEC_HNSW_EF_SEARCH,
+                build_time_budget_seconds = self.config.VECTORDB_PGVEC_INDEX_BUILD_BUDGET_SECONDS,
+                hnsw_build_rows_per_second = self.config.VECTORDB_PGVEC_HNSW_BUILD_ROWS_PER_SECOND,
+                drift_factor = self.config.VECTORDB_PGVEC_INDEX_REBUILD_DRIFT,
+                forced_index_type = self.config.VECTORDB_PGVEC_INDEX_TYPE,
+            )
+            pgvector_config = dict(
+                default_vector_size = self.config.EMBEDDING_SIZE,
+                distance_method = self.config.VECTORDB_DISTANCE_METHOD,
                 index_threshold = self.config.VECTORDB_PGVEC_INDEX_THRESHOLD,
+                maintenance_work_mem = self.config.VECTORDB_PGVEC_MAINTENANCE_WORK_MEM,
+                max_parallel_maintenance_workers = self.config.VECTORDB_PGVEC_MAX_PARALLEL_MAINTENANCE_WORKERS,
+                hnsw_m = self.config.VECTORDB_PGVEC_HNSW_M,
+                hnsw_ef_construction = self.config.VECTORDB_PGVEC_HNSW_EF_CONSTRUCTION,
+                index_manager = index_manager,
+            )
+
+            if self.config.VECTORDB_PGVEC_STORAGE_MODE == PgVectorStorageModeEnums.PARTITIONED.value :
+                return PGVectorPartitionedProvider(
+                    db_client = self.db_client,
+                    partitions_count = self.config.VECTORDB_PGVEC_PARTITIONS,
+                    iterative_scan = self.config.VECTORDB_PGVEC_ITERATIVE_SCAN,
+                    **pgvector_config
+                )
+
+            return PGVectorProvider(
+                db_client = self.db_client,
+                **pgvector_config
             )
 
-        return None 
\ No newline at end of file
+        return None 
@@ -0,0 +1,147 @@
+"""
+Semantic cache of RAG answers, per worker process.
+Entries are grouped by (project_id, limit, prompt language) and matched on the cosine similarity of the query
+embedding: one matrix-vector product against the stored (normalized) query vectors per lookup.
+Each group remembers the project's index generation (projects.project_index_generation, bumped
+on push/reset/delete); a lookup with another generation drops the group, so answers built on an
+old index are never served. Concurrent identical questions are coalesced with single_flight.
+"""
+import asyncio
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+from Utils.metrics import ANSWER_CACHE_HITS, ANSWER_CACHE_MISSES, ANSWER_CACHE_COALESCED
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_question(text: str) -> str:
+    return _WHITESPACE.sub(" ", (text or "").strip().lower())
+
+
+class _ProjectEntries:
+
+    def __init__(self, generation: int):
+        self.generation = generation
+        self.vectors: Optional[np.ndarray] = None
+        self.values: list = []
+        self.expires: list = []
+
+    def append(self, vector: np.ndarray, value: Any, expires_at: float, max_entries: int):
+        if self.vectors is None:
+            self.vectors = vector[None, :]
+        else:
+            self.vectors = np.vstack([self.vectors, vector])
+        self.values.append(value)
+        self.expires.append(expires_at)
+        if len(self.values) > max_entries:
+            # oldest entries first out
+            drop = len(self.values) - max_entries
+            self.vectors = self.vectors[drop:]
+            self.values = self.values[drop:]
+            self.expires = self.expires[drop:]
+
+
+class _Flight:
+    """The task computing one key's value and how many callers await it."""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SemanticAnswerCache:
+
+    def __init__(self, similarity_threshold: float = 0.95, max_entries_per_project: int = 1000,
+                 ttl_seconds: float = 3600, max_projects: int = 256):
+        self.similarity_threshold = similarity_threshold
+        self.max_entries_per_project = max_entries_per_project
+        self.ttl_seconds = ttl_seconds
+        self.max_projects = max_projects
+        self._groups: "OrderedDict[Tuple[int, int, Optional[str]], _ProjectEntries]" = OrderedDict()
+        self._in_flight: Dict[Hashable, _Flight] = {}
+
+    @staticmethod
+    def _normalize(vector) -> Optional[np.ndarray]:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm > 0 else None
+
+    def _group(self, project_id: int, limit: int, generation: int, create: bool,
+               language: Optional[str] = None) -> Optional[_ProjectEntries]:
+        key = (project_id, limit, language)
+        group = self._groups.get(key)
+        if group is not None and group.generation != generation:
+            del self._groups[key]
+            group = None
+        if group is None and create:
+            group = self._groups[key] = _ProjectEntries(generation)
+            while len(self._groups) > self.max_projects:
+                self._groups.popitem(last=False)
+        if group is not None:
+            self._groups.move_to_end(key)
+        return group
+
+    def get(self, project_id: int, limit: int, generation: int, query_vector, language: Optional[str] = None) -> Any:
+        """Cached value of the most similar stored question above the threshold, or None."""
+        vector = self._normalize(query_vector)
+        group = self._group(project_id, limit, generation, create=False, language=language)
+        if vector is None or group is None or group.vectors is None or group.vectors.shape[1] != vector.shape[0]:
+            ANSWER_CACHE_MISSES.inc()
+            return None
+
+        similarities = group.vectors @ vector
+        similarities[np.asarray(group.expires) < time.monotonic()] = -np.inf
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.similarity_threshold:
+            ANSWER_CACHE_MISSES.inc()
+            return None
+        ANSWER_CACHE_HITS.inc()
+        return group.values[best]
+
+    def put(self, project_id: int, limit: int, generation: int, query_vector, value: Any,
+            language: Optional[str] = None):
+        vector = self._normalize(query_vector)
+        if vector is None:
+            return
+        group = self._group(project_id, limit, generation, create=True, language=language)
+        if group.vectors is not None and group.vectors.shape[1] != vector.shape[0]:
+            # embedding model changed: start over
+            group = self._groups[(project_id, limit, language)] = _ProjectEntries(generation)
+        group.append(vector, value, time.monotonic() + self.ttl_seconds, self.max_entries_per_project)
+
+    def invalidate(self, project_id: int):
+        for key in [key for key in self._groups if key[0] == project_id]:
+            del self._groups[key]
+
+    async def single_flight(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run factory once for concurrent callers with the same key; they all await its result.
+        The factory runs in its own task, so a caller that is cancelled (client gone) does not
+        cancel the others; it is only cancelled once no caller is left waiting.
+        """
+        flight = self._in_flight.get(key)
+        if flight is None:
+            flight = self._in_flight[key] = _Flight(asyncio.get_running_loop().create_task(factory()))
+            flight.task.add_done_callback(lambda task: self._flight_done(key, flight))
+        else:
+            ANSWER_CACHE_COALESCED.inc()
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+
+    def _flight_done(self, key: Hashable, flight: _Flight):
+        if self._in_flight.get(key) is flight:
+            del self._in_flight[key]
+        if not flight.task.cancelled():
+            # nobody may be waiting any more: keep "exception was never retrieved" out of the logs
+            flight.task.exception()
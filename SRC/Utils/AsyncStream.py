@@ -0,0 +1,61 @@
+"""
+Bridge blocking iterators (provider SDK streams) to async generators.
+The iterator is consumed in a worker thread and its items are handed to the event loop as they
+arrive. When the async side stops early (client disconnected, task cancelled) the worker stops
+pulling and closes the iterator, which closes the upstream HTTP stream.
+A stream holds its thread for the whole generation: pass a dedicated executor so streams never
+take the default executor's threads from asyncio.to_thread callers.
+"""
+import asyncio
+import threading
+from concurrent.futures import Executor
+from typing import AsyncIterator, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+_END = object()
+
+
+async def iterate_in_thread(iterator: Iterator[T], executor: Optional[Executor] = None) -> AsyncIterator[T]:
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+
+    def put(item):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:
+            # event loop already closed: nobody is listening any more
+            stop.set()
+
+    def produce():
+        try:
+            if stop.is_set():
+                # gave up while queued for a thread: do not open the stream at all
+                return
+            for item in iterator:
+                if stop.is_set():
+                    break
+                put(item)
+        except BaseException as e:
+            put(e)
+        finally:
+            close = getattr(iterator, "close", None)
+            if close:
+                try:
+                    close()
+                except Exception:
+                    pass
+            put(_END)
+
+    loop.run_in_executor(executor, produce)
+    try:
+        while True:
+            item = await queue.get()
+            if item is _END:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
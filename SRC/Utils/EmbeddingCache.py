@@ -0,0 +1,96 @@
+"""
+Cache of query embeddings, per worker process, with an optional tier shared by all workers.
+Keys are (embedding backend, model, document type, normalized text); only query embeddings are
+cached (EmbeddingService), so repeated questions skip the embedding API entirely.
+- Local tier: LRU of float32 vectors bounded by max_entries, each entry expiring after ttl_seconds.
+- Shared tier (optional): Postgres table query_embedding_cache (QueryEmbeddingCacheModel). A
+  shared hit is copied into the local tier; a failing shared tier only costs a miss.
+"""
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+
+from Utils.AnswerCache import normalize_question
+from Utils.metrics import EMBEDDING_CACHE_HITS, EMBEDDING_CACHE_MISSES
+
+logger = logging.getLogger("uvicorn")
+
+SHARED_CLEANUP_SECONDS = 600
+
+
+class QueryEmbeddingCache:
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 86400, shared=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.shared = shared
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._last_cleanup = time.monotonic()
+
+    @staticmethod
+    def key(namespace: str, document_type: str, text: str) -> str:
+        raw = "\x1f".join([namespace or "", document_type or "", normalize_question(text)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _get_local(self, key: str) -> Optional[list]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        vector, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return vector.tolist()
+
+    def _put_local(self, key: str, vector):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (np.asarray(vector, dtype=np.float32), time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_many(self, keys: List[str]) -> List[Optional[list]]:
+        """Cached vector per key (None for misses)."""
+        vectors = [self._get_local(key) for key in keys]
+        local_hits = sum(vector is not None for vector in vectors)
+        if local_hits:
+            EMBEDDING_CACHE_HITS.labels(tier="local").inc(local_hits)
+
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing and self.shared is not None:
+            try:
+                found = await self.shared.get_many([keys[i] for i in missing])
+            except Exception as e:
+                logger.warning("Shared embedding cache unavailable: %s", e)
+                found = {}
+            for i in missing:
+                vector = found.get(keys[i])
+                if vector is not None:
+                    vectors[i] = list(vector)
+                    self._put_local(keys[i], vector)
+            if found:
+                EMBEDDING_CACHE_HITS.labels(tier="shared").inc(len(found))
+
+        misses = sum(vector is None for vector in vectors)
+        if misses:
+            EMBEDDING_CACHE_MISSES.inc(misses)
+        return vectors
+
+    async def put_many(self, keys: List[str], vectors: List[list]):
+        items = [(key, vector) for key, vector in zip(keys, vectors) if vector is not None and len(vector)]
+        for key, vector in items:
+            self._put_local(key, vector)
+        if items and self.shared is not None:
+            try:
+                await self.shared.put_many(items, self.ttl_seconds)
+                if time.monotonic() - self._last_cleanup > SHARED_CLEANUP_SECONDS:
+                    self._last_cleanup = time.monotonic()
+                    await self.shared.delete_expired()
+            except Exception as e:
+                logger.warning("Shared embedding cache unavailable: %s", e)
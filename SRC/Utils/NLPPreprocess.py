@@ -1,37 +1,83 @@
 """
 NLP preprocessing for BM25: tokenization and lemmatization.
 Used to normalize corpus and query text for sparse retrieval only; dense embeddings use original text.
+
+The analyzer is initialized once (init_analyzer, called at startup) from locally installed NLTK
+data: NLTK_DATA_DIR / the NLTK_DATA environment variable, bundled into the Docker image. Nothing is
+downloaded at request time; without WordNet data tokens are kept as they are.
+Tokens come from one precompiled regex; term -> lemma lookups go through a bounded LRU cache.
+analyze_many lemmatizes a whole corpus in a process pool for index builds.
 """
-from typing import List
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Callable, List, Optional
+import logging
+import multiprocessing
+import os
 import re
+import threading
 
-_NLTK_DOWNLOADED = False
+logger = logging.getLogger("uvicorn")
 
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
 
-def _ensure_nltk() -> None:
-    global _NLTK_DOWNLOADED
-    if _NLTK_DOWNLOADED:
-        return
-    try:
-        import nltk
-        nltk.download("wordnet", quiet=True)
-        nltk.download("punkt", quiet=True)
-        nltk.download("omw-1.4", quiet=True)
-        _NLTK_DOWNLOADED = True
-    except Exception:
-        pass
+DEFAULT_LEMMA_CACHE_SIZE = 100_000
+PARALLEL_MIN_DOCS = 2000
+
+_lemma: Optional[Callable[[str], str]] = None
+_init_lock = threading.Lock()
+
+
+def init_analyzer(data_dir: Optional[str] = None, lemma_cache_size: int = DEFAULT_LEMMA_CACHE_SIZE) -> bool:
+    """
+    Load the WordNet lemmatizer once. Returns False (identity lemmas) when nltk or its data is missing.
+    Safe to call again, e.g. in process pool workers.
+    """
+    global _lemma
+    with _init_lock:
+        lemmatize = None
+        try:
+            import nltk
+            if data_dir and data_dir not in nltk.data.path:
+                nltk.data.path.insert(0, data_dir)
+            from nltk.stem import WordNetLemmatizer
+            lemmatizer = WordNetLemmatizer()
+            # WordNet is a lazy corpus loader: force it now, its first load is not thread safe
+            lemmatizer.lemmatize("warming")
+            lemmatize = lemmatizer.lemmatize
+        except LookupError:
+            logger.warning("WordNet data not found (set NLTK_DATA_DIR); BM25 terms will not be lemmatized")
+        except Exception as e:
+            logger.warning("NLTK lemmatizer unavailable (%s); BM25 terms will not be lemmatized", e)
+
+        _lemma = lru_cache(maxsize=lemma_cache_size)(lemmatize or (lambda token: token))
+        return lemmatize is not None
+
+
+def _get_lemma() -> Callable[[str], str]:
+    if _lemma is None:
+        init_analyzer(os.environ.get("NLTK_DATA"))
+    return _lemma
 
 
 def tokenize(text: str) -> List[str]:
-    """Tokenize text into words (after nltk download). Falls back to simple split if nltk unavailable."""
-    if not text or not text.strip():
+    """Lowercased word tokens."""
+    if not text:
         return []
-    _ensure_nltk()
-    try:
-        from nltk import word_tokenize
-        return word_tokenize(text.lower())
-    except Exception:
-        return re.findall(r"\b\w+\b", text.lower())
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def lemmatize_tokens(tokens: List[str]) -> List[str]:
+    """Lemmatize a list of tokens."""
+    if not tokens:
+        return []
+    lemma = _get_lemma()
+    return [lemma(t) for t in tokens]
+
+
+def analyze(text: str) -> List[str]:
+    """BM25 terms of text: tokenize, then lemmatize each token."""
+    return lemmatize_tokens(tokenize(text))
 
 
 def lemmatize_text(text: str) -> str:
@@ -39,28 +85,34 @@ def lemmatize_text(text: str) -> str:
     Lemmatize text for BM25: tokenize, lemmatize each token, rejoin.
     Returns normalized string for indexing or querying.
     """
-    if not text or not text.strip():
-        return ""
-    _ensure_nltk()
-    try:
-        from nltk import word_tokenize
-        from nltk.stem import WordNetLemmatizer
-        lemmatizer = WordNetLemmatizer()
-        tokens = word_tokenize(text.lower())
-        lemmas = [lemmatizer.lemmatize(t) for t in tokens]
-        return " ".join(lemmas)
-    except Exception:
-        return text.lower()
+    return " ".join(analyze(text))
 
 
-def lemmatize_tokens(tokens: List[str]) -> List[str]:
-    """Lemmatize a list of tokens."""
-    if not tokens:
-        return []
-    _ensure_nltk()
+def _analyze_batch(texts: List[str]) -> List[List[str]]:
+    return [analyze(text) for text in texts]
+
+
+def analyze_many(texts: List[str], workers: int = 0, data_dir: Optional[str] = None,
+                 min_parallel_docs: int = PARALLEL_MIN_DOCS) -> List[List[str]]:
+    """
+    analyze() over a corpus, in input order. Corpora of at least min_parallel_docs texts are split
+    across a process pool (workers, 0 = CPU count); smaller ones run inline.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(texts) < max(min_parallel_docs, 2):
+        return _analyze_batch(texts)
+
+    batch_size = max(1, -(-len(texts) // (workers * 4)))
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+    results = []
     try:
-        from nltk.stem import WordNetLemmatizer
-        lemmatizer = WordNetLemmatizer()
-        return [lemmatizer.lemmatize(t) for t in tokens]
-    except Exception:
-        return tokens
+        # spawn: forking a threaded server process can deadlock the children
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=init_analyzer,
+                                 initargs=(data_dir or os.environ.get("NLTK_DATA"),)) as pool:
+            for batch in pool.map(_analyze_batch, batches):
+                results.extend(batch)
+    except Exception as e:
+        logger.warning("Parallel BM25 analysis failed (%s); analyzing inline", e)
+        return _analyze_batch(texts)
+    return results
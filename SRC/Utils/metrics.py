@@ -1,5 +1,5 @@
 
-from prometheus_client import Counter, Histogram, generate_latest , CONTENT_TYPE_LATEST
+from prometheus_client import Counter, Gauge, Histogram, generate_latest , CONTENT_TYPE_LATEST
 from fastapi import Request, Response,FastAPI
 from starlette.middleware.base import BaseHTTPMiddleware
 import time
@@ -18,6 +18,113 @@ REQUEST_LATENCY = Histogram(
     ['method', 'endpoint']
 )
 
+BM25_CACHE_HITS = Counter(
+    'bm25_cache_hits',
+    'BM25 index lookups served from the in-memory cache'
+)
+
+BM25_CACHE_MISSES = Counter(
+    'bm25_cache_misses',
+    'BM25 index lookups that loaded the index from disk'
+)
+
+BM25_CACHE_EVICTIONS = Counter(
+    'bm25_cache_evictions',
+    'BM25 indexes evicted from the cache to stay within its memory budget'
+)
+
+BM25_CACHE_BYTES = Gauge(
+    'bm25_cache_bytes',
+    'Approximate size of the BM25 indexes held in the cache'
+)
+
+ANSWER_CACHE_HITS = Counter(
+    'answer_cache_hits',
+    'RAG answers served from the semantic answer cache'
+)
+
+ANSWER_CACHE_MISSES = Counter(
+    'answer_cache_misses',
+    'RAG questions not found in the semantic answer cache'
+)
+
+ANSWER_CACHE_COALESCED = Counter(
+    'answer_cache_coalesced',
+    'RAG questions that waited for an identical in-flight question instead of calling the LLM'
+)
+
+RERANK_LATENCY = Histogram(
+    'rerank_latency',
+    'Time spent reranking the retrieved candidates of a question'
+)
+
+RERANK_CACHE_HITS = Counter(
+    'rerank_cache_hits',
+    'Candidate chunks whose rerank score was served from the score cache'
+)
+
+RERANK_TIMEOUTS = Counter(
+    'rerank_timeouts',
+    'Rerank calls that ran out of their time budget before all batches were scored'
+)
+
+LLM_PROVIDER_FAILURES = Counter(
+    'llm_provider_failures',
+    'Failed generation calls per LLM provider (errors and empty responses, retries included)',
+    ['provider']
+)
+
+LLM_FALLBACKS = Counter(
+    'llm_fallbacks',
+    'Generation requests sent to a fallback LLM provider',
+    ['provider']
+)
+
+LLM_HEDGED_REQUESTS = Counter(
+    'llm_hedged_requests',
+    'Generation requests that started a second provider because the first was slower than its p95'
+)
+
+LLM_CIRCUIT_OPEN = Gauge(
+    'llm_circuit_open',
+    'Whether the circuit breaker of an LLM provider is open (1) or closed (0)',
+    ['provider']
+)
+
+SCHEDULER_WAIT_SECONDS = Histogram(
+    'provider_scheduler_wait_seconds',
+    'Time provider calls waited for a rate limit / concurrency slot',
+    ['provider', 'priority']
+)
+
+SCHEDULER_QUEUE_DEPTH = Gauge(
+    'provider_scheduler_queue_depth',
+    'Provider calls waiting for a slot',
+    ['provider', 'priority']
+)
+
+EMBEDDING_RETRIES = Counter(
+    'embedding_retries',
+    'Embedding calls retried after a rate limit or transient provider error'
+)
+
+EMBEDDING_CACHE_HITS = Counter(
+    'embedding_cache_hits',
+    'Query embeddings served from the embedding cache, by tier (local or shared)',
+    ['tier']
+)
+
+EMBEDDING_CACHE_MISSES = Counter(
+    'embedding_cache_misses',
+    'Query embeddings not found in the embedding cache'
+)
+
+EMBEDDING_BATCH_SIZE = Histogram(
+    'embedding_batch_size',
+    'Query texts sent per micro-batched embedding call',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+
 
 #Middleware
 
@@ -44,4 +151,4 @@ def setup_metrics(app: FastAPI):
     #Add metrics endpoint
     @app.get('/kfgndfkk4464_fubfd555',include_in_schema=False) 
     def metrics():
-        return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
\ No newline at end of file
+        return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
\ No newline at end of file
@@ -4,11 +4,22 @@ from Routes import Data
 from Routes import NLP
 from Helpers.Config import get_settings
 from Stores.LLM.LLMProviderFactory import LLMProviderFactory
+from Stores.LLM.EmbeddingService import EmbeddingService
+from Stores.LLM.ProviderScheduler import ProviderScheduler
+from Models.ProviderQuota_Model import ProviderQuotaModel
+from Models.QueryEmbedding_Model import QueryEmbeddingCacheModel
+from Utils.EmbeddingCache import QueryEmbeddingCache
 from Stores.VectorDB.VectorDBProviderFactory import VectorDBProviderFactory
 from Stores.LLM.Templates.template_parser import template_parser as TemplateParser
 from sqlalchemy.ext.asyncio import create_async_engine ,AsyncSession
 from sqlalchemy.orm import sessionmaker
 from Utils.metrics import setup_metrics
+from Utils.NLPPreprocess import init_analyzer
+from Utils.AnswerCache import SemanticAnswerCache
+from Stores.Rerank.RerankProviderFactory import RerankProviderFactory
+from Stores.Rerank.RerankService import RerankService
+from fastapi.concurrency import run_in_threadpool
+import os
 
 
 #Create FastAPI instance
@@ -46,14 +57,40 @@ async def startup_span ():
 
 
     #Genration Client
-    app.genration_client = llm_provider_factory.create(provider = settings.GENRATION_BACKEND)
-    app.genration_client.set_genration_model(model_id = settings.GENRATION_MODEL_ID)
+    app.genration_client = llm_provider_factory.create_genration_client()
 
 
     #Embedding Client
-    app.embedding_client = llm_provider_factory.create(provider = settings.EMBEDDING_BACKEND)
-    app.embedding_client.set_embedding_model(model_id = settings.EMBEDDING_MODEL_ID, 
-                                            embedding_size = settings.EMBEDDING_SIZE)
+    embedding_provider = llm_provider_factory.create(provider = settings.EMBEDDING_BACKEND)
+    embedding_provider.set_embedding_model(model_id = settings.EMBEDDING_MODEL_ID, 
+                                           embedding_size = settings.EMBEDDING_SIZE)
+
+    #Embedding quota scheduler: rate limits per provider + model, interactive queries before indexing
+    shared_quota = await ProviderQuotaModel.create_instance(db_client = app.db_client) if settings.EMBEDDING_SHARED_QUOTA else None
+    embedding_scheduler = ProviderScheduler(name = f"{settings.EMBEDDING_BACKEND}:{settings.EMBEDDING_MODEL_ID}",
+                                            requests_per_minute = settings.EMBEDDING_RPM_LIMIT,
+                                            tokens_per_minute = settings.EMBEDDING_TPM_LIMIT,
+                                            max_concurrency = settings.EMBEDDING_MAX_CONCURRENCY,
+                                            background_max_concurrency = settings.EMBEDDING_BACKGROUND_MAX_CONCURRENCY,
+                                            interactive_reserve = settings.EMBEDDING_INTERACTIVE_RESERVE,
+                                            shared_quota = shared_quota)
+
+    #Query embedding cache (per worker LRU, optionally shared through Postgres)
+    embedding_cache = None
+    if settings.EMBEDDING_CACHE_ENABLED :
+        shared_embedding_cache = await QueryEmbeddingCacheModel.create_instance(db_client = app.db_client) \
+            if settings.EMBEDDING_CACHE_SHARED else None
+        embedding_cache = QueryEmbeddingCache(max_entries = settings.EMBEDDING_CACHE_MAX_ENTRIES,
+                                              ttl_seconds = settings.EMBEDDING_CACHE_TTL_SECONDS,
+                                              shared = shared_embedding_cache)
+
+    app.embedding_client = EmbeddingService(client = embedding_provider,
+                                            scheduler = embedding_scheduler,
+                                            max_retries = settings.EMBEDDING_MAX_RETRIES,
+                                            batch_window_ms = settings.EMBEDDING_BATCH_WINDOW_MS,
+                                            batch_max_size = settings.EMBEDDING_BATCH_MAX_SIZE,
+                                            cache = embedding_cache,
+                                            backend = settings.EMBEDDING_BACKEND)
 
     #VectorDB Client
     app.vectordb_client = vectordb_provider_factory.create(provider = settings.VECTORDB_BACKEND)
@@ -62,6 +99,31 @@ async def startup_span ():
     #Template Parser
     app.template_parser = TemplateParser(language = settings.PRIMARY_LANGUAGE , default_language = settings.DEFUALT_LANGUAGE)
 
+    #Semantic answer cache (per worker, invalidated by project index generation)
+    app.answer_cache = None
+    if settings.ANSWER_CACHE_ENABLED :
+        app.answer_cache = SemanticAnswerCache(similarity_threshold = settings.ANSWER_CACHE_SIMILARITY,
+                                               max_entries_per_project = settings.ANSWER_CACHE_MAX_ENTRIES,
+                                               ttl_seconds = settings.ANSWER_CACHE_TTL_SECONDS)
+
+    #Reranker between retrieval and generation (optional)
+    app.reranker = None
+    reranker = RerankProviderFactory(settings).create(provider = settings.RERANK_BACKEND)
+    if reranker :
+        app.reranker = RerankService(reranker = reranker,
+                                     batch_size = settings.RERANK_BATCH_SIZE,
+                                     time_budget_ms = settings.RERANK_TIME_BUDGET_MS,
+                                     cache_size = settings.RERANK_CACHE_SIZE)
+
+    #BM25 analyzer: load lemmatizer data once, before the first request
+    await run_in_threadpool(init_analyzer, settings.NLTK_DATA_DIR or os.environ.get("NLTK_DATA"),
+                            settings.BM25_LEMMA_CACHE_SIZE)
+
+    #Warm BM25 cache for hot projects
+    if settings.BM25_PRELOAD_PROJECT_IDS :
+        from Stores.Sparse import BM25Index
+        await run_in_threadpool(BM25Index.preload, settings.BM25_PRELOAD_PROJECT_IDS)
+
  
 
 #Shutdown event
@@ -75,4 +137,4 @@ async def shutdown_span() :
 #Include routers
 app.include_router(Base.base_router)
 app.include_router(Data.data_router)
-app.include_router(NLP.nlp_router)
\ No newline at end of file
+app.include_router(NLP.nlp_router)
\ No newline at end of file